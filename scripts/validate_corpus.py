@@ -0,0 +1,178 @@
+# scripts/validate_corpus.py
+# Checks every event file in the library in parallel.
+# Run from project root: python -m scripts.validate_corpus [--fix] [--workers N] [--json]
+#
+# Reports:
+#   - files that fail validate_event_schema
+#   - dates that are not ISO 8601 (normalize_date would change them)
+#   - filenames that do not match build_event_filename(event)
+#   - duplicate slugs across files
+#
+# --fix rewrites non-ISO dates in place (atomically). Files are never
+# renamed: seed filenames are the keys stored in the posted log.
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.utils.filename import build_event_filename, normalize_date, slugify
+from src.utils.atomic import write_atomic
+from src.utils.paths import EVENTS_DIR, is_seed_event_file
+from src.validate_event import schema_errors
+
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_FILENAME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}-(?P<slug>.+)\.json$")
+
+
+def iter_event_files(directory: Path) -> Iterator[str]:
+    """Stream *.json paths without building a sorted list first."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and is_seed_event_file(entry.name):
+                yield entry.path
+
+
+def check_file(path_str: str, fix: bool = False) -> Optional[dict]:
+    """
+    Check one event file. Runs in a worker process.
+    Returns None for JSON files that are not event objects.
+    """
+    path = Path(path_str)
+    result = {"file": path.name, "errors": [], "fixed": False}
+
+    try:
+        event = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError, UnicodeDecodeError) as e:
+        result["errors"].append(f"Unreadable JSON: {e}")
+        return result
+
+    if not isinstance(event, dict):
+        return None
+
+    result["errors"].extend(schema_errors(event))
+
+    title = event.get("title")
+    match = _FILENAME_RE.match(path.name)
+    result["slug"] = match.group("slug") if match else slugify(str(title or path.stem))
+
+    date = event.get("date")
+    if isinstance(date, str) and not _ISO_DATE_RE.match(date):
+        normalized = normalize_date(date)
+        if _ISO_DATE_RE.match(normalized):
+            result["date_not_iso"] = {"date": date, "normalized": normalized}
+            if fix:
+                event["date"] = normalized
+                write_atomic(path, json.dumps(event, indent=2))
+                result["fixed"] = True
+        else:
+            result["errors"].append(f"Unparseable date: {date!r}")
+
+    if isinstance(title, str) and isinstance(date, str):
+        expected = build_event_filename(event)
+        if expected != path.name:
+            result["filename_mismatch"] = expected
+
+    return result
+
+
+def _check_file_with_fix(path_str: str) -> Optional[dict]:
+    return check_file(path_str, fix=True)
+
+
+def validate_corpus(directory: Path = EVENTS_DIR, fix: bool = False, workers: Optional[int] = None) -> dict:
+    """Check every event file in `directory` and return a summary report."""
+    worker = _check_file_with_fix if fix else check_file
+    paths = iter_event_files(directory)
+
+    if workers == 1:
+        results = map(worker, paths)
+        return _summarize(results)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _summarize(pool.map(worker, paths, chunksize=64))
+
+
+def _summarize(results: Iterator[Optional[dict]]) -> dict:
+    report = {
+        "checked": 0,
+        "invalid": {},
+        "date_not_iso": {},
+        "filename_mismatch": {},
+        "duplicate_slugs": {},
+        "fixed": [],
+    }
+    by_slug: dict[str, list[str]] = defaultdict(list)
+
+    for result in results:
+        if result is None:
+            continue
+        report["checked"] += 1
+        name = result["file"]
+        if result["errors"]:
+            report["invalid"][name] = result["errors"]
+        if "date_not_iso" in result:
+            report["date_not_iso"][name] = result["date_not_iso"]
+        if "filename_mismatch" in result:
+            report["filename_mismatch"][name] = result["filename_mismatch"]
+        if result["fixed"]:
+            report["fixed"].append(name)
+        if "slug" in result:
+            by_slug[result["slug"]].append(name)
+
+    report["duplicate_slugs"] = {
+        slug: sorted(names) for slug, names in by_slug.items() if len(names) > 1
+    }
+    report["fixed"].sort()
+    return report
+
+
+def _print_report(report: dict) -> None:
+    print(f"Checked {report['checked']} event file(s).\n")
+
+    for name, errors in sorted(report["invalid"].items()):
+        print(f"  INVALID   {name}: {'; '.join(errors)}")
+    for name, info in sorted(report["date_not_iso"].items()):
+        status = "FIXED" if name in report["fixed"] else "DATE"
+        print(f"  {status:<9} {name}: {info['date']!r} -> {info['normalized']}")
+    for name, expected in sorted(report["filename_mismatch"].items()):
+        print(f"  FILENAME  {name}: expected {expected}")
+    for slug, names in sorted(report["duplicate_slugs"].items()):
+        print(f"  DUPLICATE {slug}: {', '.join(names)}")
+
+    print(
+        f"\nInvalid: {len(report['invalid'])}  Non-ISO dates: {len(report['date_not_iso'])}  "
+        f"Filename mismatches: {len(report['filename_mismatch'])}  "
+        f"Duplicate slugs: {len(report['duplicate_slugs'])}  Fixed: {len(report['fixed'])}"
+    )
+
+
+def has_problems(report: dict) -> bool:
+    unfixed_dates = set(report["date_not_iso"]) - set(report["fixed"])
+    return bool(
+        report["invalid"] or unfixed_dates
+        or report["filename_mismatch"] or report["duplicate_slugs"]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate every event file in the library.")
+    parser.add_argument("--dir", type=Path, default=EVENTS_DIR, help="Events directory")
+    parser.add_argument("--fix", action="store_true", help="Rewrite non-ISO dates in place")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = validate_corpus(args.dir, fix=args.fix, workers=args.workers)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+    sys.exit(1 if has_problems(report) else 0)
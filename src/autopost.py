@@ -1,153 +1,402 @@
 # src/autopost.py
 import json
 import asyncio
+import contextlib
 import os
+import time
 from pathlib import Path
 from typing import Optional
 
 from src.validate_event import validate_or_fix_event
 from src.rewrite_x import rewrite_for_x
 from src.post_to_x import post_tweet
-from src.fetch_onthisday import fetch_onthisday_event
+from src.fetch_onthisday import fetch_onthisday_candidates
 from src.extract_event import extract_event
+from src.drafts import ready_draft, discard_draft
 from src.utils.log import log_info, log_warning, log_error
 from src.utils.alert import send_alert
+from src.utils.metrics import cycle, span, record
+from src.utils.tweet_length import weighted_length
+from src.utils.paths import EVENTS_DIR
+from src.outbox import get_outbox
+from src.catalog import get_catalog
+from src.checkpoint import Checkpoint, checkpoint_for, prune_checkpoints
+from src.dedupe import (
+    Fingerprint, backfill_seeds, event_fingerprint, get_duplicate_index, load_event_file, source_fingerprint,
+)
+from src.event import Event
 
 # --------------------------------------------------
 # Config
 # --------------------------------------------------
-EVENTS_DIR = Path("events")
-
-# DATA_DIR is where posted_log.json lives.
-# On Railway: mount a Volume at /data and set DATA_DIR=/data
-# Locally: defaults to the events/ directory
-_data_dir = Path(os.getenv("DATA_DIR", str(EVENTS_DIR)))
-POSTED_LOG = _data_dir / "posted_log.json"
-
 # Set DRY_RUN=true in .env to rewrite tweets without posting them
 DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"
 
-
-# --------------------------------------------------
-# Posted log helpers
-# --------------------------------------------------
-
-def load_posted_log() -> list[str]:
-    """Return the list of already-posted event titles/filenames."""
-    if not POSTED_LOG.exists():
-        return []
-    try:
-        return json.loads(POSTED_LOG.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        log_warning("posted_log.json is corrupt or unreadable — starting fresh.")
-        return []
-
-
-def save_posted_log(posted: list[str]) -> None:
-    _data_dir.mkdir(parents=True, exist_ok=True)
-    POSTED_LOG.write_text(json.dumps(posted, indent=2), encoding="utf-8")
+# Set SPECULATIVE_PREP=true to prepare the next seed event alongside the
+# live candidate, so a failed live path does not add the seed latency
+SPECULATIVE_PREP = os.getenv("SPECULATIVE_PREP", "false").lower() == "true"
 
 
 # --------------------------------------------------
 # Seed event fallback
 # --------------------------------------------------
 
-def pick_next_seed_event(posted: list[str]) -> Optional[Path]:
+def pick_next_seed_event(posted: set[str], after: Optional[str] = None) -> Optional[Path]:
     """
     Return the next unposted seed event JSON file,
-    sorted chronologically by filename (YYYY-MM-DD-slug.json).
+    in chronological order by filename (YYYY-MM-DD-slug.json).
     Returns None if all seed events have been posted.
+
+    Served from the event catalog's in-memory index, which is refreshed
+    once per cycle. `after` resumes the scan past an already-rejected file.
     """
-    all_events = sorted(
-        p for p in EVENTS_DIR.glob("*.json")
-        if p.name != POSTED_LOG.name
-    )
-    for path in all_events:
-        if path.name not in posted:
-            return path
-    return None
+    name = get_catalog().next_unposted(posted, after=after)
+    return EVENTS_DIR / name if name is not None else None
+
+
+def _pick_seed(posted: set[str]) -> tuple[Optional[Path], Optional[Fingerprint]]:
+    """
+    Next unposted seed event that is not a near-duplicate of anything
+    already posted (e.g. an event that already went out from the live path),
+    with its fingerprint. Returns (None, None) when none are left.
+    """
+    index = get_duplicate_index()
+    after = None
+    while (seed_path := pick_next_seed_event(posted, after=after)) is not None:
+        event = load_event_file(seed_path)
+        fingerprint = event_fingerprint(event) if event is not None else None
+        duplicate_of = index.find_duplicate(fingerprint) if fingerprint is not None else None
+        if duplicate_of is None:
+            return seed_path, fingerprint
+        log_info(f"Seed event {seed_path.name} duplicates posted '{duplicate_of}' — skipping.")
+        after = seed_path.name
+    return None, None
 
 
 # --------------------------------------------------
 # Main autopost pipeline
 # --------------------------------------------------
 
-async def run_autopost() -> None:
+async def _publish(
+    tweet: str,
+    post_key: str,
+    seed_file: Optional[str],
+    checkpoint: Optional[Checkpoint] = None,
+    fingerprint: Optional[Fingerprint] = None,
+    slot: Optional[str] = None,
+) -> Optional[float]:
     """
-    Full autopost pipeline:
-      1. Try live fetch from Wikipedia On This Day
-      2. If live fetch fails, fall back to next seed event
-      3. Validate the event
-      4. Rewrite for X
-      5. Post to X (or dry-run)
-      6. Mark as posted
+    Post a tweet through the outbox. Returns the retry time when X
+    rate-limited the post; it then stays queued in the outbox.
+
+    The event's fingerprint is indexed before sending, like the outbox
+    row, so near-duplicates are skipped even if the outcome is in doubt.
     """
-    log_info("--- Autopost cycle starting ---")
+    checkpoint = checkpoint or Checkpoint(None)
+    outbox = get_outbox()
+    if not outbox.begin(post_key, tweet, seed_file, slot=slot):
+        log_warning(f"'{post_key}' is already posted or in doubt — not sending it again.")
+        return None
+    if fingerprint is not None:
+        get_duplicate_index().add(post_key, fingerprint)
+
+    # tweepy is blocking — keep it off the event loop
+    with span("post"):
+        result = await asyncio.to_thread(post_tweet, tweet)
+        if not result["success"] and result["error"] == "rate_limit":
+            record("retries")
 
-    if DRY_RUN:
-        log_info("DRY RUN mode — tweets will be generated but not posted.")
+    if result["success"]:
+        outbox.mark_posted(post_key, result["tweet_id"])
+        checkpoint.save("posted", tweet_id=result["tweet_id"])
+        if seed_file is not None:
+            discard_draft(EVENTS_DIR / seed_file)
+        log_info(f"Posted and logged: '{post_key}' (tweet ID: {result['tweet_id']})")
+        return None
+
+    if result["error"] == "rate_limit":
+        outbox.mark_queued(post_key, result["retry_at"])
+        checkpoint.save("queued", retry_at=result["retry_at"])
+        log_warning(f"Post for '{post_key}' rate-limited — queued for retry.")
+        return result["retry_at"]
+
+    outbox.mark_failed(post_key, f"{result['error']}: {result.get('detail', '')}")
+    get_duplicate_index().remove(post_key)
+    checkpoint.save("failed", detail=result.get("detail", ""))
+    msg = f"Post failed for '{post_key}': {result.get('detail', 'unknown error')}"
+    log_error(msg)
+    await send_alert(f"ERROR: {msg}")
+    return None
 
-    posted = load_posted_log()
-    event = None
-    post_key = None  # What we store in posted log to prevent duplicates
 
-    # --------------------------------------------------
-    # 1. Try live fetch
-    # --------------------------------------------------
-    log_info("Attempting live fetch from Wikipedia On This Day...")
-    source = fetch_onthisday_event()
-
-    if "error" not in source:
-        # Check if we already posted this title today
-        post_key = source["title"]
-        if post_key in posted:
-            log_info(f"Already posted '{post_key}' — trying seed fallback.")
-        else:
-            log_info(f"Live event fetched: {source.get('year', '')} — {source['title']}")
-            event = await extract_event(source)
-            if "error" in event:
-                log_warning(f"Live extraction failed: {event['error']} — falling back to seed.")
-                event = None
+async def _prepare_live(posted_index: set[str], checkpoint: Optional[Checkpoint] = None) -> dict:
+    """
+    Live path: best unposted On This Day candidate, extracted and rewritten.
+    Resumes from the checkpoint's chosen source / validated event if the
+    slot already got that far on the live path.
+    Returns {"post_key", "tweet", "seed_file": None, "fingerprint"} or {"error": ...}.
+    """
+    checkpoint = checkpoint or Checkpoint(None)
+    resuming = checkpoint.get("path") == "live" and checkpoint.reached("chosen")
+
+    if resuming:
+        source = checkpoint.get("source")
+        log_info(f"Resuming live event from checkpoint: {source['title']}")
     else:
-        log_warning(f"Live fetch failed: {source['error']} — falling back to seed.")
+        log_info("Attempting live fetch from Wikipedia On This Day...")
+        with span("fetch", path="live"):
+            result = await fetch_onthisday_candidates()
+        if "error" in result:
+            return {"error": f"Live fetch failed: {result['error']}"}
+
+        index = get_duplicate_index()
+        source = None
+        for candidate in result["candidates"]:
+            if candidate["title"] in posted_index:
+                log_info(f"Already posted '{candidate['title']}' — trying next candidate.")
+                continue
+            duplicate_of = index.find_duplicate(source_fingerprint(candidate))
+            if duplicate_of is not None:
+                log_info(f"'{candidate['title']}' duplicates posted '{duplicate_of}' — trying next candidate.")
+                continue
+            source = candidate
+            break
+
+        if source is None:
+            return {"error": "All live candidates already posted"}
+
+        log_info(f"Live event fetched: {source.get('year', '')} — {source['title']}")
+        checkpoint.start(path="live", post_key=source["title"], source=source, seed_file=None)
+
+    if resuming and checkpoint.reached("validated"):
+        event = Event.from_dict(checkpoint.get("event"))
+    else:
+        with span("extract", path="live"):
+            event = await extract_event(source)
+        if "error" in event:
+            return {"error": f"Live extraction failed: {event['error']}"}
+        if isinstance(event, Event):
+            checkpoint.save("validated", event=event.to_dict())
+
+    with span("rewrite", path="live"):
+        tweet = await rewrite_for_x(event)
+    if tweet.startswith("ERROR"):
+        return {"error": f"Rewrite failed for '{source['title']}'"}
+    return {
+        "post_key": source["title"],
+        "tweet": tweet,
+        "seed_file": None,
+        "fingerprint": source_fingerprint(source),
+    }
 
-    # --------------------------------------------------
-    # 2. Fall back to seed events if live failed
-    # --------------------------------------------------
-    if event is None:
-        seed_path = pick_next_seed_event(posted)
 
+async def _prepare_seed(posted_index: set[str], checkpoint: Optional[Checkpoint] = None) -> dict:
+    """
+    Seed path: next unposted seed event, from its pre-built draft or
+    validated and rewritten. Resumes from the checkpoint's seed file /
+    validated event if the slot already got that far on the seed path.
+    Returns {"post_key", "tweet", "seed_file", "fingerprint"} or {"error": ..., "alert": ...}.
+    """
+    checkpoint = checkpoint or Checkpoint(None)
+    resuming = (
+        checkpoint.get("path") == "seed"
+        and checkpoint.reached("chosen")
+        and (EVENTS_DIR / checkpoint.get("seed_file", "")).is_file()
+    )
+
+    if resuming:
+        seed_path = EVENTS_DIR / checkpoint.get("seed_file")
+        seed_event = load_event_file(seed_path)
+        fingerprint = event_fingerprint(seed_event) if seed_event is not None else None
+        log_info(f"Resuming seed event from checkpoint: {seed_path.name}")
+    else:
+        seed_path, fingerprint = _pick_seed(posted_index)
         if seed_path is None:
             msg = "No unposted events remaining (live fetch failed and seed events exhausted)."
-            log_warning(msg)
-            send_alert(f"WARNING: {msg}")
-            return
-
+            return {"error": msg, "alert": f"WARNING: {msg}"}
         log_info(f"Using seed event: {seed_path.name}")
+        checkpoint.start(path="seed", post_key=seed_path.name, seed_file=seed_path.name)
+
+    prepared = {"post_key": seed_path.name, "seed_file": seed_path.name, "fingerprint": fingerprint}
+
+    # A pre-built draft (python -m src.drafts build) skips validation
+    # and rewrite entirely — no LLM calls at post time
+    tweet = ready_draft(seed_path)
+    if tweet is not None:
+        log_info(f"Using pre-generated draft for {seed_path.name}.")
+        return {**prepared, "tweet": tweet}
+
+    if resuming and checkpoint.reached("validated"):
+        event = Event.from_dict(checkpoint.get("event"))
+    else:
         try:
             event = json.loads(seed_path.read_text(encoding="utf-8"))
-            post_key = seed_path.name
         except (json.JSONDecodeError, OSError) as e:
             msg = f"Failed to load seed event {seed_path.name}: {e}"
-            log_error(msg)
-            send_alert(f"ERROR: {msg}")
-            return
+            return {"error": msg, "alert": f"ERROR: {msg}"}
 
         # Validate seed events (live events are validated inside extract_event)
-        event = await validate_or_fix_event(event)
+        with span("validate", path="seed"):
+            event = await validate_or_fix_event(event)
+        if isinstance(event, Event):
+            checkpoint.save("validated", event=event.to_dict())
+
+    with span("rewrite", path="seed"):
+        tweet = await rewrite_for_x(event)
+    if tweet.startswith("ERROR"):
+        msg = f"Rewrite failed for '{seed_path.name}' — skipping."
+        return {"error": msg, "alert": f"ERROR: {msg}"}
+    return {**prepared, "tweet": tweet}
+
+
+async def _prepare(posted_index: set[str], checkpoint: Optional[Checkpoint] = None) -> dict:
+    """
+    Produce a ready tweet, live first and seed as the fallback.
+
+    With SPECULATIVE_PREP the seed candidate is prepared concurrently as a
+    warm standby: live still wins whenever it succeeds (the seed task is
+    then cancelled), but a failed live path no longer adds the whole seed
+    latency on top — the cycle takes as long as the slower path alone.
+    Only the path that owns the slot writes the checkpoint; the standby
+    does not.
+    """
+    checkpoint = checkpoint or Checkpoint(None)
+
+    # The live path already failed for this slot before a restart
+    if checkpoint.get("path") == "seed" and checkpoint.reached("chosen"):
+        return await _prepare_seed(posted_index, checkpoint=checkpoint)
+
+    if not SPECULATIVE_PREP:
+        live = await _prepare_live(posted_index, checkpoint=checkpoint)
+        if "error" not in live:
+            return live
+        log_warning(f"{live['error']} — falling back to seed.")
+        return await _prepare_seed(posted_index, checkpoint=checkpoint)
+
+    live_task = asyncio.create_task(_prepare_live(posted_index, checkpoint=checkpoint))
+    seed_task = asyncio.create_task(_prepare_seed(posted_index))
+    try:
+        live = await live_task
+    except BaseException:
+        seed_task.cancel()
+        raise
+
+    if "error" not in live:
+        if not seed_task.done():
+            log_info("Live candidate ready — cancelling seed standby.")
+        seed_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await seed_task
+        return live
+
+    log_warning(f"{live['error']} — using seed standby.")
+    return await seed_task
+
+
+async def run_autopost(slot: str = "daily") -> Optional[float]:
+    """
+    Run one autopost cycle for a posting slot (see _run_cycle), recording
+    per-stage timing and cost spans under DATA_DIR/metrics.
+    """
+    with cycle("autopost"):
+        return await _run_cycle(slot)
+
+
+async def _run_cycle(slot: str) -> Optional[float]:
+    """
+    Full autopost pipeline:
+      0. Post a tweet held back by a rate limit once its retry time has
+         passed (nothing else runs then)
+      1. Try live fetch from Wikipedia On This Day (best unposted candidate)
+      2. If the live path fails, fall back to the next seed event
+         (prepared concurrently when SPECULATIVE_PREP=true)
+         (candidates that near-duplicate a posted event are skipped)
+      3. Validate the event
+      4. Rewrite for X
+      5. Post to X (or dry-run)
+      6. Mark as posted
+
+    Progress is checkpointed per UTC date and slot after each stage, so a
+    restarted run resumes from the last completed stage without repeating
+    fetches or LLM calls (dry runs are not checkpointed).
+
+    Returns the Unix time to retry at when X rate-limited the post, else None.
+    """
+    log_info(f"--- Autopost cycle starting (slot: {slot}) ---")
+
+    if DRY_RUN:
+        log_info("DRY RUN mode — tweets will be generated but not posted.")
+
+    outbox = get_outbox()
+
+    # Posts interrupted mid-send are never re-sent automatically
+    for row in outbox.in_doubt():
+        msg = (
+            f"Post for '{row['key']}' may or may not have been published (interrupted mid-send). "
+            f"Check X, then run: python -m src.outbox mark \"{row['key']}\" posted|failed"
+        )
+        log_warning(msg)
+        await send_alert(f"WARNING: {msg}")
 
     # --------------------------------------------------
-    # 3. Rewrite for X
+    # 0. Rate-limited tweet from an earlier cycle goes first once its limit
+    #    has reset; until then it waits and the cycle posts something fresh
     # --------------------------------------------------
-    tweet = await rewrite_for_x(event)
+    queued = None if DRY_RUN else outbox.next_queued(due_at=time.time())
+    if queued is not None:
+        log_info(f"Retrying queued post for '{queued['key']}'.")
+        retry_at = await _publish(queued["tweet"], queued["key"], queued["seed_file"], slot=queued["slot"])
+        log_info("--- Autopost cycle complete ---")
+        return retry_at
 
-    if tweet.startswith("ERROR"):
-        msg = f"Rewrite failed for '{post_key}' — skipping."
-        log_error(msg)
-        send_alert(f"ERROR: {msg}")
-        return
+    if DRY_RUN:
+        checkpoint = Checkpoint(None)
+    else:
+        prune_checkpoints()
+        checkpoint = checkpoint_for(slot)
+
+    if checkpoint.done:
+        log_info(f"Slot '{slot}' already finished today ({checkpoint.stage}) — nothing to do.")
+        return None
+
+    posted_index = outbox.posted_keys()  # O(1) membership checks for candidates
+    get_catalog(refresh=True)  # Pick up added / edited seed files once per cycle
+    backfill_seeds(posted_index)  # Seeds posted before fingerprinting existed
 
-    log_info(f"Tweet ready ({len(tweet)} chars): {tweet[:80]}...")
+    # --------------------------------------------------
+    # 1–4. Live candidate, else seed — validated and rewritten
+    # --------------------------------------------------
+    if checkpoint.reached("tweet"):
+        log_info(f"Resuming slot '{slot}' from checkpoint — tweet already generated.")
+        prepared = {
+            "post_key": checkpoint.get("post_key"),
+            "tweet": checkpoint.get("tweet"),
+            "seed_file": checkpoint.get("seed_file"),
+            "fingerprint": (
+                Fingerprint.from_dict(checkpoint.get("fingerprint"))
+                if checkpoint.get("fingerprint") else None
+            ),
+        }
+    else:
+        prepared = await _prepare(posted_index, checkpoint=checkpoint)
+
+        if "error" in prepared:
+            checkpoint.reset()
+            log_error(prepared["error"])
+            await send_alert(prepared["alert"])
+            return None
+
+        checkpoint.save(
+            "tweet",
+            post_key=prepared["post_key"],
+            seed_file=prepared["seed_file"],
+            tweet=prepared["tweet"],
+            fingerprint=prepared["fingerprint"].to_dict() if prepared.get("fingerprint") else None,
+        )
+
+    tweet = prepared["tweet"]
+    post_key = prepared["post_key"]  # Idempotency key in the outbox — prevents duplicates
+    log_info(f"Tweet ready ({weighted_length(tweet)} chars): {tweet[:80]}...")
 
     # --------------------------------------------------
     # 5. Dry run
@@ -155,23 +404,18 @@ async def run_autopost() -> None:
     if DRY_RUN:
         log_info(f"[DRY RUN] Would have posted:\n{tweet}")
         log_info("--- Autopost cycle complete (dry run) ---")
-        return
+        return None
 
     # --------------------------------------------------
     # 6. Post to X
     # --------------------------------------------------
-    result = post_tweet(tweet)
-
-    if result["success"]:
-        posted.append(post_key)
-        save_posted_log(posted)
-        log_info(f"Posted and logged: '{post_key}' (tweet ID: {result['tweet_id']})")
-    else:
-        msg = f"Post failed for '{post_key}': {result.get('detail', 'unknown error')}"
-        log_error(msg)
-        send_alert(f"ERROR: {msg}")
+    retry_at = await _publish(
+        tweet, post_key, prepared["seed_file"],
+        checkpoint=checkpoint, fingerprint=prepared.get("fingerprint"), slot=slot,
+    )
 
     log_info("--- Autopost cycle complete ---")
+    return retry_at
 
 
 # -------- CLI TEST --------
@@ -0,0 +1,240 @@
+# src/catalog.py
+# Indexed manifest of the seed event library, so picking an event does not
+# glob, read or sort events/ on every cycle.
+#
+# Rebuild / update the manifest:   python -m src.catalog refresh
+# Show catalog size:               python -m src.catalog stats
+#
+# The manifest (SQLite under DATA_DIR) stores each file's date, month-day,
+# year, slug and content hash along with its mtime and size. refresh() only
+# stats the directory and re-reads files whose mtime or size changed, then
+# rebuilds the in-memory indexes used for lookups.
+
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from src.utils.filename import normalize_date, slugify
+from src.utils.log import log_info, log_warning, log_error
+from src.utils.paths import DATA_DIR, EVENTS_DIR, is_seed_event_file
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+CATALOG_PATH = DATA_DIR / "catalog.sqlite3"
+
+_COLUMNS = ("filename", "mtime_ns", "size", "date", "month_day", "year", "slug", "content_hash")
+
+
+def _describe(path: Path, data: bytes) -> Optional[dict]:
+    """Catalog fields for one event file, or None if it is not an event."""
+    try:
+        event = json.loads(data.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(event, dict):
+        return None
+
+    # Prefer the event's own date; fall back to the YYYY-MM-DD filename prefix
+    date = normalize_date(str(event.get("date", "")))
+    if len(date) != 10 or date[4] != "-":
+        date = path.name[:10]
+    try:
+        year = int(date[:4])
+    except ValueError:
+        return None
+
+    return {
+        "date": date,
+        "month_day": date[5:10],
+        "year": year,
+        "slug": slugify(str(event.get("title") or path.stem)),
+        "content_hash": hashlib.sha256(data).hexdigest(),
+    }
+
+
+class EventCatalog:
+    """
+    In-memory indexes over the event library, backed by a SQLite manifest:
+
+    - `_ordered`:       filenames in chronological (filename) order
+    - `_by_month_day`:  "MM-DD" -> filenames
+    - `_by_year`:       (year, filename) pairs sorted for bisect range queries
+    """
+
+    def __init__(self, events_dir: Path = EVENTS_DIR, path: Path = CATALOG_PATH):
+        self.events_dir = Path(events_dir)
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._entries: Optional[dict[str, dict]] = None
+        self._ordered: list[str] = []
+        self._by_month_day: dict[str, list[str]] = {}
+        self._by_year: list[tuple[int, str]] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    filename     TEXT PRIMARY KEY,
+                    mtime_ns     INTEGER NOT NULL,
+                    size         INTEGER NOT NULL,
+                    date         TEXT NOT NULL,
+                    month_day    TEXT NOT NULL,
+                    year         INTEGER NOT NULL,
+                    slug         TEXT NOT NULL,
+                    content_hash TEXT NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _rebuild_indexes(self) -> None:
+        self._ordered = sorted(self._entries)
+        self._by_month_day = {}
+        for name in self._ordered:
+            self._by_month_day.setdefault(self._entries[name]["month_day"], []).append(name)
+        self._by_year = sorted((entry["year"], name) for name, entry in self._entries.items())
+
+    def refresh(self) -> dict:
+        """
+        Bring the manifest in line with the directory. Only new or changed
+        files (by mtime and size) are read. Returns {"added", "updated", "removed"}.
+        """
+        with self._lock:
+            conn = self._connect()
+            if self._entries is None:
+                self._entries = {
+                    row["filename"]: dict(row) for row in conn.execute("SELECT * FROM events")
+                }
+
+            counts = {"added": 0, "updated": 0, "removed": 0}
+            seen: set[str] = set()
+            changed: list[dict] = []
+
+            with os.scandir(self.events_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not is_seed_event_file(name) or not entry.is_file():
+                        continue
+                    seen.add(name)
+                    stat = entry.stat()
+                    known = self._entries.get(name)
+                    if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                        continue
+
+                    try:
+                        data = Path(entry.path).read_bytes()
+                    except OSError as e:
+                        log_warning(f"Catalog could not read {name}: {e}")
+                        continue
+                    fields = _describe(Path(entry.path), data)
+                    if fields is None:
+                        log_warning(f"Catalog skipped {name} — not a readable event file.")
+                        continue
+
+                    changed.append({"filename": name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **fields})
+                    counts["updated" if known else "added"] += 1
+
+            removed = [name for name in self._entries if name not in seen]
+            counts["removed"] = len(removed)
+
+            if changed or removed:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO events ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                    [tuple(entry[c] for c in _COLUMNS) for entry in changed],
+                )
+                conn.executemany("DELETE FROM events WHERE filename = ?", [(name,) for name in removed])
+                conn.commit()
+                for entry in changed:
+                    self._entries[entry["filename"]] = entry
+                for name in removed:
+                    del self._entries[name]
+                self._rebuild_indexes()
+            elif not self._ordered and self._entries:
+                self._rebuild_indexes()
+
+        return counts
+
+    # ---------------- Lookups ----------------
+    def get(self, filename: str) -> Optional[dict]:
+        return self._entries.get(filename) if self._entries else None
+
+    def next_unposted(self, posted: set[str], after: Optional[str] = None) -> Optional[str]:
+        """
+        Earliest (by filename) event whose filename is not in `posted`.
+        With `after`, the scan resumes past that filename, so a caller
+        skipping several events walks the index once rather than restarting.
+        """
+        start = bisect.bisect_right(self._ordered, after) if after is not None else 0
+        for i in range(start, len(self._ordered)):
+            if self._ordered[i] not in posted:
+                return self._ordered[i]
+        return None
+
+    def on_month_day(self, month: int, day: int) -> list[dict]:
+        return [self._entries[name] for name in self._by_month_day.get(f"{month:02d}-{day:02d}", [])]
+
+    def by_year_range(self, start: int, end: int) -> list[dict]:
+        """Events with start <= year <= end, oldest first."""
+        lo = bisect.bisect_left(self._by_year, (start, ""))
+        hi = bisect.bisect_right(self._by_year, (end, "\U0010ffff"))
+        return [self._entries[name] for _, name in self._by_year[lo:hi]]
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._ordered),
+            "month_days": len(self._by_month_day),
+            "years": [self._by_year[0][0], self._by_year[-1][0]] if self._by_year else None,
+        }
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_catalog: Optional[EventCatalog] = None
+
+
+def get_catalog(refresh: bool = False) -> EventCatalog:
+    """
+    Return the process-wide catalog. It is refreshed against the directory
+    when first built and when `refresh` is set (once per autopost cycle);
+    other calls are served from the in-memory indexes.
+    """
+    global _catalog
+
+    if _catalog is None:
+        _catalog = EventCatalog()
+        refresh = True
+    if refresh:
+        _catalog.refresh()
+    return _catalog
+
+
+# -------- CLI --------
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "refresh":
+        catalog = EventCatalog()
+        log_info(f"Catalog refreshed: {catalog.refresh()}")
+        print(json.dumps(catalog.stats(), indent=2))
+    elif command == "stats":
+        print(json.dumps(get_catalog().stats(), indent=2))
+    else:
+        log_error(f"Unknown command '{command}'")
+        print("Usage: python -m src.catalog [refresh|stats]")
+        sys.exit(1)
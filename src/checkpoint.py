@@ -0,0 +1,112 @@
+# src/checkpoint.py
+# Per-slot progress of an autopost cycle, so a restart resumes from the last
+# completed stage instead of redoing fetches and LLM calls.
+#
+# One small JSON file per UTC date and slot under DATA_DIR/checkpoints,
+# rewritten atomically after each stage:
+#
+#   chosen     post_key, path ("live" | "seed"), source or seed_file
+#   validated  + event (the validated event dict)
+#   tweet      + tweet (ready to post)
+#   posted | queued | failed   + tweet_id / detail — the slot is done
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from src.utils.atomic import write_atomic
+from src.utils.log import log_info, log_warning
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"
+
+# Checkpoint files older than this many days are deleted
+CHECKPOINT_KEEP_DAYS = int(os.getenv("CHECKPOINT_KEEP_DAYS", "7"))
+
+STAGES = ("chosen", "validated", "tweet")
+DONE_STAGES = ("posted", "queued", "failed")
+
+
+class Checkpoint:
+    """
+    Progress of one slot. A Checkpoint with no path keeps state in memory
+    only (used for dry runs), so callers never need to special-case it.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path is not None else None
+        self.data: dict[str, Any] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError) as e:
+                log_warning(f"Checkpoint {self.path.name} is unreadable ({e}) — starting the slot fresh.")
+                self.data = {}
+
+    @property
+    def stage(self) -> Optional[str]:
+        return self.data.get("stage")
+
+    @property
+    def done(self) -> bool:
+        return self.stage in DONE_STAGES
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def reached(self, stage: str) -> bool:
+        """True if `stage` (or a later one) has been completed."""
+        if self.done:
+            return True
+        if self.stage not in STAGES:
+            return False
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+    def save(self, stage: str, **fields: Any) -> None:
+        """Record a completed stage (fields are merged into the checkpoint)."""
+        self.data.update(fields, stage=stage, updated_at=time.time())
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps(self.data, indent=2))
+        except OSError as e:
+            log_warning(f"Could not write checkpoint {self.path.name}: {e}")
+
+    def start(self, **fields: Any) -> None:
+        """Begin a fresh attempt at the slot: drop earlier progress, record "chosen"."""
+        self.data = {}
+        self.save("chosen", **fields)
+
+    def reset(self) -> None:
+        """Forget progress (e.g. the checkpointed path turned out to be unusable)."""
+        self.data = {}
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+def checkpoint_for(slot: str, day: Optional[str] = None) -> Checkpoint:
+    """Checkpoint for a slot on a UTC date (default: today)."""
+    day = day or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return Checkpoint(CHECKPOINT_DIR / f"{day}-{slot}.json")
+
+
+def prune_checkpoints(keep_days: int = CHECKPOINT_KEEP_DAYS) -> int:
+    """Delete checkpoint files for dates older than keep_days. Returns the count."""
+    if not CHECKPOINT_DIR.exists():
+        return 0
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+    removed = 0
+    for path in CHECKPOINT_DIR.glob("*.json"):
+        if path.name[:10] < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    if removed:
+        log_info(f"Removed {removed} old checkpoint(s).")
+    return removed
@@ -0,0 +1,129 @@
+# src/condense_source.py
+import os
+import re
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# Max tokens of Wikipedia text pasted into the extraction prompt
+SOURCE_TOKEN_BUDGET = int(os.getenv("SOURCE_TOKEN_BUDGET", "1500"))
+
+# Sections that never carry facts worth extracting
+SKIPPED_SECTIONS = {
+    "see also", "references", "notes", "further reading", "external links",
+    "bibliography", "sources", "citations", "footnotes",
+}
+
+_HEADING_RE = re.compile(r"^\s*(={2,})\s*(.+?)\s*\1\s*$", re.MULTILINE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_MONTHS = (
+    r"(?:January|February|March|April|May|June|July|August|September|October|"
+    r"November|December)"
+)
+_FULL_DATE_RE = re.compile(rf"\b{_MONTHS}\s+\d{{1,2}}\b|\b\d{{1,2}}\s+{_MONTHS}\b")
+_YEAR_RE = re.compile(r"\b\d{3,4}\b(?:\s*(?:BC|BCE|AD|CE)\b)?|\b\d{1,2}(?:st|nd|rd|th) century\b")
+
+# --------------------------------------------------
+# Token estimate
+# --------------------------------------------------
+# tiktoken gives exact counts when installed; otherwise ~4 chars per token,
+# which is close enough for English prose to size a budget.
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+# --------------------------------------------------
+# Condensing
+# --------------------------------------------------
+def _split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def has_full_date(text: str) -> bool:
+    """True if the text names a month and day (e.g. "July 20" or "20 July")."""
+    return _FULL_DATE_RE.search(text) is not None
+
+
+def _date_priority(sentence: str) -> int:
+    """2 = has a month and day, 1 = has a year or century, 0 = no date."""
+    if _FULL_DATE_RE.search(sentence):
+        return 2
+    if _YEAR_RE.search(sentence):
+        return 1
+    return 0
+
+
+def condense_source(text: str, budget: int = SOURCE_TOKEN_BUDGET) -> dict:
+    """
+    Cut a Wikipedia plain-text extract down to roughly `budget` tokens.
+
+    Keeps the lead section first, then date-bearing sentences from the body
+    (full dates before bare years), in their original order. Reference-style
+    sections are dropped entirely.
+
+    Returns:
+        {"text": ..., "original_tokens": N, "kept_tokens": N, "dropped_tokens": N}
+    """
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= budget:
+        return {
+            "text": text,
+            "original_tokens": original_tokens,
+            "kept_tokens": original_tokens,
+            "dropped_tokens": 0,
+        }
+
+    # Split into the lead and the body sections
+    headings = list(_HEADING_RE.finditer(text))
+    lead_end = headings[0].start() if headings else len(text)
+    lead = _split_sentences(text[:lead_end])
+
+    body: list[str] = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        if heading.group(2).strip().lower() in SKIPPED_SECTIONS:
+            continue
+        body.extend(_split_sentences(text[heading.end():end]))
+
+    # Lead sentences in order, then body sentences by date priority
+    candidates = [(0, i, s) for i, s in enumerate(lead)]
+    ranked_body = sorted(
+        ((i, s) for i, s in enumerate(body) if _date_priority(s)),
+        key=lambda item: -_date_priority(item[1]),
+    )
+    candidates += [(1, i, s) for i, s in ranked_body]
+
+    kept: list[tuple[int, int, str]] = []
+    used = 0
+    for part, index, sentence in candidates:
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            if part == 0:
+                break  # Lead is consumed in order — stop at the first overflow
+            continue
+        kept.append((part, index, sentence))
+        used += cost
+
+    kept.sort()
+    lead_text = " ".join(s for part, _, s in kept if part == 0)
+    body_text = " ".join(s for part, _, s in kept if part == 1)
+    condensed = "\n\n".join(t for t in (lead_text, body_text) if t)
+
+    kept_tokens = estimate_tokens(condensed)
+    return {
+        "text": condensed,
+        "original_tokens": original_tokens,
+        "kept_tokens": kept_tokens,
+        "dropped_tokens": max(0, original_tokens - kept_tokens),
+    }
@@ -0,0 +1,303 @@
+# src/dedupe.py
+# Near-duplicate detection across live and seed events.
+#
+# The outbox only knows idempotency keys — a live event's Wikipedia title
+# or a seed filename — so "Apollo 11" from On This Day and
+# 1969-07-20-moon-landing.json look like different events. This module
+# fingerprints every posted event (normalized date + MinHash signature of
+# its title and summary words) and answers "is this a near-duplicate of
+# anything posted?" from in-memory indexes:
+#
+#   - events on the same date need only a small overlap to match
+#     (DEDUPE_SAME_DATE_THRESHOLD), checked against that date's bucket
+#   - events on any date must overlap strongly (DEDUPE_THRESHOLD), found
+#     through LSH band buckets so only a handful of signatures are compared
+#
+# Fingerprints are persisted in SQLite under DATA_DIR.
+#
+# Fingerprint already-posted seed events:   python -m src.dedupe backfill
+# Check an event file against the index:    python -m src.dedupe check events/<file>.json
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date as date_type, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.utils.filename import normalize_date
+from src.utils.log import log_info, log_error
+from src.utils.paths import DATA_DIR, EVENTS_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+FINGERPRINTS_PATH = DATA_DIR / "fingerprints.sqlite3"
+
+# Estimated word-set overlap (Jaccard) that makes two events duplicates:
+# any date, and the same normalized date
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.5"))
+DEDUPE_SAME_DATE_THRESHOLD = float(os.getenv("DEDUPE_SAME_DATE_THRESHOLD", "0.25"))
+
+# 64 MinHash values in 32 LSH bands of 2 rows: pairs at Jaccard 0.3 share a
+# band ~95% of the time, so DEDUPE_THRESHOLD matches are not missed
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240720)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from had has have he her his in into is it its of on or "
+    "that the their they this to was were which who with first after".split()
+)
+
+
+# --------------------------------------------------
+# Fingerprints
+# --------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    date: Optional[str]              # YYYY-MM-DD, or None if unknown
+    signature: tuple[int, ...]       # NUM_PERM MinHash values
+
+    def similarity(self, other: "Fingerprint") -> float:
+        """Estimated Jaccard similarity of the two word sets."""
+        same = sum(a == b for a, b in zip(self.signature, other.signature))
+        return same / NUM_PERM
+
+    def to_dict(self) -> dict:
+        return {"date": self.date, "signature": list(self.signature)}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Fingerprint":
+        return cls(data.get("date"), tuple(data["signature"]))
+
+
+def _words(text: str) -> set[str]:
+    words = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        # Cheap plural folding so "landing"/"landings" and "humans"/"human" match
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def _minhash(words: Iterable[str]) -> tuple[int, ...]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "big")
+        for w in words
+    ]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _iso_date(value: str) -> Optional[str]:
+    normalized = normalize_date(value) if value else ""
+    return normalized if re.fullmatch(r"\d{4}-\d{2}-\d{2}", normalized) else None
+
+
+def fingerprint(title: str, summary: str, date: Optional[str]) -> Fingerprint:
+    return Fingerprint(_iso_date(date or ""), _minhash(_words(f"{title} {summary}")))
+
+
+def event_fingerprint(event: Mapping) -> Fingerprint:
+    """Fingerprint an event dict / Event (seed files, extracted events)."""
+    return fingerprint(str(event.get("title", "")), str(event.get("summary", "")), str(event.get("date", "")))
+
+
+def source_fingerprint(source: Mapping, today: Optional[date_type] = None) -> Fingerprint:
+    """
+    Fingerprint a live On This Day candidate before extraction: its date is
+    the candidate's year on today's month-day. "Today" is the UTC date, the
+    same day fetch_onthisday requests the feed for.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    try:
+        year = int(source.get("year", ""))
+        date = f"{year:04d}-{today.month:02d}-{today.day:02d}" if year > 0 else None
+    except (TypeError, ValueError):
+        date = None
+    return Fingerprint(date, _minhash(_words(f"{source.get('title', '')} {source.get('summary', '')}")))
+
+
+# --------------------------------------------------
+# Index
+# --------------------------------------------------
+class DuplicateIndex:
+    """Fingerprints of posted events with by-date and LSH band buckets."""
+
+    def __init__(self, path: Path = FINGERPRINTS_PATH):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._fingerprints: dict[str, Fingerprint] = {}
+        self._by_date: dict[str, set[str]] = defaultdict(set)
+        self._bands: dict[tuple[int, tuple[int, ...]], set[str]] = defaultdict(set)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    key        TEXT PRIMARY KEY,
+                    date       TEXT,
+                    signature  BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            for key, date, blob in conn.execute("SELECT key, date, signature FROM fingerprints"):
+                self._index(key, Fingerprint(date, tuple(array("Q", blob))))
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _band_keys(fp: Fingerprint) -> list[tuple[int, tuple[int, ...]]]:
+        return [(band, fp.signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    def _index(self, key: str, fp: Fingerprint) -> None:
+        self._unindex(key)
+        self._fingerprints[key] = fp
+        if fp.date:
+            self._by_date[fp.date].add(key)
+        for band_key in self._band_keys(fp):
+            self._bands[band_key].add(key)
+
+    def _unindex(self, key: str) -> None:
+        fp = self._fingerprints.pop(key, None)
+        if fp is None:
+            return
+        if fp.date:
+            self._by_date[fp.date].discard(key)
+        for band_key in self._band_keys(fp):
+            self._bands[band_key].discard(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._connect()
+            return key in self._fingerprints
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._connect()
+            return len(self._fingerprints)
+
+    def add(self, key: str, fp: Fingerprint) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (key, date, signature, created_at) VALUES (?, ?, ?, ?)",
+                (key, fp.date, array("Q", fp.signature).tobytes(), time.time()),
+            )
+            conn.commit()
+            self._index(key, fp)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM fingerprints WHERE key = ?", (key,))
+            conn.commit()
+            self._unindex(key)
+
+    def find_duplicate(self, fp: Fingerprint, ignore: Optional[str] = None) -> Optional[str]:
+        """Key of a posted event that `fp` near-duplicates, or None."""
+        with self._lock:
+            self._connect()
+            if fp.date:
+                for key in self._by_date.get(fp.date, ()):
+                    if key != ignore and fp.similarity(self._fingerprints[key]) >= DEDUPE_SAME_DATE_THRESHOLD:
+                        return key
+
+            candidates: set[str] = set()
+            for band_key in self._band_keys(fp):
+                candidates |= self._bands.get(band_key, set())
+            for key in candidates:
+                if key != ignore and fp.similarity(self._fingerprints[key]) >= DEDUPE_THRESHOLD:
+                    return key
+        return None
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_index: Optional[DuplicateIndex] = None
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    global _index
+
+    if _index is None:
+        _index = DuplicateIndex()
+    return _index
+
+
+def load_event_file(path: Path) -> Optional[dict]:
+    try:
+        event = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError, UnicodeDecodeError):
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def backfill_seeds(posted: set[str], events_dir: Path = EVENTS_DIR) -> int:
+    """Fingerprint posted seed files the index does not know yet. Returns the count."""
+    index = get_duplicate_index()
+    added = 0
+    for key in posted:
+        if not key.endswith(".json") or key in index:
+            continue
+        event = load_event_file(events_dir / key)
+        if event is None:
+            continue
+        index.add(key, event_fingerprint(event))
+        added += 1
+    if added:
+        log_info(f"Fingerprinted {added} previously posted seed event(s).")
+    return added
+
+
+# -------- CLI --------
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "backfill":
+        from src.outbox import get_outbox
+        print({"added": backfill_seeds(get_outbox().posted_keys())})
+    elif command == "check" and len(sys.argv) == 3:
+        event = load_event_file(Path(sys.argv[2]))
+        if event is None:
+            log_error(f"Could not read event file {sys.argv[2]}")
+            sys.exit(1)
+        started = time.perf_counter()
+        match = get_duplicate_index().find_duplicate(event_fingerprint(event))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print({"duplicate_of": match, "lookup_ms": round(elapsed_ms, 3)})
+    else:
+        log_error(f"Unknown command '{' '.join(sys.argv[1:])}'")
+        print("Usage: python -m src.dedupe [backfill | check <event.json>]")
+        sys.exit(1)
@@ -0,0 +1,208 @@
+# src/drafts.py
+# Pre-generated tweet drafts for the seed corpus, so a seed-fallback cycle
+# needs no LLM calls at post time.
+#
+# Build drafts for every unposted seed event:   python -m src.drafts build
+# Show draft store contents:                    python -m src.drafts stats
+#
+# Drafts are keyed by event filename and stored with a hash of the event
+# file and a hash of the rewrite prompt (template + model). A draft is only
+# used while both still match, so editing an event file or
+# prompts/rewrite-for-x.md invalidates it.
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.event import Event
+from src.rewrite_x import REWRITE_TEMPLATE, rewrite_for_x
+from src.validate_event import validate_or_fix_event
+from src.utils.log import log_info, log_warning, log_error
+from src.utils.openai_client import OPENAI_MODEL
+from src.utils.paths import DATA_DIR, EVENTS_DIR, is_seed_event_file
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+DRAFTS_PATH = DATA_DIR / "drafts.sqlite3"
+
+# Seed events validated and rewritten at once during a build
+DRAFT_CONCURRENCY = int(os.getenv("DRAFT_CONCURRENCY", "4"))
+
+
+def prompt_hash() -> str:
+    """Hash of everything besides the event that shapes a rewrite."""
+    return hashlib.sha256(f"{OPENAI_MODEL}\x00{REWRITE_TEMPLATE}".encode("utf-8")).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class DraftStore:
+    """SQLite table of ready-to-post tweets, one row per seed event file."""
+
+    def __init__(self, path: Path = DRAFTS_PATH):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS drafts (
+                    filename    TEXT PRIMARY KEY,
+                    event_hash  TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    tweet       TEXT NOT NULL,
+                    created_at  REAL NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, filename: str, event_hash: str, prompt: str) -> Optional[str]:
+        """Return the draft for `filename` if it was built from this file and prompt."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT tweet FROM drafts WHERE filename = ? AND event_hash = ? AND prompt_hash = ?",
+                (filename, event_hash, prompt),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, filename: str, event_hash: str, prompt: str, tweet: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO drafts (filename, event_hash, prompt_hash, tweet, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (filename, event_hash, prompt, tweet, time.time()),
+            )
+            conn.commit()
+
+    def discard(self, filename: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM drafts WHERE filename = ?", (filename,))
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, current = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(prompt_hash = ?), 0) FROM drafts",
+                (prompt_hash(),),
+            ).fetchone()
+        return {"drafts": total, "current_prompt": current, "outdated_prompt": total - current}
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_store: Optional[DraftStore] = None
+
+
+def get_draft_store() -> DraftStore:
+    global _store
+
+    if _store is None:
+        _store = DraftStore()
+    return _store
+
+
+def ready_draft(path: Path) -> Optional[str]:
+    """Return a still-valid draft for a seed event file, or None."""
+    try:
+        return get_draft_store().get(path.name, file_hash(path), prompt_hash())
+    except (OSError, sqlite3.Error) as e:
+        log_warning(f"Draft lookup failed for {path.name}: {e}")
+        return None
+
+
+def discard_draft(path: Path) -> None:
+    try:
+        get_draft_store().discard(path.name)
+    except sqlite3.Error as e:
+        log_warning(f"Could not discard draft for {path.name}: {e}")
+
+
+# --------------------------------------------------
+# Batch build
+# --------------------------------------------------
+async def build_drafts(posted: set[str], concurrency: int = DRAFT_CONCURRENCY) -> dict:
+    """
+    Validate and rewrite every unposted seed event that has no valid draft.
+    Returns {"built": N, "skipped": N, "failed": N}.
+    """
+    store = get_draft_store()
+    prompt = prompt_hash()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"built": 0, "skipped": 0, "failed": 0}
+
+    async def _one(path: Path) -> None:
+        try:
+            data = path.read_bytes()
+            event_hash = hashlib.sha256(data).hexdigest()
+            event = json.loads(data.decode("utf-8"))
+        except (json.JSONDecodeError, OSError, UnicodeDecodeError) as e:
+            log_warning(f"Skipping unreadable seed event {path.name}: {e}")
+            counts["failed"] += 1
+            return
+
+        if store.get(path.name, event_hash, prompt) is not None:
+            counts["skipped"] += 1
+            return
+
+        async with semaphore:
+            event = await validate_or_fix_event(event)
+            if not isinstance(event, Event):
+                log_warning(f"No draft for {path.name} — event failed validation.")
+                counts["failed"] += 1
+                return
+            tweet = await rewrite_for_x(event)
+
+        if tweet.startswith("ERROR"):
+            log_warning(f"No draft for {path.name} — rewrite failed.")
+            counts["failed"] += 1
+            return
+
+        store.put(path.name, event_hash, prompt, tweet)
+        counts["built"] += 1
+
+    paths = [
+        p for p in sorted(EVENTS_DIR.glob("*.json"))
+        if p.name not in posted and is_seed_event_file(p.name)
+    ]
+    log_info(f"Building drafts for {len(paths)} unposted seed event(s)...")
+    await asyncio.gather(*(_one(path) for path in paths))
+    log_info(
+        f"Drafts done: {counts['built']} built, {counts['skipped']} up to date, "
+        f"{counts['failed']} failed."
+    )
+    return counts
+
+
+# -------- CLI --------
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "build":
+        from src.outbox import get_outbox
+        print(asyncio.run(build_drafts(get_outbox().posted_keys())))
+    elif command == "stats":
+        print(json.dumps(get_draft_store().stats(), indent=2))
+    else:
+        log_error(f"Unknown command '{command}'")
+        print("Usage: python -m src.drafts [build|stats]")
+        sys.exit(1)
@@ -0,0 +1,82 @@
+# src/event.py
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ClassVar, Iterator
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Event(Mapping):
+    """
+    An immutable, schema-valid history event.
+
+    Instances are built by validate_or_fix_event() once an event has passed
+    validation, so later stages can trust them without re-checking. Event is
+    also a read-only Mapping, so existing code using event["title"],
+    event.get("date") or `"error" in event` keeps working.
+    """
+
+    title: str
+    date: str
+    summary: str
+    sources: tuple[str, ...]
+
+    FIELDS: ClassVar[tuple[str, ...]] = ("title", "date", "summary", "sources")
+
+    def __post_init__(self) -> None:
+        # Cheap type guard so an Event can never hold an invalid shape
+        if not all(isinstance(getattr(self, f), str) for f in ("title", "date", "summary")):
+            raise TypeError("Event title, date and summary must be strings")
+        if not isinstance(self.sources, tuple) or not all(isinstance(s, str) for s in self.sources):
+            raise TypeError("Event sources must be a tuple of strings")
+
+    # ---------------- Mapping protocol ----------------
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        return list(value) if key == "sources" else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __hash__(self) -> int:
+        return hash((self.title, self.date, self.summary, self.sources))
+
+    # ---------------- Serialization ----------------
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Event":
+        """Build from a dict that already passed validate_event_schema()."""
+        return cls(
+            title=data["title"],
+            date=data["date"],
+            summary=data["summary"],
+            sources=tuple(data["sources"]),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "date": self.date,
+            "summary": self.summary,
+            "sources": list(self.sources),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Event":
+        """Parse a trusted event file. Raises ValueError/KeyError/TypeError if malformed."""
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def load(cls, path: Path) -> "Event":
+        return cls.from_json(Path(path).read_text(encoding="utf-8"))
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(self.to_json(), encoding="utf-8")
@@ -1,23 +1,27 @@
 import asyncio
 import json
 from pathlib import Path
+from typing import Optional
 
 from src.utils.openai_client import run_openai
 from src.fetch_source import fetch_wikipedia_page
-from src.validate_event import validate_or_fix_event
+from src.condense_source import condense_source
+from src.validate_event import validate_or_fix_event, EVENT_JSON_SCHEMA
 from src.utils.log import log_info, log_error
+from src.utils.metrics import span
 
 # Load the event extraction system prompt
 EXTRACT_PROMPT_PATH = Path("prompts/event-extraction.md")
 EXTRACT_PROMPT = EXTRACT_PROMPT_PATH.read_text(encoding="utf-8")
 
 
-async def extract_event(event_title: str):
+async def extract_event(event_title: str, source: Optional[dict] = None):
     """
     Extracts a structured history event from Wikipedia using:
-        1) Raw fetcher
-        2) Event-extraction LLM
-        3) Validator + automatic repair
+        1) Raw fetcher (skipped when an already-fetched `source` is passed)
+        2) Source condensing to SOURCE_TOKEN_BUDGET tokens
+        3) Event-extraction LLM
+        4) Validator + automatic repair
     """
 
     log_info(f"Starting extraction for: {event_title}")
@@ -26,12 +30,20 @@ async def extract_event(event_title: str):
     # SAFER FIX: Handle dict OR string input
     title = event_title["title"] if isinstance(event_title, dict) else event_title
 
-    wiki_text = fetch_wikipedia_page(title)
+    wiki_text = source if source is not None else await fetch_wikipedia_page(title)
     if "error" in wiki_text:
         log_error(f"Failed to fetch base text: {wiki_text['error']}")
         return {"error": wiki_text["error"]}
 
-    # --- 2. COMPOSE LLM INPUT ---
+    # --- 2. CONDENSE SOURCE TO TOKEN BUDGET ---
+    condensed = condense_source(wiki_text.get("summary", ""))
+    if condensed["dropped_tokens"]:
+        log_info(
+            f"Condensed source: kept {condensed['kept_tokens']} of "
+            f"{condensed['original_tokens']} tokens ({condensed['dropped_tokens']} dropped)."
+        )
+
+    # --- 3. COMPOSE LLM INPUT ---
     year = event_title.get("year", "") if isinstance(event_title, dict) else ""
     year_line = f"Year: {year}\n" if year else ""
 
@@ -42,25 +54,28 @@ async def extract_event(event_title: str):
 {year_line}Title: {title}
 
 ### SOURCE TEXT
-{wiki_text.get("summary", "")}
+{condensed["text"]}
 """
 
-    # --- 3. RUN EXTRACTION MODEL ---
+    # --- 4. RUN EXTRACTION MODEL ---
     try:
-        raw_output = await run_openai(llm_input)
+        raw_output = await run_openai(llm_input, response_schema=EVENT_JSON_SCHEMA)
     except Exception as e:
         log_error(f"Extraction LLM failed: {e}")
         return {"error": str(e)}
 
-    # --- 4. PARSE LLM OUTPUT ---
+    # --- 5. PARSE LLM OUTPUT ---
     try:
         event_json = json.loads(raw_output)
     except json.JSONDecodeError:
         log_error("LLM returned non-JSON. Attempting auto-fix.")
         event_json = {"title": title, "raw_output": raw_output}
 
-    # --- 5. VALIDATE & AUTO-REPAIR ---
-    clean_event = await validate_or_fix_event(event_json)
+    # --- 6. VALIDATE & AUTO-REPAIR ---
+    # Timed as its own stage: repair LLM calls and tokens land here, not
+    # under the caller's extract span
+    with span("validate"):
+        clean_event = await validate_or_fix_event(event_json)
 
     log_info("Extraction complete.")
     return clean_event
@@ -1,54 +1,63 @@
 # src/fetch_onthisday.py
-import requests
+import heapq
+import os
 from datetime import datetime, timezone
-from src.utils.log import log_info, log_error
+from typing import Callable, Iterator, Optional
 
-ONTHISDAY_URL = "https://en.wikipedia.org/api/rest_v1/feed/onthisday/events/{month}/{day}"
-HEADERS = {
-    "User-Agent": "HistoryMosaicBot/1.0 (https://github.com/kiplimodev/historymosaic)"
-}
+from src.onthisday_store import get_events
+from src.utils.log import log_info, log_warning, log_error
+
+# A scorer maps a raw feed event to a significance score (higher = better)
+ScoreFn = Callable[[dict], float]
 
 
-def _score_event(event: dict) -> int:
+# --------------------------------------------------
+# Scoring strategies
+# --------------------------------------------------
+def score_by_pages(event: dict) -> float:
     """
     Score an event by historical significance.
     More Wikipedia page links = more significant.
     """
-    return len(event.get("pages", []))
+    return float(len(event.get("pages", [])))
 
 
-def fetch_onthisday_event() -> dict:
+def score_event(event: dict) -> float:
     """
-    Fetch the most significant historical event for today's date
-    using Wikipedia's On This Day API.
-
-    Returns a source dict compatible with extract_event():
-        {"title": ..., "url": ..., "summary": ..., "year": ...}
-
-    Returns {"error": ...} on failure.
+    Default scorer: page links first, with small tie-breakers for events
+    whose lead page has a usable extract and whose text is descriptive.
     """
-    today = datetime.now(timezone.utc)
-    month = today.month
-    day = today.day
+    pages = event.get("pages", [])
+    lead = pages[0] if pages else {}
+    score = float(len(pages))
+    if lead.get("extract"):
+        score += 0.5
+    score += min(len(event.get("text", "")), 200) / 1000
+    return score
 
-    url = ONTHISDAY_URL.format(month=month, day=day)
-    log_info(f"Fetching On This Day events for {today.strftime('%B %d')}...")
 
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        log_error(f"On This Day API request failed: {e}")
-        return {"error": str(e)}
+SCORERS: dict[str, ScoreFn] = {
+    "default": score_event,
+    "pages": score_by_pages,
+}
 
-    events = response.json().get("events", [])
+# Pick a registered scorer by name via ONTHISDAY_SCORER
+ONTHISDAY_SCORER = os.getenv("ONTHISDAY_SCORER", "default")
 
-    if not events:
-        return {"error": f"No On This Day events found for {month}/{day}"}
 
-    # Pick the most significant event (most Wikipedia page links)
-    event = max(events, key=_score_event)
+def _get_scorer(scorer: Optional[ScoreFn]) -> ScoreFn:
+    if scorer is not None:
+        return scorer
+    if ONTHISDAY_SCORER not in SCORERS:
+        log_warning(f"Unknown ONTHISDAY_SCORER '{ONTHISDAY_SCORER}' — using default.")
+    return SCORERS.get(ONTHISDAY_SCORER, score_event)
 
+
+# --------------------------------------------------
+# Candidates
+# --------------------------------------------------
+def _to_source(event: dict) -> Optional[dict]:
+    """Build an extract_event()-compatible source dict, or None if unusable."""
     pages = event.get("pages", [])
     page = pages[0] if pages else {}
 
@@ -58,16 +67,76 @@ def fetch_onthisday_event() -> dict:
         page.get("content_urls", {}).get("desktop", {}).get("page", "")
         or f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
     )
-    year = str(event.get("year", ""))
 
     if not title or not summary:
-        return {"error": "On This Day event missing title or summary"}
-
-    log_info(f"Selected event: {year} — {title}")
+        return None
 
     return {
         "title": title,
         "url": page_url,
         "summary": summary,
-        "year": year,
+        "year": str(event.get("year", "")),
     }
+
+
+def rank_events(events: list[dict], scorer: Optional[ScoreFn] = None) -> Iterator[dict]:
+    """
+    Lazily yield source dicts from best to worst score. Building the heap is
+    O(n); each candidate costs O(log n) only when it is actually consumed.
+    """
+    score = _get_scorer(scorer)
+    heap = [(-score(event), i) for i, event in enumerate(events)]
+    heapq.heapify(heap)
+
+    while heap:
+        _, i = heapq.heappop(heap)
+        source = _to_source(events[i])
+        if source is not None:
+            yield source
+
+
+async def fetch_onthisday_candidates(scorer: Optional[ScoreFn] = None) -> dict:
+    """
+    Fetch today's On This Day events as a ranked, lazily consumed candidate
+    list (served from the local store in src/onthisday_store.py).
+
+    Returns {"candidates": <iterator of source dicts>} or {"error": ...}.
+    """
+    today = datetime.now(timezone.utc)
+    month = today.month
+    day = today.day
+
+    log_info(f"Fetching On This Day events for {today.strftime('%B %d')}...")
+
+    # Served from the local store; the network is only used to refresh it
+    try:
+        events = await get_events(month, day)
+    except Exception as e:
+        log_error(f"On This Day API request failed: {e}")
+        return {"error": str(e)}
+
+    if not events:
+        return {"error": f"No On This Day events found for {month}/{day}"}
+
+    return {"candidates": rank_events(events, scorer)}
+
+
+async def fetch_onthisday_event(scorer: Optional[ScoreFn] = None) -> dict:
+    """
+    Fetch the most significant historical event for today's date.
+
+    Returns a source dict compatible with extract_event():
+        {"title": ..., "url": ..., "summary": ..., "year": ...}
+
+    Returns {"error": ...} on failure.
+    """
+    result = await fetch_onthisday_candidates(scorer)
+    if "error" in result:
+        return result
+
+    source = next(result["candidates"], None)
+    if source is None:
+        return {"error": "On This Day event missing title or summary"}
+
+    log_info(f"Selected event: {source['year']} — {source['title']}")
+    return source
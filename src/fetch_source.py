@@ -1,67 +1,150 @@
-import requests
-import json
+import asyncio
 from bs4 import BeautifulSoup
+from src.utils.http_client import http_get
+from src.utils.http_cache import cached_get
 from src.utils.log import log_info, log_error
 
 WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
 
-HEADERS = {
-    "User-Agent": "HistoryMosaicBot/1.0 (https://github.com/kiplimodev/historymosaic)"
-}
+# The MediaWiki API accepts at most 50 titles per query
+MAX_TITLES_PER_REQUEST = 50
 
-def fetch_wikipedia_page(title: str) -> dict:
-    log_info(f"Fetching Wikipedia page for: {title}")
+async def fetch_page_text(page_url: str) -> str:
+    """
+    Download a rendered Wikipedia article and return its visible text.
+    Parsed with lxml; scripts, styles and navigation chrome are dropped.
+    Returns "" on failure.
+    """
+    try:
+        html_response = await http_get(page_url)
+        html_response.raise_for_status()
+    except Exception as e:
+        log_error(f"HTML fetch failed: {e}")
+        return ""
+
+    soup = BeautifulSoup(html_response.text, "lxml")
+    content = soup.select_one("#mw-content-text") or soup.body or soup
+
+    for tag in content(["script", "style", "noscript", "table", "sup"]):
+        tag.decompose()
 
+    return content.get_text(separator="\n", strip=True)
+
+
+def _page_url(title: str) -> str:
+    return f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+
+
+async def _fetch_extract_chunk(titles: list[str], intro_only: bool) -> dict[str, dict]:
+    """
+    Run one multi-title extracts query, following `continue` tokens until
+    every page's extract has arrived. Returns results keyed by requested title.
+    """
     params = {
         "action": "query",
         "prop": "extracts",
         "explaintext": True,
+        "exlimit": "max",
+        "redirects": True,
         "format": "json",
-        "titles": title
+        "titles": "|".join(titles),
     }
+    if intro_only:
+        params["exintro"] = True
 
-    try:
-        response = requests.get(WIKI_API_URL, params=params, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        log_error(f"API request failed: {e}")
-        return {"error": str(e)}
+    pages: dict[str, dict] = {}
+    aliases: dict[str, str] = {}
 
-    data = response.json()
-    pages = data.get("query", {}).get("pages", {})
-    if not pages:
-        return {"error": "Page not found"}
+    while True:
+        try:
+            response = await cached_get(WIKI_API_URL, params=params)
+            response.raise_for_status()
+        except Exception as e:
+            log_error(f"API request failed: {e}")
+            return {title: {"error": str(e)} for title in titles}
 
-    page = next(iter(pages.values()))
+        data = response.json()
+        query = data.get("query", {})
 
-    if "missing" in page:
-        return {"error": f"Page '{title}' does not exist"}
+        # Requested title -> normalized title -> redirect target
+        for mapping in query.get("normalized", []) + query.get("redirects", []):
+            aliases[mapping["from"]] = mapping["to"]
 
-    extract = page.get("extract", "")
+        for page in query.get("pages", {}).values():
+            known = pages.setdefault(page.get("title", ""), page)
+            if "extract" in page:
+                known["extract"] = page["extract"]
 
-    # Build URL manually
-    encoded_title = title.replace(" ", "_")
-    page_url = f"https://en.wikipedia.org/wiki/{encoded_title}"
+        if "continue" not in data:
+            break
+        params = {**params, **data["continue"]}
 
-    # Fetch HTML fallback
-    try:
-        html_response = requests.get(page_url, headers=HEADERS, timeout=10)
-        html_response.raise_for_status()
-        soup = BeautifulSoup(html_response.text, "html.parser")
+    results = {}
+    for requested in titles:
+        resolved = requested
+        seen = set()
+        while resolved in aliases and resolved not in seen:
+            seen.add(resolved)
+            resolved = aliases[resolved]
 
-        # Cleanup
-        for tag in soup(["script", "style"]):
-            tag.decompose()
+        page = pages.get(resolved)
+        if page is None:
+            results[requested] = {"error": "Page not found"}
+        elif "missing" in page or "invalid" in page:
+            results[requested] = {"error": f"Page '{requested}' does not exist"}
+        else:
+            results[requested] = {
+                "title": requested,
+                "url": _page_url(resolved),
+                "summary": page.get("extract", ""),
+            }
+    return results
 
-        cleaned_html = soup.prettify()
 
-    except Exception as e:
-        cleaned_html = ""
-        log_error(f"HTML fetch failed: {e}")
+async def fetch_wikipedia_pages(titles: list[str], intro_only: bool = False) -> dict[str, dict]:
+    """
+    Fetch plain-text extracts for many Wikipedia articles at once.
 
-    return {
-        "title": title,
-        "url": page_url,
-        "summary": extract,
-        "html": cleaned_html,
-    }
+    Titles are sent MAX_TITLES_PER_REQUEST per query, chunks run
+    concurrently, and normalized/redirected titles are mapped back to the
+    names that were asked for. Each value has the same shape as
+    fetch_wikipedia_page() (including {"error": ...} for failures).
+
+    Note: MediaWiki returns whole-article extracts one page per response
+    (continuations handle the rest); intro_only=True requests lead
+    sections only, which come back up to 20 per response.
+    """
+    unique = list(dict.fromkeys(titles))
+    if not unique:
+        return {}
+
+    log_info(f"Fetching {len(unique)} Wikipedia page(s)...")
+
+    chunks = [
+        unique[i:i + MAX_TITLES_PER_REQUEST]
+        for i in range(0, len(unique), MAX_TITLES_PER_REQUEST)
+    ]
+    results: dict[str, dict] = {}
+    for chunk_result in await asyncio.gather(
+        *(_fetch_extract_chunk(chunk, intro_only) for chunk in chunks)
+    ):
+        results.update(chunk_result)
+    return results
+
+
+async def fetch_wikipedia_page(title: str, include_html: bool = False) -> dict:
+    """
+    Fetch the plain-text extract for a Wikipedia article.
+
+    The rendered article is only downloaded when include_html=True, in which
+    case its visible text is returned under "page_text". Otherwise callers
+    that need it later can call fetch_page_text(result["url"]).
+    """
+    log_info(f"Fetching Wikipedia page for: {title}")
+
+    result = (await _fetch_extract_chunk([title], intro_only=False))[title]
+
+    if include_html and "error" not in result:
+        result["page_text"] = await fetch_page_text(result["url"])
+
+    return result
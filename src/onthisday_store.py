@@ -0,0 +1,293 @@
+# src/onthisday_store.py
+# Local, year-round store of Wikipedia "On This Day" feeds, indexed by month-day.
+#
+# Prefetch every day of the year once:   python -m src.onthisday_store prefetch
+# Refresh only entries past their age:   python -m src.onthisday_store refresh
+# Show store coverage:                   python -m src.onthisday_store stats
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src.utils.http_client import http_get
+from src.utils.log import log_info, log_warning, log_error
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+ONTHISDAY_URL = "https://en.wikipedia.org/api/rest_v1/feed/onthisday/events/{month}/{day}"
+ONTHISDAY_STORE_PATH = DATA_DIR / "onthisday.sqlite3"
+
+# Stored feeds older than this are refreshed from the network when read
+ONTHISDAY_REFRESH_DAYS = int(os.getenv("ONTHISDAY_REFRESH_DAYS", "30"))
+
+# Feeds downloaded at once during prefetch/refresh
+ONTHISDAY_PREFETCH_CONCURRENCY = int(os.getenv("ONTHISDAY_PREFETCH_CONCURRENCY", "8"))
+
+
+def all_month_days() -> list[tuple[int, int]]:
+    """Every (month, day) of a leap year — 366 entries including Feb 29."""
+    start = date(2024, 1, 1)
+    return [
+        ((start + timedelta(days=i)).month, (start + timedelta(days=i)).day)
+        for i in range(366)
+    ]
+
+
+def _compact(events: list[dict]) -> list[dict]:
+    """Keep only the fields the pipeline reads from each feed event."""
+    compact = []
+    for event in events:
+        pages = []
+        for page in event.get("pages", []):
+            pages.append({
+                "title": page.get("title", ""),
+                "extract": page.get("extract", ""),
+                "content_urls": {
+                    "desktop": {
+                        "page": page.get("content_urls", {}).get("desktop", {}).get("page", "")
+                    }
+                },
+            })
+        compact.append({
+            "text": event.get("text", ""),
+            "year": event.get("year", ""),
+            "pages": pages,
+        })
+    return compact
+
+
+class OnThisDayStore:
+    """
+    SQLite table of compacted feeds keyed by "MM-DD", with an in-memory
+    copy of every row read so repeated lookups never touch disk. Each row
+    keeps the feed's ETag so refreshes can be conditional.
+    """
+
+    def __init__(self, path: Path = ONTHISDAY_STORE_PATH):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._memory: dict[str, tuple[list[dict], float]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feeds (
+                    month_day  TEXT PRIMARY KEY,
+                    events     TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    etag       TEXT
+                )
+                """
+            )
+            # Stores created before ETags were kept
+            if "etag" not in {row[1] for row in conn.execute("PRAGMA table_info(feeds)")}:
+                conn.execute("ALTER TABLE feeds ADD COLUMN etag TEXT")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(month: int, day: int) -> str:
+        return f"{month:02d}-{day:02d}"
+
+    def load(self, month: int, day: int) -> Optional[tuple[list[dict], float]]:
+        """Return (events, fetched_at) for a month-day, or None if never stored."""
+        key = self.key(month, day)
+        if key in self._memory:
+            return self._memory[key]
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT events, fetched_at FROM feeds WHERE month_day = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = (json.loads(row[0]), row[1])
+        self._memory[key] = entry
+        return entry
+
+    def etag(self, month: int, day: int) -> Optional[str]:
+        """The stored feed's ETag, or None if never stored or sent without one."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag FROM feeds WHERE month_day = ?", (self.key(month, day),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, month: int, day: int, events: list[dict], etag: Optional[str] = None) -> None:
+        key = self.key(month, day)
+        compact = _compact(events)
+        fetched_at = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO feeds (month_day, events, fetched_at, etag) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(compact, separators=(",", ":")), fetched_at, etag),
+            )
+            conn.commit()
+        self._memory[key] = (compact, fetched_at)
+
+    def touch(self, month: int, day: int) -> None:
+        """Mark a stored feed as current without rewriting it (after a 304)."""
+        key = self.key(month, day)
+        fetched_at = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE feeds SET fetched_at = ? WHERE month_day = ?", (fetched_at, key))
+            conn.commit()
+        if key in self._memory:
+            self._memory[key] = (self._memory[key][0], fetched_at)
+
+    def stale_days(self, max_age_seconds: float) -> list[tuple[int, int]]:
+        """Month-days that are missing or older than max_age_seconds."""
+        with self._lock:
+            rows = dict(self._connect().execute("SELECT month_day, fetched_at FROM feeds"))
+        cutoff = time.time() - max_age_seconds
+        return [
+            (month, day) for month, day in all_month_days()
+            if rows.get(self.key(month, day), 0) < cutoff
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, oldest = self._connect().execute(
+                "SELECT COUNT(*), MIN(fetched_at) FROM feeds"
+            ).fetchone()
+        return {
+            "days_stored": count,
+            "days_missing": 366 - count,
+            "oldest_age_hours": round((time.time() - oldest) / 3600, 1) if oldest else None,
+        }
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_store: Optional[OnThisDayStore] = None
+
+
+def get_store() -> OnThisDayStore:
+    global _store
+
+    if _store is None:
+        _store = OnThisDayStore()
+    return _store
+
+
+# --------------------------------------------------
+# Network
+# --------------------------------------------------
+async def fetch_feed(month: int, day: int) -> list[dict]:
+    """
+    Refresh one day's feed in the store and return its events. Raises on
+    network or HTTP errors, leaving the stored copy and its age untouched.
+
+    The request carries the stored copy's ETag (If-None-Match), so an
+    unchanged feed costs a 304 and only the stored copy's age is renewed.
+    """
+    store = get_store()
+    etag = store.etag(month, day)
+    response = await http_get(
+        ONTHISDAY_URL.format(month=month, day=day),
+        headers={"If-None-Match": etag} if etag else None,
+    )
+    entry = store.load(month, day) if response.status_code == 304 else None
+    if entry is not None:
+        store.touch(month, day)
+        return entry[0]
+
+    response.raise_for_status()
+    store.save(month, day, response.json().get("events", []), response.headers.get("ETag"))
+    return store.load(month, day)[0]
+
+
+async def prefetch(
+    days: Optional[list[tuple[int, int]]] = None,
+    concurrency: int = ONTHISDAY_PREFETCH_CONCURRENCY,
+) -> dict:
+    """
+    Download feeds for the given month-days (default: all 366) concurrently
+    and write them to the store. Returns {"fetched": N, "failed": N}; a day
+    whose download fails counts as failed and keeps its stored copy.
+    """
+    days = all_month_days() if days is None else days
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"fetched": 0, "failed": 0}
+
+    async def _one(month: int, day: int) -> None:
+        async with semaphore:
+            try:
+                await fetch_feed(month, day)
+            except Exception as e:
+                log_warning(f"On This Day prefetch failed for {month}/{day}: {e}")
+                counts["failed"] += 1
+                return
+        counts["fetched"] += 1
+
+    log_info(f"Prefetching {len(days)} On This Day feed(s)...")
+    await asyncio.gather(*(_one(month, day) for month, day in days))
+    log_info(f"On This Day prefetch done: {counts['fetched']} fetched, {counts['failed']} failed.")
+    return counts
+
+
+async def refresh_stale(max_age_days: int = ONTHISDAY_REFRESH_DAYS) -> dict:
+    """Incremental refresh: re-download only missing or expired month-days."""
+    stale = get_store().stale_days(max_age_days * 86400)
+    if not stale:
+        log_info("On This Day store is up to date.")
+        return {"fetched": 0, "failed": 0}
+    return await prefetch(stale)
+
+
+async def get_events(month: int, day: int) -> list[dict]:
+    """
+    Return the feed events for a month-day.
+
+    Reads the local store first; only when the entry is missing or older
+    than ONTHISDAY_REFRESH_DAYS is the network used. If that refresh fails,
+    an expired copy is still returned. Raises only when nothing is stored
+    and the network is unavailable.
+    """
+    store = get_store()
+    entry = store.load(month, day)
+
+    if entry and time.time() - entry[1] < ONTHISDAY_REFRESH_DAYS * 86400:
+        return entry[0]
+
+    try:
+        return await fetch_feed(month, day)
+    except Exception as e:
+        if entry:
+            log_warning(f"On This Day refresh failed ({e}) — using stored copy.")
+            return entry[0]
+        raise
+
+
+# -------- CLI --------
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "prefetch":
+        print(asyncio.run(prefetch()))
+    elif command == "refresh":
+        print(asyncio.run(refresh_stale()))
+    elif command == "stats":
+        print(json.dumps(get_store().stats(), indent=2))
+    else:
+        log_error(f"Unknown command '{command}'")
+        print("Usage: python -m src.onthisday_store [prefetch|refresh|stats]")
+        sys.exit(1)
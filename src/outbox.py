@@ -0,0 +1,283 @@
+# src/outbox.py
+# Durable record of every post, replacing posted_log.json.
+#
+# Show counts per state:           python -m src.outbox stats
+# List rows needing attention:     python -m src.outbox list [pending|failed]
+# Resolve an in-doubt post:        python -m src.outbox mark <key> posted|failed
+#
+# One row per event, keyed by its idempotency key (the live event title or
+# the seed filename). A row is written as "pending" *before* the tweet is
+# sent and flipped to "posted" or "failed" afterwards, so a crash in
+# between leaves a pending, in-flight row instead of a forgotten post:
+#
+#   pending, in_flight=0  queued (e.g. rate-limited) — safe to send again
+#   pending, in_flight=1  sent but outcome unknown — never re-sent
+#                         automatically; resolve it with `mark`
+#   posted                done (tweet_id recorded)
+#   failed                rejected by X — the event may be picked again
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.utils.log import log_info, log_warning, log_error
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+OUTBOX_PATH = DATA_DIR / "outbox.sqlite3"
+
+# Files from before the outbox, imported once and renamed to *.migrated
+LEGACY_POSTED_LOG = DATA_DIR / "posted_log.json"
+LEGACY_PENDING_POST = DATA_DIR / "pending_post.json"
+
+STATES = ("pending", "posted", "failed")
+
+
+class Outbox:
+    """
+    SQLite (WAL) table of posts. Every write is a single-row statement in
+    its own transaction, so recording a post is O(1) whatever the history
+    size, and lookups go through the primary key or the state index.
+    """
+
+    def __init__(
+        self,
+        path: Path = OUTBOX_PATH,
+        legacy_log: Path = LEGACY_POSTED_LOG,
+        legacy_pending: Path = LEGACY_PENDING_POST,
+    ):
+        self.path = Path(path)
+        self.legacy_log = Path(legacy_log)
+        self.legacy_pending = Path(legacy_pending)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS posts (
+                    key        TEXT PRIMARY KEY,
+                    state      TEXT NOT NULL CHECK (state IN ('pending', 'posted', 'failed')),
+                    in_flight  INTEGER NOT NULL DEFAULT 0,
+                    tweet      TEXT,
+                    tweet_id   TEXT,
+                    seed_file  TEXT,
+                    slot       TEXT,
+                    retry_at   REAL,
+                    attempts   INTEGER NOT NULL DEFAULT 0,
+                    error      TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # Outboxes created before posts recorded their slot
+            if "slot" not in {row[1] for row in conn.execute("PRAGMA table_info(posts)")}:
+                conn.execute("ALTER TABLE posts ADD COLUMN slot TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_state ON posts (state, retry_at)")
+            conn.commit()
+            self._conn = conn
+            self._migrate()
+        return self._conn
+
+    # ---------------- Migration ----------------
+    def _migrate(self) -> None:
+        """Import posted_log.json / pending_post.json once, then rename them."""
+        if self.legacy_log.exists():
+            try:
+                keys = json.loads(self.legacy_log.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError) as e:
+                log_warning(f"Could not migrate {self.legacy_log.name}: {e}")
+            else:
+                self._import_posted(k for k in keys if isinstance(k, str))
+                self.legacy_log.rename(self.legacy_log.with_name(self.legacy_log.name + ".migrated"))
+                log_info(f"Migrated {len(keys)} posted event(s) from {self.legacy_log.name} to the outbox.")
+
+        if self.legacy_pending.exists():
+            try:
+                pending = json.loads(self.legacy_pending.read_text(encoding="utf-8"))
+                now = time.time()
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO posts (key, state, tweet, seed_file, retry_at, attempts, "
+                    "created_at, updated_at) VALUES (?, 'pending', ?, ?, ?, 1, ?, ?)",
+                    (pending["post_key"], pending["tweet"], pending.get("seed_file"),
+                     pending.get("retry_at"), now, now),
+                )
+                self._conn.commit()
+            except (json.JSONDecodeError, OSError, KeyError, TypeError) as e:
+                log_warning(f"Could not migrate {self.legacy_pending.name}: {e}")
+            else:
+                self.legacy_pending.rename(
+                    self.legacy_pending.with_name(self.legacy_pending.name + ".migrated")
+                )
+
+    def _import_posted(self, keys: Iterable[str]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO posts (key, state, created_at, updated_at) VALUES (?, 'posted', ?, ?)",
+            ((key, now, now) for key in keys),
+        )
+        self._conn.commit()
+
+    def import_posted(self, keys: Iterable[str]) -> None:
+        """Record keys as already posted (no tweet ID known)."""
+        with self._lock:
+            self._connect()
+            self._import_posted(keys)
+
+    # ---------------- Reads ----------------
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM posts WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def posted_keys(self) -> set[str]:
+        """Keys that must not be picked again: posted, queued or in doubt."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key FROM posts WHERE state IN ('posted', 'pending')"
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def next_queued(self, due_at: Optional[float] = None) -> Optional[dict]:
+        """
+        The queued (not in-flight) pending post with the earliest retry time.
+        With due_at, only a post whose retry time has passed by then (or
+        that has none) is returned.
+        """
+        query = "SELECT * FROM posts WHERE state = 'pending' AND in_flight = 0"
+        params: tuple = ()
+        if due_at is not None:
+            query += " AND (retry_at IS NULL OR retry_at <= ?)"
+            params = (due_at,)
+        with self._lock:
+            row = self._connect().execute(
+                query + " ORDER BY retry_at IS NULL, retry_at LIMIT 1", params
+            ).fetchone()
+        return dict(row) if row else None
+
+    def in_doubt(self) -> list[dict]:
+        """Posts that were being sent when the process stopped."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM posts WHERE state = 'pending' AND in_flight = 1"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list(self, state: str) -> list[dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM posts WHERE state = ? ORDER BY updated_at", (state,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._connect().execute(
+                "SELECT state, COUNT(*) FROM posts GROUP BY state"
+            ).fetchall())
+            in_doubt = self._connect().execute(
+                "SELECT COUNT(*) FROM posts WHERE state = 'pending' AND in_flight = 1"
+            ).fetchone()[0]
+        return {**{state: counts.get(state, 0) for state in STATES}, "in_doubt": in_doubt}
+
+    # ---------------- Writes ----------------
+    def begin(
+        self, key: str, tweet: str, seed_file: Optional[str] = None, slot: Optional[str] = None,
+    ) -> bool:
+        """
+        Mark a post as in flight just before it is sent. Returns False — and
+        the caller must not send — if the key is already posted or in doubt.
+        `slot` is the posting slot the tweet belongs to, used to retry a
+        rate-limited post under the same slot.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                """
+                INSERT INTO posts (key, state, in_flight, tweet, seed_file, slot, attempts, created_at, updated_at)
+                VALUES (?, 'pending', 1, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    state = 'pending', in_flight = 1, tweet = excluded.tweet,
+                    seed_file = excluded.seed_file, slot = COALESCE(excluded.slot, slot),
+                    attempts = attempts + 1,
+                    error = NULL, updated_at = excluded.updated_at
+                WHERE state = 'failed' OR (state = 'pending' AND in_flight = 0)
+                """,
+                (key, tweet, seed_file, slot, now, now),
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def _finish(self, key: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE posts SET {assignments} WHERE key = ?", (*fields.values(), key)
+            )
+            conn.commit()
+
+    def mark_posted(self, key: str, tweet_id: Optional[str] = None) -> None:
+        self._finish(key, state="posted", in_flight=0, tweet_id=tweet_id, retry_at=None, error=None)
+
+    def mark_queued(self, key: str, retry_at: float) -> None:
+        """The post was not accepted (e.g. rate-limited) and may be sent again later."""
+        self._finish(key, state="pending", in_flight=0, retry_at=retry_at)
+
+    def mark_failed(self, key: str, error: str) -> None:
+        self._finish(key, state="failed", in_flight=0, retry_at=None, error=error)
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_outbox: Optional[Outbox] = None
+
+
+def get_outbox() -> Outbox:
+    global _outbox
+
+    if _outbox is None:
+        _outbox = Outbox()
+    return _outbox
+
+
+# -------- CLI --------
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    outbox = get_outbox()
+
+    if command == "stats":
+        print(json.dumps(outbox.stats(), indent=2))
+    elif command == "list":
+        state = sys.argv[2] if len(sys.argv) > 2 else "pending"
+        print(json.dumps(outbox.list(state), indent=2))
+    elif command == "mark" and len(sys.argv) == 4 and sys.argv[3] in ("posted", "failed"):
+        key, state = sys.argv[2], sys.argv[3]
+        if outbox.get(key) is None:
+            log_error(f"No outbox entry for '{key}'")
+            sys.exit(1)
+        if state == "posted":
+            outbox.mark_posted(key)
+        else:
+            outbox.mark_failed(key, "Marked failed by hand")
+        print(outbox.get(key))
+    else:
+        log_error(f"Unknown command '{' '.join(sys.argv[1:])}'")
+        print("Usage: python -m src.outbox [stats | list [state] | mark <key> posted|failed]")
+        sys.exit(1)
@@ -1,50 +1,70 @@
 # src/post_to_x.py
 import time
 import tweepy
+from datetime import datetime, timezone
 from typing import Dict, Any
 
 from src.utils.x_client import get_x_client
 from src.utils.log import log_info, log_error, log_warning
+from src.utils.rate_limit import get_rate_limits
+from src.utils.tweet_length import MAX_TWEET_LENGTH, weighted_length, truncate_tweet
 
-MAX_TWEET_LENGTH = 280
-RATE_LIMIT_WAIT_SECONDS = 15 * 60  # 15 minutes
+# Rate-limit budget key for POST /2/tweets
+CREATE_TWEET_ENDPOINT = "POST /2/tweets"
+
+
+def _format_utc(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
 
 def post_tweet(text: str) -> Dict[str, Any]:
     """
     Post a single tweet to X.
 
+    Never sleeps: when the endpoint's budget is known to be exhausted the
+    request is not sent, and a 429 is reported with the time it can be
+    retried so the caller can schedule it.
+
     Returns a result dict:
         {"success": True,  "tweet_id": "..."}
-        {"success": False, "error": "rate_limit" | "forbidden" | "api_error", "detail": "..."}
+        {"success": False, "error": "rate_limit", "detail": "...", "retry_at": <unix time>}
+        {"success": False, "error": "forbidden" | "unauthorized" | "api_error", "detail": "..."}
     """
 
-    # --- Guard: enforce character limit ---
-    if len(text) > MAX_TWEET_LENGTH:
+    # --- Guard: enforce X's weighted character limit ---
+    length = weighted_length(text)
+    if length > MAX_TWEET_LENGTH:
         log_warning(
-            f"Tweet is {len(text)} chars — truncating to {MAX_TWEET_LENGTH}."
+            f"Tweet is {length} chars — truncating to {MAX_TWEET_LENGTH}."
         )
-        text = text[:MAX_TWEET_LENGTH]
+        text = truncate_tweet(text)
+
+    # --- Guard: don't send a request we know will be rejected ---
+    limits = get_rate_limits()
+    retry_at = limits.blocked_until(CREATE_TWEET_ENDPOINT)
+    if retry_at is not None:
+        log_warning(f"Post budget exhausted — not sending until {_format_utc(retry_at)}.")
+        return {
+            "success": False,
+            "error": "rate_limit",
+            "detail": "Rate limit budget exhausted",
+            "retry_at": retry_at,
+        }
 
     client = get_x_client()
 
     try:
         response = client.create_tweet(text=text)
-        tweet_id = response.data["id"]
+        limits.update(CREATE_TWEET_ENDPOINT, response.headers)
+        tweet_id = response.json()["data"]["id"]
         log_info(f"Tweet posted successfully. ID: {tweet_id}")
         return {"success": True, "tweet_id": str(tweet_id)}
 
     except tweepy.TooManyRequests as e:
-        log_error(f"Rate limit hit. Waiting {RATE_LIMIT_WAIT_SECONDS // 60} minutes before retry.")
-        time.sleep(RATE_LIMIT_WAIT_SECONDS)
-        try:
-            response = client.create_tweet(text=text)
-            tweet_id = response.data["id"]
-            log_info(f"Tweet posted on retry. ID: {tweet_id}")
-            return {"success": True, "tweet_id": str(tweet_id)}
-        except tweepy.TweepyException as retry_err:
-            log_error(f"Retry also failed: {retry_err}")
-            return {"success": False, "error": "rate_limit", "detail": str(retry_err)}
+        limits.update(CREATE_TWEET_ENDPOINT, e.response.headers, limited=True)
+        retry_at = limits.blocked_until(CREATE_TWEET_ENDPOINT) or time.time()
+        log_error(f"Rate limit hit (429). Retry after {_format_utc(retry_at)}.")
+        return {"success": False, "error": "rate_limit", "detail": str(e), "retry_at": retry_at}
 
     except tweepy.Forbidden as e:
         log_error(
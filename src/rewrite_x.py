@@ -1,9 +1,14 @@
 import json
 import asyncio
+import os
+import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
-from src.utils.openai_client import run_openai
+from src.event import Event
+from src.utils.openai_client import run_openai, stream_openai
+from src.utils.metrics import record
+from src.utils.tweet_length import MAX_TWEET_LENGTH, weighted_length, shorten_tweet, truncate_tweet
 from src.validate_event import validate_or_fix_event
 from src.utils.log import log_info, log_warning, log_error
 
@@ -12,38 +17,159 @@ REWRITE_PROMPT_PATH = Path("prompts/rewrite-for-x.md")
 # Load rewrite prompt template
 REWRITE_TEMPLATE = REWRITE_PROMPT_PATH.read_text(encoding="utf-8")
 
+# Alternatives requested in the single rewrite call (1 = plain single post)
+REWRITE_CANDIDATES = int(os.getenv("REWRITE_CANDIDATES", "3"))
+
+# Stream a single post instead and stop generation as soon as it passes
+# REWRITE_ABORT_LENGTH weighted chars (far enough over 280 that local
+# shortening is unlikely to save it)
+REWRITE_STREAMING = os.getenv("REWRITE_STREAMING", "false").lower() == "true"
+REWRITE_ABORT_LENGTH = int(os.getenv("REWRITE_ABORT_LENGTH", "340"))
+
+CANDIDATES_SCHEMA = {
+    "name": "tweet_candidates",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "candidates": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["candidates"],
+        "additionalProperties": False,
+    },
+}
+
+_HASHTAG_RE = re.compile(r"#\w+")
+
+# A 3–4 digit year anywhere in the date ("1969-07-20", "July 20, 1969")
+_YEAR_RE = re.compile(r"\b\d{3,4}\b")
+
+
+# --------------------------------------------------
+# Candidate parsing & scoring
+# --------------------------------------------------
+def _candidates_instruction(n: int) -> str:
+    return (
+        f"\n\nInstead of a single post, write {n} distinct alternative posts that each follow "
+        f'every rule above. Return them as JSON: {{"candidates": ["...", "..."]}}'
+    )
+
+
+def parse_candidates(raw: str) -> list[str]:
+    """Read {"candidates": [...]} output; anything else is one plain candidate."""
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        data = None
+
+    if isinstance(data, dict):
+        data = data.get("candidates")
+    if isinstance(data, list):
+        candidates = [c.strip() for c in data if isinstance(c, str) and c.strip()]
+        if candidates:
+            return candidates
+    return [raw.strip()]
+
+
+def score_candidate(tweet: str, event: Event) -> float:
+    """
+    Cheap local quality score (higher is better). Rewards 2–4 hashtags,
+    mentioning the event's year and using the room up to the prompt's
+    260-char target.
+    """
+    score = 0.0
+    length = weighted_length(tweet)
+
+    hashtags = len(_HASHTAG_RE.findall(tweet))
+    score += 10 if 2 <= hashtags <= 4 else -5 * min(abs(hashtags - 2), abs(hashtags - 4))
+
+    match = _YEAR_RE.search(event.date)
+    year = match.group().lstrip("0") if match else ""
+    if year and year in tweet:
+        score += 15
+
+    score += 20 * min(length, 260) / 260
+    if length > 260:
+        score -= 5
+    return score
+
+
+def pick_best_candidate(candidates: list[str], event: Event) -> Optional[str]:
+    """Best-scoring candidate, shortening locally if none fits. None if nothing fits."""
+    ranked = sorted(candidates, key=lambda c: score_candidate(c, event), reverse=True)
+
+    for tweet in ranked:
+        if weighted_length(tweet) <= MAX_TWEET_LENGTH:
+            return tweet
+
+    for tweet in ranked:
+        shortened = shorten_tweet(tweet)
+        if shortened is not None:
+            log_info(
+                f"No candidate fit ({weighted_length(tweet)} chars) — "
+                f"shortened locally to {weighted_length(shortened)}."
+            )
+            return shortened
+    return None
+
 
 async def rewrite_for_x(event: Dict[str, any]) -> str:
     """
-    Takes a validated event dictionary and rewrites it into a tweet-length post.
-    Ensures the event is valid first.
+    Takes an event and rewrites it into a tweet-length post.
+    Ensures the event is valid first (a no-op for an already-built Event).
     """
 
     # Validate and auto-fix the event
     event = await validate_or_fix_event(event)
+    if not isinstance(event, Event):
+        log_error("Rewrite skipped — event failed validation.")
+        return "ERROR: Event failed validation."
 
     # Insert event JSON into template
-    prompt = REWRITE_TEMPLATE.replace("{{event_json}}", json.dumps(event, indent=2))
+    prompt = REWRITE_TEMPLATE.replace("{{event_json}}", event.to_json())
 
     log_info("Generating X rewrite...")
 
     try:
-        rewritten = await run_openai(prompt)
-        tweet = rewritten.strip()
-
-        # Enforce 280-char hard limit — retry once with explicit feedback
-        if len(tweet) > 280:
-            log_warning(f"Tweet too long ({len(tweet)} chars) — retrying with stricter prompt.")
+        if REWRITE_STREAMING:
+            result = await stream_openai(
+                prompt,
+                should_abort=lambda text: weighted_length(text) > REWRITE_ABORT_LENGTH,
+            )
+            rewritten = result["content"]
+            if result["aborted"]:
+                log_warning(f"Rewrite passed {REWRITE_ABORT_LENGTH} chars — stream cancelled.")
+        elif REWRITE_CANDIDATES > 1:
+            rewritten = await run_openai(
+                prompt + _candidates_instruction(REWRITE_CANDIDATES),
+                response_schema=CANDIDATES_SCHEMA,
+            )
+        else:
+            rewritten = await run_openai(prompt)
+        candidates = parse_candidates(rewritten)
+
+        # Pick the best candidate within the 280 weighted-char limit,
+        # shortening locally if needed; only retry the LLM when that fails.
+        # A cancelled stream is incomplete text, so it always goes to retry.
+        aborted = REWRITE_STREAMING and result["aborted"]
+        tweet = None if aborted else pick_best_candidate(candidates, event)
+        if tweet is None:
+            length = min(weighted_length(c) for c in candidates)
+            if aborted:
+                length = f"over {length}"
+            log_warning(f"Tweet too long ({length} chars) — retrying with stricter prompt.")
+            record("retries")
             retry_prompt = (
                 f"{prompt}\n\n"
-                f"IMPORTANT: Your previous attempt was {len(tweet)} characters, which exceeds the 280-character X limit.\n"
+                f"IMPORTANT: Your previous attempt was {length} characters, which exceeds the 280-character X limit.\n"
                 f"Rewrite it again. It MUST be under 260 characters total (including hashtags). No exceptions."
             )
             rewritten = await run_openai(retry_prompt)
             tweet = rewritten.strip()
-            if len(tweet) > 280:
-                log_warning(f"Retry still too long ({len(tweet)} chars) — truncating.")
-                tweet = tweet[:277] + "..."
+            length = weighted_length(tweet)
+            if length > MAX_TWEET_LENGTH:
+                log_warning(f"Retry still too long ({length} chars) — shortening locally.")
+                tweet = shorten_tweet(tweet) or truncate_tweet(tweet)
 
         log_info("Rewrite complete.")
         return tweet
@@ -1,44 +1,46 @@
 # src/run_pipeline.py
 
-import json
 import asyncio
 import sys
 from pathlib import Path
 
-from src.fetch_source import fetch_wikipedia_page
+from src.condense_source import has_full_date
+from src.fetch_source import fetch_wikipedia_page, fetch_wikipedia_pages
+from src.event import Event
 from src.extract_event import extract_event
 from src.validate_event import validate_or_fix_event
 from src.utils.filename import build_event_filename
 from src.utils.log import log_info, log_error
+from src.utils.metrics import cycle, span
 
 
 EVENTS_DIR = Path("events")
 
 
-async def run(query: str):
-    log_info(f"Running pipeline for query: {query}")
-
-    # -----------------------------------
-    # 1. Fetch source
-    # -----------------------------------
-    source = fetch_wikipedia_page(query)
-
+async def _process(query: str, source: dict):
+    """Extract, validate and save one event from an already-fetched source."""
     if "error" in source:
-        log_error(f"Source fetch failed: {source['error']}")
-        return
-
-    log_info("Fetched source text.")
+        log_error(f"Source fetch failed for '{query}': {source['error']}")
+        return None
 
     # -----------------------------------
     # 2. Extract event (LLM or fallback)
     # -----------------------------------
-    event = await extract_event(source)
+    with span("extract"):
+        event = await extract_event(query, source=source)
+    if "error" in event:
+        log_error(f"Extraction failed for '{query}': {event['error']}")
+        return None
     log_info("Extracted event dictionary.")
 
     # -----------------------------------
-    # 3. Validate / Auto-fix schema
+    # 3. Validate / Auto-fix schema (no-op if extraction already did)
     # -----------------------------------
-    validated_event = await validate_or_fix_event(event)
+    with span("validate"):
+        validated_event = await validate_or_fix_event(event)
+    if not isinstance(validated_event, Event):
+        log_error(f"Event for '{query}' failed validation — not saved.")
+        return None
     log_info("Event validated.")
 
     # -----------------------------------
@@ -52,17 +54,60 @@ async def run(query: str):
     # -----------------------------------
     # 5. Save output
     # -----------------------------------
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(validated_event, f, indent=2)
+    validated_event.save(filepath)
 
     log_info(f"Saved event → {filepath}")
     print(f"\nDONE → {filepath}\n")
+    return filepath
+
+
+async def _fetch_sources(queries: list[str]) -> dict[str, dict]:
+    """
+    Lead sections for every query in batched requests (MediaWiki returns up
+    to 20 intros per response, but whole articles only one per response).
+    Only pages whose lead has no month-day date are fetched again in full,
+    so condense_source can pick date-bearing sentences from the body.
+    """
+    sources = await fetch_wikipedia_pages(queries, intro_only=True)
+
+    thin = [q for q, s in sources.items() if "error" not in s and not has_full_date(s["summary"])]
+    if thin:
+        log_info(f"{len(thin)} lead section(s) without a full date — fetching whole article(s).")
+        for query, page in zip(thin, await asyncio.gather(*(fetch_wikipedia_page(q) for q in thin))):
+            if "error" not in page:
+                sources[query] = page
+    return sources
+
+
+async def run_many(queries: list[str]):
+    """
+    Run the pipeline for many queries: batched Wikipedia lead sections (see
+    _fetch_sources), then extraction for every page concurrently (bounded
+    by the OpenAI client).
+    """
+    log_info(f"Running pipeline for {len(queries)} queries")
+
+    # -----------------------------------
+    # 1. Fetch sources (batched)
+    # -----------------------------------
+    with cycle("pipeline"):
+        with span("fetch"):
+            sources = await _fetch_sources(queries)
+        log_info("Fetched source text.")
+
+        return await asyncio.gather(
+            *(_process(query, sources[query]) for query in dict.fromkeys(queries))
+        )
+
+
+async def run(query: str):
+    log_info(f"Running pipeline for query: {query}")
+    await run_many([query])
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python src/run_pipeline.py \"Search term\"")
+        print("Usage: python -m src.run_pipeline \"Search term\" [\"Search term\" ...]")
         sys.exit(1)
 
-    query = sys.argv[1]
-    asyncio.run(run(query))
+    asyncio.run(run_many(sys.argv[1:]))
@@ -1,59 +1,234 @@
 # src/schedule.py
+# Runs the autopost pipeline on a cron schedule inside one long-lived event
+# loop. The shared HTTP and OpenAI clients (and their connection pools) are
+# built once on that loop and reused by every job until shutdown.
 import asyncio
 import os
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
-from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 
 from src.autopost import run_autopost
-from src.utils.log import log_info, log_error
+from src.outbox import get_outbox
+from src.onthisday_store import refresh_stale
+from src.utils.log import log_info, log_warning, log_error
 from src.utils.alert import send_alert
+from src.utils.http_client import close_http_client
+from src.utils.openai_client import close_openai_client
 
 load_dotenv()
 
 # --------------------------------------------------
-# Config — set POST_TIME_UTC in .env to change time
-# Format: "HH:MM" in 24-hour UTC
-# Default: 12:00 UTC
+# Config — posting slots in UTC
+# POST_SLOTS_UTC: comma-separated NAME=HH:MM pairs, e.g. "AM=09:00,PM=14:00,EVE=19:00"
+# If unset, a single "daily" slot at POST_TIME_UTC ("HH:MM", default 12:00)
 # --------------------------------------------------
-_raw_time = os.getenv("POST_TIME_UTC", "12:00")
-try:
-    _hour, _minute = [int(x) for x in _raw_time.strip().split(":")]
-except ValueError:
-    log_error(f"Invalid POST_TIME_UTC value '{_raw_time}' — falling back to 12:00 UTC.")
-    _hour, _minute = 12, 0
+DEFAULT_SLOT = "daily"
 
 
-def job() -> None:
-    """Wrapper so APScheduler (sync) can call the async autopost pipeline."""
+def _parse_time(raw: str) -> Optional[tuple[int, int]]:
     try:
-        asyncio.run(run_autopost())
+        hour, minute = [int(x) for x in raw.strip().split(":")]
+    except ValueError:
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour, minute
+
+
+def parse_slots(raw_slots: str, raw_time: str = "12:00") -> list[tuple[str, int, int]]:
+    """
+    Parse POST_SLOTS_UTC into (name, hour, minute) tuples. Invalid entries
+    are logged and skipped; with no valid slot, fall back to one "daily"
+    slot at POST_TIME_UTC (or 12:00 UTC if that is invalid too).
+    """
+    slots: list[tuple[str, int, int]] = []
+    for entry in filter(None, (e.strip() for e in raw_slots.split(","))):
+        name, _, value = entry.partition("=")
+        parsed = _parse_time(value) if name.strip() else None
+        if parsed is None:
+            log_error(f"Invalid POST_SLOTS_UTC entry '{entry}' — expected NAME=HH:MM, skipping.")
+            continue
+        if any(s[0] == name.strip() for s in slots):
+            log_error(f"Duplicate POST_SLOTS_UTC slot '{name.strip()}' — skipping.")
+            continue
+        slots.append((name.strip(), *parsed))
+
+    if slots:
+        return slots
+
+    parsed = _parse_time(raw_time)
+    if parsed is None:
+        log_error(f"Invalid POST_TIME_UTC value '{raw_time}' — falling back to 12:00 UTC.")
+        parsed = (12, 0)
+    return [(DEFAULT_SLOT, *parsed)]
+
+
+SLOTS = parse_slots(os.getenv("POST_SLOTS_UTC", ""), os.getenv("POST_TIME_UTC", "12:00"))
+
+
+_scheduler: Optional[AsyncIOScheduler] = None
+
+# One lock per slot: a run that is still going (e.g. a rate-limit retry or a
+# slow LLM call) makes a second run for the same slot skip, not overlap
+_slot_locks: dict[str, asyncio.Lock] = {}
+_running: set[asyncio.Task] = set()
+
+
+def _slot_lock(slot: str) -> asyncio.Lock:
+    if slot not in _slot_locks:
+        _slot_locks[slot] = asyncio.Lock()
+    return _slot_locks[slot]
+
+
+def schedule_retry(retry_at: float, slot: str = DEFAULT_SLOT) -> None:
+    """
+    Queue a one-off autopost run for a slot for when X's rate limit resets.
+    Each slot has its own retry job, so one slot's retry never replaces
+    another's; a newer retry for the same slot does.
+    """
+    run_date = datetime.fromtimestamp(max(retry_at, time.time() + 5), tz=timezone.utc)
+    if _scheduler is None:
+        log_error(f"Rate-limited post pending — no scheduler running to retry at {run_date:%H:%M} UTC.")
+        return
+    _scheduler.add_job(
+        job,
+        trigger=DateTrigger(run_date=run_date, timezone="UTC"),
+        args=[slot],
+        id=f"autopost_retry:{slot}",
+        name=f"Rate-limited post retry ({slot})",
+        misfire_grace_time=60 * 60,
+        replace_existing=True,
+    )
+    log_info(f"Rate-limited post will be retried at {run_date:%Y-%m-%d %H:%M:%S} UTC.")
+
+
+def schedule_queued_retry() -> None:
+    """
+    Schedule a retry for every slot with rate-limited posts in the outbox,
+    at that slot's earliest retry time. Posts queued before slots were
+    recorded belong to the first configured slot.
+    """
+    earliest: dict[str, float] = {}
+    for post in get_outbox().list("pending"):
+        if post["in_flight"]:
+            continue
+        slot = post["slot"] or SLOTS[0][0]
+        retry_at = post["retry_at"] or time.time()
+        earliest[slot] = min(retry_at, earliest.get(slot, retry_at))
+
+    for slot, retry_at in earliest.items():
+        schedule_retry(retry_at, slot)
+
+
+async def job(slot: str = DEFAULT_SLOT) -> None:
+    """Run one autopost cycle for a slot on the scheduler's event loop."""
+    lock = _slot_lock(slot)
+    if lock.locked():
+        log_warning(f"Autopost for slot '{slot}' is still running — skipping this run.")
+        return
+
+    task = asyncio.current_task()
+    _running.add(task)
+    try:
+        async with lock:
+            retry_at = await run_autopost(slot)
+        if retry_at is not None:
+            schedule_queued_retry()
     except Exception as e:
-        msg = f"Autopost job raised an unexpected error: {e}"
+        msg = f"Autopost job for slot '{slot}' raised an unexpected error: {e}"
         log_error(msg)
-        send_alert(f"CRITICAL: {msg}")
+        await send_alert(f"CRITICAL: {msg}")
+    finally:
+        _running.discard(task)
 
 
-def start() -> None:
-    scheduler = BlockingScheduler(timezone="UTC")
+async def refresh_job() -> None:
+    """Incrementally refresh the local On This Day store (stale days only)."""
+    try:
+        await refresh_stale()
+    except Exception as e:
+        log_error(f"On This Day refresh job failed: {e}")
+
+
+def _add_jobs(scheduler: AsyncIOScheduler) -> None:
+    for slot, hour, minute in SLOTS:
+        scheduler.add_job(
+            job,
+            trigger=CronTrigger(hour=hour, minute=minute, timezone="UTC"),
+            args=[slot],
+            id=f"autopost_{slot}",
+            name=f"HistoryMosaic Post ({slot})",
+            misfire_grace_time=60 * 10,  # Allow up to 10 min late start
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
 
     scheduler.add_job(
-        job,
-        trigger=CronTrigger(hour=_hour, minute=_minute, timezone="UTC"),
-        id="daily_autopost",
-        name="Daily HistoryMosaic Post",
-        misfire_grace_time=60 * 10,  # Allow up to 10 min late start
+        refresh_job,
+        trigger=CronTrigger(hour=3, minute=30, timezone="UTC"),
+        id="onthisday_refresh",
+        name="On This Day store refresh",
+        misfire_grace_time=60 * 60,
+        max_instances=1,
         replace_existing=True,
     )
 
-    log_info(f"Scheduler started — posting daily at {_hour:02d}:{_minute:02d} UTC.")
+    # A post rate-limited before a restart is retried once the limit resets
+    schedule_queued_retry()
+
+
+async def _shutdown(scheduler: AsyncIOScheduler) -> None:
+    """Stop scheduling, cancel runs in progress, then close the shared clients."""
+    scheduler.shutdown(wait=False)
+    for task in list(_running):
+        task.cancel()
+    # Interrupted cycles resume from their checkpoint on the next start
+    await asyncio.gather(*_running, return_exceptions=True)
+    await close_http_client()
+    await close_openai_client()
+
+
+async def main() -> None:
+    global _scheduler
+
+    scheduler = AsyncIOScheduler(timezone="UTC", event_loop=asyncio.get_running_loop())
+    _scheduler = scheduler
+    _add_jobs(scheduler)
+    scheduler.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+    times = ", ".join(f"{slot} {hour:02d}:{minute:02d}" for slot, hour, minute in SLOTS)
+    log_info(f"Scheduler started — posting daily at {times} UTC.")
     log_info("Press Ctrl+C to stop.")
 
     try:
-        scheduler.start()
-    except (KeyboardInterrupt, SystemExit):
+        await stop.wait()
+    finally:
+        await _shutdown(scheduler)
+        _scheduler = None
         log_info("Scheduler stopped.")
 
 
+def start() -> None:
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
 if __name__ == "__main__":
     start()
@@ -1,13 +1,13 @@
 # src/utils/alert.py
 import os
-import requests
+from src.utils.http_client import http_post
 from src.utils.log import log_warning
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
 
-def send_alert(message: str) -> None:
+async def send_alert(message: str) -> None:
     """
     Send an alert message via Telegram.
     Silently skips if credentials are not configured.
@@ -23,7 +23,7 @@ def send_alert(message: str) -> None:
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = await http_post(url, json=payload)
         response.raise_for_status()
     except Exception as e:
         log_warning(f"Failed to send Telegram alert: {e}")
@@ -0,0 +1,44 @@
+# src/utils/atomic.py
+import os
+import tempfile
+from pathlib import Path
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it, so set and restore — once, at
+    # import, rather than racing other threads creating files
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """
+    Replace a text file in one step: write a temp file in the same
+    directory, fsync it, then rename it over the original. Readers see the
+    old or the new content, never a partial file.
+
+    The new file keeps the original's permission bits (a new file gets what
+    open() would give it, 0666 minus the umask) instead of mkstemp's 0600.
+    """
+    path = Path(path)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            if hasattr(os, "fchmod"):  # not on Windows
+                os.fchmod(f.fileno(), mode)
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
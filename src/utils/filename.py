@@ -1,5 +1,6 @@
 # src/utils/filename.py
 import re
+from datetime import datetime
 from dateutil import parser as dateutil_parser
 
 
@@ -12,16 +13,20 @@ def slugify(text: str) -> str:
 def normalize_date(date_str: str) -> str:
     """
     Normalize any recognizable date string to ISO 8601 (YYYY-MM-DD).
-    Falls back to the original string if parsing fails.
+    Missing month/day default to 01. Falls back to the original string if
+    parsing fails.
 
     Examples:
         "July 20, 1969"  -> "1969-07-20"
         "Aug 28, 1963"   -> "1963-08-28"
+        "July 1969"      -> "1969-07-01"
         "1969-07-20"     -> "1969-07-20"
     """
     try:
-        parsed = dateutil_parser.parse(date_str, default=None)
-        return parsed.strftime("%Y-%m-%d")
+        default = datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        parsed = dateutil_parser.parse(date_str, default=default)
+        # strftime("%Y") does not zero-pad years before 1000 on every platform
+        return f"{parsed.year:04d}-{parsed.month:02d}-{parsed.day:02d}"
     except (ValueError, TypeError, OverflowError):
         return date_str
 
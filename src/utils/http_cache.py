@@ -0,0 +1,227 @@
+# src/utils/http_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from src.utils.http_client import http_get
+from src.utils.log import log_warning
+from src.utils.metrics import record
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+HTTP_CACHE_PATH = DATA_DIR / "http_cache.sqlite3"
+
+# Serve straight from disk (no request at all) while an entry is this fresh
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", str(6 * 3600)))
+
+# Set HTTP_CACHE_DISABLED=true to always download in full
+HTTP_CACHE_DISABLED = os.getenv("HTTP_CACHE_DISABLED", "false").lower() == "true"
+
+
+class CachedResponse:
+    """Minimal response object shared by network and on-disk results."""
+
+    def __init__(self, status_code: int, text: str, url: str, from_cache: bool = False):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        self.from_cache = from_cache
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                f"HTTP {self.status_code} for {self.url}",
+                request=httpx.Request("GET", self.url),
+                response=httpx.Response(self.status_code),
+            )
+
+
+class HttpCache:
+    """
+    On-disk store of response bodies and their validators (ETag /
+    Last-Modified), keyed by the full request URL.
+
+    Counters (also recorded on the active metrics span, so each cycle's
+    summary reports its hit and 304 rates):
+        fresh     — served from disk without a request (http_cache_hits)
+        revalidated — server answered 304 Not Modified (http_revalidated)
+        stale     — network failed, served an expired copy (http_cache_stale)
+        misses    — full download (http_cache_misses)
+    """
+
+    def __init__(self, path: Path = HTTP_CACHE_PATH):
+        self.path = Path(path)
+        self.fresh = 0
+        self.revalidated = 0
+        self.stale = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    url           TEXT PRIMARY KEY,
+                    etag          TEXT,
+                    last_modified TEXT,
+                    body          TEXT NOT NULL,
+                    fetched_at    REAL NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def load(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified, body, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body, fetched_at = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+            "fetched_at": fetched_at,
+        }
+
+    def store(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time()),
+            )
+            conn.commit()
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+
+    def stats(self) -> dict:
+        served = self.fresh + self.revalidated + self.stale
+        lookups = served + self.misses
+        return {
+            "fresh": self.fresh,
+            "revalidated": self.revalidated,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+        }
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Return the process-wide HTTP cache, or None when caching is disabled."""
+    global _cache
+
+    if HTTP_CACHE_DISABLED:
+        return None
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def _cache_url(url: str, params: Optional[dict]) -> str:
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+async def cached_get(
+    url: str,
+    params: Optional[dict] = None,
+    max_age: int = HTTP_CACHE_MAX_AGE_SECONDS,
+) -> CachedResponse:
+    """
+    GET through the on-disk cache.
+
+    - Within max_age seconds of the last fetch, the stored body is returned
+      without touching the network.
+    - Otherwise the request carries If-None-Match / If-Modified-Since; a 304
+      refreshes the stored copy's age and returns it.
+    - If the network fails and an expired copy exists, that copy is returned.
+
+    Raises like httpx on network errors or non-2xx statuses when there is
+    nothing cached to fall back on.
+    """
+    cache = get_http_cache()
+    if cache is None:
+        response = await http_get(url, params=params)
+        return CachedResponse(response.status_code, response.text, url)
+
+    key = _cache_url(url, params)
+    entry = cache.load(key)
+
+    if entry and time.time() - entry["fetched_at"] < max_age:
+        cache.fresh += 1
+        record("http_cache_hits")
+        return CachedResponse(200, entry["body"], key, from_cache=True)
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = await http_get(url, params=params, headers=headers or None)
+        if response.status_code == 304 and entry:
+            cache.touch(key)
+            cache.revalidated += 1
+            record("http_revalidated")
+            return CachedResponse(200, entry["body"], key, from_cache=True)
+        response.raise_for_status()
+    except Exception as e:
+        if entry:
+            log_warning(f"Refresh failed for {key} ({e}) — serving cached copy.")
+            cache.stale += 1
+            record("http_cache_stale")
+            return CachedResponse(200, entry["body"], key, from_cache=True)
+        raise
+
+    cache.misses += 1
+    record("http_cache_misses")
+    try:
+        cache.store(
+            key,
+            response.text,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    except sqlite3.Error as e:
+        log_warning(f"HTTP cache write failed: {e}")
+    return CachedResponse(response.status_code, response.text, key)
+
+
+def http_cache_stats() -> dict:
+    cache = get_http_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,109 @@
+# src/utils/http_client.py
+import asyncio
+import importlib.util
+import os
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.utils.metrics import record
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+HEADERS = {
+    "User-Agent": "HistoryMosaicBot/1.0 (https://github.com/kiplimodev/historymosaic)"
+}
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+
+# Pool size across all hosts, and max requests in flight to any single host
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+
+# HTTP/2 needs the optional `h2` package (installed via httpx[http2])
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# --------------------------------------------------
+# Shared client
+# --------------------------------------------------
+# One keep-alive pool per event loop, built lazily and rebuilt only when a
+# different loop shows up (e.g. successive asyncio.run() calls).
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: dict[str, asyncio.Semaphore] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient for the running event loop."""
+    global _client, _host_limits, _loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            http2=HTTP2_ENABLED,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _host_limits = {}
+        _loop = loop
+    return _client
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    return _host_limits[host]
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client, _host_limits, _loop
+
+    if _client is not None:
+        await _client.aclose()
+    _client, _host_limits, _loop = None, {}, None
+
+
+async def http_request(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Send a request through the shared pool, waiting for a per-host slot.
+    Does not raise on HTTP error statuses — call raise_for_status() as needed.
+    """
+    client = get_http_client()
+    async with _host_limit(url):
+        response = await client.request(method, url, **kwargs)
+    record("http_requests")
+    record("bytes", len(response.content))
+    return response
+
+
+async def http_get(
+    url: str,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: Optional[float] = None,
+) -> httpx.Response:
+    return await http_request(
+        "GET", url, params=params, headers=headers,
+        timeout=timeout or HTTP_TIMEOUT_SECONDS,
+    )
+
+
+async def http_post(
+    url: str,
+    json: Any = None,
+    headers: Optional[dict] = None,
+    timeout: Optional[float] = None,
+) -> httpx.Response:
+    return await http_request(
+        "POST", url, json=json, headers=headers,
+        timeout=timeout or HTTP_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,219 @@
+# src/utils/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.utils.log import log_warning
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+LLM_CACHE_PATH = DATA_DIR / "llm_cache.sqlite3"
+
+# Entries older than this are treated as misses (default: 7 days)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Least-recently-used entries are evicted beyond this many rows
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Set LLM_CACHE_DISABLED=true to always call the API
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "false").lower() == "true"
+
+
+def make_cache_key(model: str, *parts: str) -> str:
+    """
+    Content-address a request: the model name plus a SHA-256 of every
+    prompt part (system prompt, user prompt, request options).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return f"{model}:{digest.hexdigest()}"
+
+
+class LLMCache:
+    """
+    On-disk LLM response cache backed by SQLite.
+
+    - get() returns None on a miss or when the entry is older than the TTL
+    - set() stores a response and evicts least-recently-used rows once the
+      cache grows past max_entries
+    - hits/misses/evictions are counted in the database, so the totals
+      survive restarts and `python -m src.utils.llm_cache` can report them
+    """
+
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT NOT NULL,
+                    response    TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._size = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        """Add to a persisted counter; committed with the caller's transaction."""
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count(conn, "misses")
+                conn.commit()
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self._size -= 1
+                self._count(conn, "misses")
+                conn.commit()
+                return None
+
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+            conn.commit()
+            return response
+
+    def set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            existed = conn.execute(
+                "SELECT 1 FROM responses WHERE key = ?", (key,)
+            ).fetchone() is not None
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            if not existed:
+                self._size += 1
+
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self._size -= overflow
+                self._count(conn, "evictions", overflow)
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            counts = dict(conn.execute("SELECT name, value FROM counters"))
+            entries = self._size
+        hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counts.get("evictions", 0),
+            "entries": entries,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+
+    if LLM_CACHE_DISABLED:
+        return None
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def cache_get(key: str) -> Optional[str]:
+    """Look up a cached response. Cache errors are logged and treated as misses."""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except sqlite3.Error as e:
+        log_warning(f"LLM cache read failed: {e}")
+        return None
+
+
+def cache_set(key: str, model: str, response: str) -> None:
+    """Store a response. Cache errors are logged and otherwise ignored."""
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(key, model, response)
+    except sqlite3.Error as e:
+        log_warning(f"LLM cache write failed: {e}")
+
+
+# -------- CLI: print cache stats --------
+if __name__ == "__main__":
+    cache = LLMCache()
+    print(json.dumps({"path": str(cache.path), **cache.stats()}, indent=2))
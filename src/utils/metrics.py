@@ -0,0 +1,230 @@
+# src/utils/metrics.py
+# Per-stage timing and cost spans for pipeline cycles.
+#
+#   async def run_autopost():
+#       with cycle("autopost"):
+#           with span("fetch"):
+#               ...                      # http_request() adds "bytes"
+#           with span("rewrite"):
+#               ...                      # run_openai() adds tokens
+#
+# Each span records wall time plus counters added with record() while it is
+# active — bytes fetched, LLM prompt/completion tokens and calls, retries.
+# The active cycle and span live in context variables, so code deep in the
+# call stack (and tasks started inside a span) report to the right place.
+# When a cycle ends, its spans are appended to DATA_DIR/metrics/spans.jsonl,
+# a Prometheus textfile DATA_DIR/metrics/<cycle>.prom is rewritten, and a
+# one-line summary (with the cycle's HTTP cache hit and 304 rates) is logged.
+
+import contextvars
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.utils.atomic import write_atomic
+from src.utils.log import log_info, log_warning
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+METRICS_DIR = DATA_DIR / "metrics"
+
+# Set METRICS_DISABLED=true to skip writing spans and textfiles
+METRICS_DISABLED = os.getenv("METRICS_DISABLED", "false").lower() == "true"
+
+_cycle: contextvars.ContextVar[Optional["Cycle"]] = contextvars.ContextVar("metrics_cycle", default=None)
+_span: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("metrics_span", default=None)
+
+
+class Cycle:
+    """Spans collected during one pipeline run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.id = f"{name}-{int(time.time() * 1000)}"
+        self.started = time.time()
+        self.spans: list[dict] = []
+        self.unattributed: dict[str, float] = defaultdict(float)
+
+    def totals(self) -> dict[str, dict[str, float]]:
+        """Per-stage sums of seconds and every counter."""
+        stages: dict[str, dict[str, float]] = {}
+        for s in self.spans:
+            stage = stages.setdefault(s["stage"], defaultdict(float))
+            stage["seconds"] += s["seconds"]
+            for key, value in s["counters"].items():
+                stage[key] += value
+        return {stage: dict(values) for stage, values in stages.items()}
+
+
+# --------------------------------------------------
+# Recording
+# --------------------------------------------------
+def record(counter: str, value: float = 1) -> None:
+    """Add to a counter on the active span (or the cycle if no span is open)."""
+    current = _span.get()
+    if current is not None:
+        current["counters"][counter] = current["counters"].get(counter, 0) + value
+        return
+    active = _cycle.get()
+    if active is not None:
+        active.unattributed[counter] += value
+
+
+@contextmanager
+def span(stage: str, **labels: str) -> Iterator[dict]:
+    """
+    Time a stage. Nested spans count toward their own stage only and
+    inherit the enclosing span's labels (e.g. path="live").
+    """
+    parent = _span.get()
+    if parent is not None:
+        labels = {**parent["labels"], **labels}
+    entry = {"stage": stage, "labels": labels, "counters": {}, "start": time.time()}
+    token = _span.set(entry)
+    started = time.perf_counter()
+    try:
+        yield entry
+    except BaseException:
+        entry["labels"] = {**labels, "status": "error"}
+        raise
+    finally:
+        entry["seconds"] = round(time.perf_counter() - started, 4)
+        _span.reset(token)
+        active = _cycle.get()
+        if active is not None:
+            active.spans.append(entry)
+
+
+@contextmanager
+def cycle(name: str) -> Iterator[Cycle]:
+    """Collect spans for one run and export them when it ends."""
+    current = Cycle(name)
+    token = _cycle.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _cycle.reset(token)
+        seconds = time.perf_counter() - started
+        log_info(summarize(current, seconds))
+        if not METRICS_DISABLED:
+            try:
+                export(current, seconds)
+            except OSError as e:
+                log_warning(f"Could not write metrics: {e}")
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def summarize(current: Cycle, seconds: float) -> str:
+    parts = []
+    for stage, values in current.totals().items():
+        part = f"{stage} {values['seconds']:.2f}s"
+        tokens = values.get("prompt_tokens", 0) + values.get("completion_tokens", 0)
+        if tokens:
+            part += f" {int(tokens)} tok"
+        if values.get("bytes"):
+            part += f" {int(values['bytes']) // 1024} KiB"
+        if values.get("retries"):
+            part += f" {int(values['retries'])} retries"
+        parts.append(part)
+    summary = f"Cycle '{current.name}' took {seconds:.2f}s — " + (", ".join(parts) or "no spans")
+
+    http = http_cache_rates(current)
+    if http:
+        summary += (
+            f"; HTTP cache {http['hit_rate']:.0%} hits, "
+            f"{http['revalidated_rate']:.0%} revalidated (304) of {http['lookups']} lookups"
+        )
+    return summary
+
+
+def _cycle_total(current: Cycle, counter: str) -> float:
+    """A counter summed over every span of the cycle plus unattributed records."""
+    return sum(s["counters"].get(counter, 0) for s in current.spans) + current.unattributed.get(counter, 0)
+
+
+def http_cache_rates(current: Cycle) -> Optional[dict]:
+    """
+    Share of the cycle's cached HTTP lookups answered from disk (fresh, 304
+    or stale copy) and answered by a 304, or None if there were none.
+    """
+    fresh = _cycle_total(current, "http_cache_hits")
+    revalidated = _cycle_total(current, "http_revalidated")
+    stale = _cycle_total(current, "http_cache_stale")
+    lookups = fresh + revalidated + stale + _cycle_total(current, "http_cache_misses")
+    if not lookups:
+        return None
+    return {
+        "lookups": int(lookups),
+        "hit_rate": round((fresh + revalidated + stale) / lookups, 3),
+        "revalidated_rate": round(revalidated / lookups, 3),
+    }
+
+
+def _prometheus(current: Cycle, seconds: float) -> str:
+    label = f'cycle="{current.name}"'
+    lines = [
+        "# HELP historymosaic_cycle_duration_seconds Wall time of the last cycle.",
+        "# TYPE historymosaic_cycle_duration_seconds gauge",
+        f"historymosaic_cycle_duration_seconds{{{label}}} {seconds:.4f}",
+        "# HELP historymosaic_cycle_timestamp_seconds When the last cycle finished.",
+        "# TYPE historymosaic_cycle_timestamp_seconds gauge",
+        f"historymosaic_cycle_timestamp_seconds{{{label}}} {time.time():.0f}",
+        "# HELP historymosaic_stage_seconds Wall time per stage in the last cycle.",
+        "# TYPE historymosaic_stage_seconds gauge",
+    ]
+    totals = current.totals()
+    for stage, values in totals.items():
+        lines.append(f'historymosaic_stage_seconds{{{label},stage="{stage}"}} {values["seconds"]:.4f}')
+
+    lines += [
+        "# HELP historymosaic_stage_total Counters per stage in the last cycle "
+        "(bytes, prompt_tokens, completion_tokens, llm_calls, retries, ...).",
+        "# TYPE historymosaic_stage_total gauge",
+    ]
+    for stage, values in totals.items():
+        for counter, value in sorted(values.items()):
+            if counter != "seconds":
+                lines.append(
+                    f'historymosaic_stage_total{{{label},stage="{stage}",counter="{counter}"}} {value:g}'
+                )
+
+    http = http_cache_rates(current)
+    if http:
+        lines += [
+            "# HELP historymosaic_http_cache_ratio HTTP cache hit and 304 revalidation rates in the last cycle.",
+            "# TYPE historymosaic_http_cache_ratio gauge",
+            f'historymosaic_http_cache_ratio{{{label},kind="hit"}} {http["hit_rate"]:g}',
+            f'historymosaic_http_cache_ratio{{{label},kind="revalidated"}} {http["revalidated_rate"]:g}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def export(current: Cycle, seconds: float) -> None:
+    """Append spans as JSON lines and rewrite the cycle's Prometheus textfile."""
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+
+    lines = [
+        json.dumps({
+            "cycle": current.name, "cycle_id": current.id, "stage": s["stage"],
+            "start": round(s["start"], 3), "seconds": s["seconds"],
+            **s["labels"], **s["counters"],
+        })
+        for s in current.spans
+    ]
+    lines.append(json.dumps({
+        "cycle": current.name, "cycle_id": current.id, "stage": "cycle",
+        "start": round(current.started, 3), "seconds": round(seconds, 4),
+        **current.unattributed,
+    }))
+    with open(METRICS_DIR / "spans.jsonl", "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    write_atomic(METRICS_DIR / f"{current.name}.prom", _prometheus(current, seconds))
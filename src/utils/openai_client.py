@@ -1,19 +1,230 @@
+# src/utils/openai_client.py
+import asyncio
+import json
 import os
+import time
+from typing import Callable, Optional
+
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from src.utils.llm_cache import make_cache_key, cache_get, cache_set
+from src.utils.log import log_info
+from src.utils.metrics import record
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")  # Very cheap + powerful
+
+# Max LLM calls in flight at once across the whole process
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+
+# Per-call timeout in seconds (the request itself; waiting for a slot is not counted)
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+
+# Honour response_schema via structured outputs. Set
+# OPENAI_STRUCTURED_OUTPUT=false for models that do not support it.
+OPENAI_STRUCTURED_OUTPUT = os.getenv("OPENAI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+# --------------------------------------------------
+# Shared client
+# --------------------------------------------------
+# The async client owns an HTTP connection pool bound to the event loop it
+# was first used on. We build it lazily and rebuild it only if a different
+# loop shows up (e.g. successive asyncio.run() calls), so every call made on
+# one loop reuses the same pool and the same concurrency semaphore.
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_closing: set[asyncio.Task] = set()
+
+
+async def _close_quietly(client: AsyncOpenAI) -> None:
+    """Close a client left over from an earlier loop; its pool may be unusable."""
+    try:
+        await client.close()
+    except Exception:
+        pass
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for the running event loop."""
+    global _client, _semaphore, _loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        if _client is not None:
+            # Release the previous loop's pool instead of leaking it
+            task = loop.create_task(_close_quietly(_client))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        _client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=OPENAI_TIMEOUT_SECONDS,
+        )
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _loop = loop
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    get_openai_client()
+    return _semaphore
+
+
+async def close_openai_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client, _semaphore, _loop
+
+    if _client is not None:
+        await _client.close()
+    _client, _semaphore, _loop = None, None, None
+
+
+def _record_usage(usage) -> None:
+    """Add a response's token usage to the active metrics span."""
+    for field in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, field, None)
+        if isinstance(value, int):
+            record(field, value)
 
-async def run_openai(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",   # Very cheap + powerful
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ]
+
+async def run_openai(
+    prompt: str,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+    response_schema: Optional[dict] = None,
+) -> str:
+    """
+    Send a single-prompt chat completion and return the text content.
+
+    Pass response_schema (a {"name", "strict", "schema"} JSON Schema spec)
+    to use structured outputs: the model is constrained to return JSON that
+    matches the schema.
+
+    Responses are served from the on-disk LLM cache when the same model and
+    prompt were answered before; pass use_cache=False to force a fresh call.
+
+    At most OPENAI_MAX_CONCURRENCY calls run at once; the rest wait for a
+    slot. Raises asyncio.TimeoutError if the request takes longer than
+    `timeout` seconds once it has a slot (queueing time is not counted, so
+    large batches do not time out before they are sent).
+    """
+    options = {}
+    if response_schema is not None and OPENAI_STRUCTURED_OUTPUT:
+        options["response_format"] = {"type": "json_schema", "json_schema": response_schema}
+
+    cache_key = make_cache_key(
+        OPENAI_MODEL, SYSTEM_PROMPT, prompt, json.dumps(options, sort_keys=True)
     )
+    if use_cache:
+        cached = cache_get(cache_key)
+        if cached is not None:
+            record("llm_cache_hits")
+            return cached
+
+    client = get_openai_client()
+    semaphore = _get_semaphore()
+
+    async def _call() -> str:
+        response = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            **options,
+        )
+        record("llm_calls")
+        _record_usage(response.usage)
+        return response.choices[0].message.content
+
+    async with semaphore:
+        content = await asyncio.wait_for(_call(), timeout=timeout or OPENAI_TIMEOUT_SECONDS)
+
+    if content is not None:
+        cache_set(cache_key, OPENAI_MODEL, content)
+    return content
+
+
+async def stream_openai(
+    prompt: str,
+    should_abort: Optional[Callable[[str], bool]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Stream a single-prompt chat completion, checking the text so far after
+    every chunk. When should_abort(text) returns True the stream is closed,
+    which stops generation server-side, and the partial text is returned.
+
+    Returns:
+        {"content": str, "aborted": bool, "first_token_seconds": float | None}
+
+    Only complete (not aborted) responses are written to the LLM cache; a
+    cache hit is returned as a complete response with no first-token time.
+    Timeout and concurrency rules are the same as run_openai().
+    """
+    cache_key = make_cache_key(OPENAI_MODEL, SYSTEM_PROMPT, prompt, json.dumps({}))
+    if use_cache:
+        cached = cache_get(cache_key)
+        if cached is not None and not (should_abort and should_abort(cached)):
+            record("llm_cache_hits")
+            return {"content": cached, "aborted": False, "first_token_seconds": None}
+
+    client = get_openai_client()
+    semaphore = _get_semaphore()
+
+    async def _call() -> dict:
+        parts: list[str] = []
+        first_token_seconds = None
+        aborted = False
+
+        started = time.perf_counter()
+        stream = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        record("llm_calls")
+        try:
+            async for chunk in stream:
+                # With include_usage the last chunk has usage and no choices
+                _record_usage(getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_seconds is None:
+                    first_token_seconds = time.perf_counter() - started
+                parts.append(delta)
+                if should_abort and should_abort("".join(parts)):
+                    aborted = True
+                    break
+        finally:
+            await stream.close()
+
+        if first_token_seconds is not None:
+            log_info(f"LLM time to first token: {first_token_seconds:.2f}s")
+        return {
+            "content": "".join(parts),
+            "aborted": aborted,
+            "first_token_seconds": first_token_seconds,
+        }
+
+    async with semaphore:
+        result = await asyncio.wait_for(_call(), timeout=timeout or OPENAI_TIMEOUT_SECONDS)
 
-    # NEW OpenAI API response format (v2.x)
-    return response.choices[0].message.content
+    if not result["aborted"] and result["content"]:
+        cache_set(cache_key, OPENAI_MODEL, result["content"])
+    return result
@@ -0,0 +1,20 @@
+# src/utils/paths.py
+import os
+from pathlib import Path
+
+# Curated seed events and pipeline output
+EVENTS_DIR = Path("events")
+
+# DATA_DIR holds runtime state (posted log, caches).
+# On Railway: mount a Volume at /data and set DATA_DIR=/data
+# Locally: leave blank and it defaults to the events/ directory
+DATA_DIR = Path(os.getenv("DATA_DIR") or str(EVENTS_DIR))
+
+# JSON files that may sit next to the seed events (DATA_DIR defaults to
+# events/) but are runtime state, not events
+NOT_EVENT_FILES = frozenset({"posted_log.json", "pending_post.json", "rate_limits.json"})
+
+
+def is_seed_event_file(name: str) -> bool:
+    """True for event JSON files in the seed corpus."""
+    return name.endswith(".json") and name not in NOT_EVENT_FILES
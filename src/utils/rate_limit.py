@@ -0,0 +1,120 @@
+# src/utils/rate_limit.py
+# Per-endpoint X API budgets read from rate-limit response headers, so we
+# never send a request we already know will be rejected.
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Mapping, Optional
+
+from src.utils.log import log_warning
+from src.utils.paths import DATA_DIR
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# Kept in a subdirectory so it never mixes with the seed events in events/
+RATE_LIMIT_STATE_PATH = DATA_DIR / "state" / "rate_limits.json"
+
+# Used when a 429 arrives without reset headers
+RATE_LIMIT_FALLBACK_SECONDS = int(os.getenv("RATE_LIMIT_FALLBACK_SECONDS", str(15 * 60)))
+
+# (remaining, reset) header pairs X sends. The 24-hour pair is the per-user
+# posting cap on POST /2/tweets; the plain pair is the 15-minute window.
+_HEADER_PAIRS = (
+    ("x-rate-limit-remaining", "x-rate-limit-reset"),
+    ("x-user-limit-24hour-remaining", "x-user-limit-24hour-reset"),
+    ("x-app-limit-24hour-remaining", "x-app-limit-24hour-reset"),
+)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimits:
+    """
+    Remaining-request budgets per endpoint, persisted to a small JSON file
+    so a restart does not forget a known block.
+
+    For each endpoint we keep the time until which it is exhausted. An
+    endpoint is blocked while any header pair reports 0 remaining with a
+    reset in the future.
+    """
+
+    def __init__(self, path: Path = RATE_LIMIT_STATE_PATH):
+        self.path = Path(path)
+        self._blocked: Optional[dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def _state(self) -> dict[str, float]:
+        if self._blocked is None:
+            try:
+                self._blocked = {
+                    k: float(v) for k, v in json.loads(self.path.read_text(encoding="utf-8")).items()
+                }
+            except (OSError, ValueError, AttributeError):
+                self._blocked = {}
+        return self._blocked
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._blocked, indent=2), encoding="utf-8")
+        except OSError as e:
+            log_warning(f"Could not save rate limit state: {e}")
+
+    def update(self, endpoint: str, headers: Mapping[str, str], limited: bool = False) -> None:
+        """
+        Record the budget reported by a response's headers. Pass limited=True
+        for a 429: the endpoint is then blocked even if headers are missing.
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        blocked_until = 0.0
+
+        for remaining_name, reset_name in _HEADER_PAIRS:
+            remaining = _header_int(headers, remaining_name)
+            reset = _header_int(headers, reset_name)
+            if remaining == 0 and reset is not None and reset > now:
+                blocked_until = max(blocked_until, float(reset))
+
+        if limited and blocked_until <= now:
+            blocked_until = now + RATE_LIMIT_FALLBACK_SECONDS
+
+        with self._lock:
+            state = self._state()
+            if blocked_until > now:
+                state[endpoint] = blocked_until
+            elif endpoint in state:
+                del state[endpoint]
+            else:
+                return
+            self._save()
+
+    def blocked_until(self, endpoint: str) -> Optional[float]:
+        """Unix time the endpoint's budget resets, or None if requests may be sent."""
+        with self._lock:
+            until = self._state().get(endpoint)
+        if until is None or until <= time.time():
+            return None
+        return until
+
+
+# --------------------------------------------------
+# Shared instance
+# --------------------------------------------------
+_limits: Optional[RateLimits] = None
+
+
+def get_rate_limits() -> RateLimits:
+    global _limits
+
+    if _limits is None:
+        _limits = RateLimits()
+    return _limits
@@ -0,0 +1,165 @@
+# src/utils/tweet_length.py
+# X-compatible weighted tweet length (twitter-text v3 rules) and a
+# deterministic local shortener.
+import re
+import unicodedata
+from typing import Optional
+
+MAX_TWEET_LENGTH = 280
+
+# Every URL counts as a t.co link, whatever its real length
+TRANSFORMED_URL_LENGTH = 23
+
+# Code point ranges that weigh 1; everything else (CJK, most non-Latin
+# scripts) weighs 2. Emoji sequences weigh 2 as a whole.
+_LIGHT_RANGES = (
+    (0x0000, 0x10FF),
+    (0x2000, 0x200D),
+    (0x2010, 0x201F),
+    (0x2032, 0x2037),
+)
+
+_URL = r"https?://[^\s]+|www\.[^\s]+"
+_EMOJI_BASE = r"[\u2600-\u27BF\U0001F000-\U0001FAFF]"
+_EMOJI = (
+    r"[\U0001F1E6-\U0001F1FF]{2}"                                  # flags
+    r"|[0-9#*]\uFE0F?\u20E3"                                        # keycaps
+    rf"|{_EMOJI_BASE}\uFE0F?[\U0001F3FB-\U0001F3FF]?"               # emoji + skin tone
+    rf"(?:\u200D{_EMOJI_BASE}\uFE0F?[\U0001F3FB-\U0001F3FF]?)*"    # ZWJ sequences
+)
+_TOKEN_RE = re.compile(rf"(?P<url>{_URL})|(?P<emoji>{_EMOJI})")
+
+_TRAILING_HASHTAG_RE = re.compile(r"\s*#\w+\s*$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_CLAUSE_RE = re.compile(r"\s*(?:,|;|:|\s—|\s–|\s-)\s")
+
+
+def _char_weight(char: str) -> int:
+    code = ord(char)
+    for start, end in _LIGHT_RANGES:
+        if start <= code <= end:
+            return 1
+    return 2
+
+
+def weighted_length(text: str) -> int:
+    """Length of `text` as X counts it against the 280 limit."""
+    text = unicodedata.normalize("NFC", text)
+    total = 0
+    pos = 0
+    for match in _TOKEN_RE.finditer(text):
+        total += sum(_char_weight(c) for c in text[pos:match.start()])
+        total += TRANSFORMED_URL_LENGTH if match.group("url") else 2
+        pos = match.end()
+    total += sum(_char_weight(c) for c in text[pos:])
+    return total
+
+
+def fits(text: str, limit: int = MAX_TWEET_LENGTH) -> bool:
+    return weighted_length(text) <= limit
+
+
+# --------------------------------------------------
+# Shortening
+# --------------------------------------------------
+def _split_trailing_hashtags(text: str) -> tuple[str, list[str]]:
+    """Separate the block of hashtags at the end of the text from the body."""
+    hashtags: list[str] = []
+    body = text.rstrip()
+    while True:
+        match = _TRAILING_HASHTAG_RE.search(body)
+        if not match or match.start() == 0:
+            break
+        hashtags.insert(0, match.group().strip())
+        body = body[:match.start()].rstrip()
+    return body, hashtags
+
+
+def _with_hashtags(body: str, hashtags: list[str]) -> str:
+    return f"{body} {' '.join(hashtags)}" if hashtags else body
+
+
+def _trim_clause(sentence: str, limit: int) -> Optional[str]:
+    """Longest prefix of `sentence` ending at a clause boundary that fits."""
+    for match in reversed(list(_CLAUSE_RE.finditer(sentence))):
+        candidate = sentence[:match.start()].rstrip(" ,;:—–-") + "."
+        if fits(candidate, limit):
+            return candidate
+    return None
+
+
+def shorten_tweet(text: str, limit: int = MAX_TWEET_LENGTH) -> Optional[str]:
+    """
+    Deterministically shorten a tweet without cutting words or hashtags.
+
+    1. Drop trailing hashtags, last first
+    2. Drop whole sentences from the end (keeping at least one)
+    3. Cut the last sentence back to a clause boundary
+    Hashtags dropped in step 1 are re-added if room frees up.
+
+    Returns None when none of these can make the text fit.
+    """
+    text = text.strip()
+    if fits(text, limit):
+        return text
+
+    body, hashtags = _split_trailing_hashtags(text)
+
+    # 1. Drop hashtags, last first
+    kept = list(hashtags)
+    while kept:
+        kept.pop()
+        candidate = _with_hashtags(body, kept)
+        if fits(candidate, limit):
+            return candidate
+
+    # 2. Drop sentences from the end
+    sentences = _SENTENCE_END_RE.split(body)
+    while len(sentences) > 1 and not fits(" ".join(sentences), limit):
+        sentences.pop()
+    body = " ".join(sentences)
+
+    # 3. Cut the last sentence at a clause boundary
+    if not fits(body, limit):
+        head = " ".join(sentences[:-1])
+        room = limit - (weighted_length(head) + 1 if head else 0)
+        clause = _trim_clause(sentences[-1], room)
+        if clause is None:
+            return None
+        body = f"{head} {clause}" if head else clause
+
+    # Re-add hashtags that fit again
+    for tag in hashtags:
+        candidate = _with_hashtags(body, kept + [tag])
+        if fits(candidate, limit):
+            kept.append(tag)
+    return _with_hashtags(body, kept)
+
+
+def truncate_tweet(text: str, limit: int = MAX_TWEET_LENGTH) -> str:
+    """Last-resort cut at a word boundary, ending with an ellipsis."""
+    text = text.strip()
+    if fits(text, limit):
+        return text
+
+    words = text.split()
+    while words and not fits(" ".join(words) + "…", limit):
+        words.pop()
+    # Never end on a dangling hashtag fragment or a lone punctuation mark
+    while words and (words[-1].startswith("#") or not any(c.isalnum() for c in words[-1])):
+        words.pop()
+    if not words:
+        return _truncate_chars(text, limit)
+    return " ".join(words).rstrip(",;:—–-") + "…"
+
+
+def _truncate_chars(text: str, limit: int) -> str:
+    """
+    Cut text with no usable word boundary (one long token, CJK) by weight,
+    not character count: CJK characters and the ellipsis itself weigh 2.
+    """
+    cut = text
+    while cut and not fits(cut + "…", limit):
+        cut = cut[:-1]
+    # Do not leave a dangling joiner or variation selector from an emoji
+    return cut.rstrip("\u200d\ufe0f") + "…"
@@ -1,5 +1,6 @@
 # src/utils/x_client.py
 import os
+import requests
 import tweepy
 from dotenv import load_dotenv
 from src.utils.log import log_error
@@ -11,6 +12,9 @@ def get_x_client() -> tweepy.Client:
     """
     Build and return an authenticated Tweepy client using OAuth 1.0a.
     This allows posting tweets as the authenticated user.
+
+    Calls return the raw requests.Response so callers can read the
+    x-rate-limit-* headers alongside the JSON body.
     """
     api_key = os.getenv("X_API_KEY")
     api_secret = os.getenv("X_API_SECRET")
@@ -35,4 +39,5 @@ def get_x_client() -> tweepy.Client:
         consumer_secret=api_secret,
         access_token=access_token,
         access_token_secret=access_token_secret,
+        return_type=requests.Response,
     )
@@ -1,41 +1,197 @@
 import json
-from typing import Dict, Any
+import re
+from collections import Counter
+from collections.abc import Mapping
+from typing import Dict, Any, Union
+from src.event import Event
+from src.utils.filename import normalize_date
 from src.utils.log import log_info, log_error
 from src.utils.openai_client import run_openai
+from src.utils.metrics import record
 
 
 # --------------------------------------------
-# 1. STRICT SCHEMA VALIDATION
+# 0. EVENT SCHEMA
 # --------------------------------------------
-def validate_event_schema(event: Dict[str, Any]) -> bool:
-    """Check that event follows the required schema."""
+REQUIRED_FIELDS = {
+    "title": str,
+    "date": str,
+    "summary": str,
+    "sources": list,
+}
 
-    required_fields = {
-        "title": str,
-        "date": str,
-        "summary": str,
-        "sources": list,
-    }
+# The same schema as REQUIRED_FIELDS, in the JSON Schema form accepted by
+# OpenAI structured outputs (response_format={"type": "json_schema", ...})
+EVENT_JSON_SCHEMA = {
+    "name": "history_event",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "date": {"type": "string"},
+            "summary": {"type": "string"},
+            "sources": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": list(REQUIRED_FIELDS),
+        "additionalProperties": False,
+    },
+}
 
-    for field, field_type in required_fields.items():
+
+# --------------------------------------------
+# 1. STRICT SCHEMA VALIDATION
+# --------------------------------------------
+def schema_errors(event: Any) -> list[str]:
+    """Return every schema problem with the event (empty list = valid). Does not log."""
+    if not isinstance(event, Mapping):
+        return [f"Event must be a JSON object, got {type(event)}"]
+
+    errors = []
+    for field, field_type in REQUIRED_FIELDS.items():
         if field not in event:
-            log_error(f"Missing field: {field}")
-            return False
-        
-        if not isinstance(event[field], field_type):
-            log_error(f"Wrong type for field '{field}': expected {field_type}, got {type(event[field])}")
-            return False
+            errors.append(f"Missing field: {field}")
+        elif not isinstance(event[field], field_type):
+            errors.append(
+                f"Wrong type for field '{field}': expected {field_type}, got {type(event[field])}"
+            )
 
     # Additional check: sources must be list of strings
-    if any(not isinstance(src, str) for src in event["sources"]):
-        log_error("All items in 'sources' must be strings.")
+    sources = event.get("sources")
+    if isinstance(sources, list) and any(not isinstance(src, str) for src in sources):
+        errors.append("All items in 'sources' must be strings.")
+
+    return errors
+
+
+def validate_event_schema(event: Dict[str, Any]) -> bool:
+    """Check that event follows the required schema."""
+
+    errors = schema_errors(event)
+    if errors:
+        log_error(errors[0])
         return False
 
     return True
 
 
 # --------------------------------------------
-# 2. LLM AUTO-REPAIR
+# 2. RULE-BASED REPAIR
+# --------------------------------------------
+# Alternative key names the LLM (or a hand-written file) may use
+KEY_ALIASES = {
+    "title": ("name", "event", "event_title", "headline"),
+    "date": ("event_date", "when", "day", "date_iso"),
+    "summary": ("description", "text", "summary_text", "details"),
+    "sources": ("source", "urls", "url", "links", "references"),
+}
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# How often each rule has fired in this process
+REPAIR_RULE_COUNTS: Counter = Counter()
+
+
+def _parse_raw_output(raw: str) -> Any:
+    """Strip markdown code fences and parse the first JSON object found."""
+    text = _FENCE_RE.sub("", raw.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+def _coerce_date(value: Any) -> Any:
+    """Numbers become ISO dates (1969 -> 1969-01-01, 19690720 -> 1969-07-20)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        digits = str(int(value))
+        if len(digits) == 8:
+            return f"{digits[:4]}-{digits[4:6]}-{digits[6:]}"
+        return f"{int(value):04d}-01-01"
+    return value
+
+
+def local_fix_event(event: Dict[str, Any]) -> tuple[Dict[str, Any], list[str]]:
+    """
+    Apply deterministic repairs to an event dict.
+    Returns (repaired_event, names_of_rules_that_fired). Never calls the LLM.
+    Input that is not a JSON object (e.g. a list) is returned untouched.
+    """
+    if not isinstance(event, Mapping):
+        return event, []
+
+    fired: list[str] = []
+    fixed = dict(event)
+
+    # raw_output wrapper (possibly fenced) from a non-JSON extraction
+    raw = fixed.get("raw_output")
+    if isinstance(raw, str):
+        if "```" in raw:
+            fired.append("strip_code_fence")
+        parsed = _parse_raw_output(raw)
+        if isinstance(parsed, dict):
+            fixed.pop("raw_output")
+            fixed = {**fixed, **parsed}
+            fired.append("unwrap_raw_output")
+
+    # Key aliasing
+    for field, aliases in KEY_ALIASES.items():
+        if field in fixed:
+            continue
+        for alias in aliases:
+            if alias in fixed:
+                fixed[field] = fixed.pop(alias)
+                fired.append(f"alias_{alias}_to_{field}")
+                break
+
+    # Type coercion
+    for field in ("title", "summary"):
+        if isinstance(fixed.get(field), (int, float)) and not isinstance(fixed.get(field), bool):
+            fixed[field] = str(fixed[field])
+            fired.append(f"coerce_{field}")
+
+    if "sources" not in fixed or fixed["sources"] is None:
+        fixed["sources"] = []
+        fired.append("default_sources")
+    elif isinstance(fixed["sources"], str):
+        fixed["sources"] = [fixed["sources"]] if fixed["sources"].strip() else []
+        fired.append("wrap_sources")
+    elif isinstance(fixed["sources"], (list, tuple)) and (
+        isinstance(fixed["sources"], tuple)
+        or any(not isinstance(src, str) for src in fixed["sources"])
+    ):
+        fixed["sources"] = [str(src) for src in fixed["sources"] if src is not None]
+        fired.append("coerce_sources")
+
+    # Date normalization
+    if "date" in fixed:
+        coerced = _coerce_date(fixed["date"])
+        if coerced is not fixed["date"]:
+            fixed["date"] = coerced
+            fired.append("coerce_date")
+        if isinstance(fixed["date"], str) and not _ISO_DATE_RE.match(fixed["date"]):
+            normalized = normalize_date(fixed["date"])
+            if _ISO_DATE_RE.match(normalized):
+                fixed["date"] = normalized
+                fired.append("normalize_date")
+
+    REPAIR_RULE_COUNTS.update(fired)
+    return fixed, fired
+
+
+def repair_stats() -> dict:
+    """Counts of rule-based repairs by rule name."""
+    return dict(REPAIR_RULE_COUNTS)
+
+
+# --------------------------------------------
+# 3. LLM AUTO-REPAIR
 # --------------------------------------------
 async def llm_fix_event(event: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -59,7 +215,7 @@ Here is the event to fix:
 Return ONLY corrected JSON. No backticks. No explanations.
 """
 
-    response = await run_openai(prompt)
+    response = await run_openai(prompt, response_schema=EVENT_JSON_SCHEMA)
 
     try:
         cleaned = json.loads(response)
@@ -71,23 +227,37 @@ Return ONLY corrected JSON. No backticks. No explanations.
 
 
 # --------------------------------------------
-# 3. VALIDATE OR AUTO-FIX PIPELINE
+# 4. VALIDATE OR AUTO-FIX PIPELINE
 # --------------------------------------------
-async def validate_or_fix_event(event: Dict[str, Any]) -> Dict[str, Any]:
+async def validate_or_fix_event(event: Union[Event, Dict[str, Any]]) -> Union[Event, Dict[str, Any]]:
     """
-    Validate the event. If invalid, try automatic LLM repair.
+    Validate the event. If invalid, try rule-based repair first and fall
+    back to automatic LLM repair only if the rules are not enough.
+
+    Returns an immutable Event once the event is valid. An Event passed in
+    is returned as-is — it was validated when it was built. If repair
+    fails, the original dict is returned unchanged.
     """
 
+    if isinstance(event, Event):
+        return event
+
     if validate_event_schema(event):
         log_info("Event passed schema validation.")
-        return event
+        return Event.from_dict(event)
+
+    fixed, fired = local_fix_event(event)
+    if fired and validate_event_schema(fixed):
+        log_info(f"Rule-based repair fixed the event ({', '.join(fired)}).")
+        return Event.from_dict(fixed)
 
     log_info("Event failed validation — attempting LLM repair...")
-    repaired = await llm_fix_event(event)
+    record("retries")
+    repaired = await llm_fix_event(fixed if fired else event)
 
     if validate_event_schema(repaired):
         log_info("Repaired event passed validation.")
-        return repaired
+        return Event.from_dict(repaired)
 
     log_error("Repaired event still invalid — returning original event.")
     return event
@@ -4,3 +4,26 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_caches(tmp_path, monkeypatch):
+    """Point the on-disk caches and stores at per-test databases under tmp_path."""
+    from src import catalog, checkpoint, dedupe, drafts, onthisday_store, outbox
+    from src.utils import llm_cache, http_cache, metrics, rate_limit
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(http_cache, "_cache", http_cache.HttpCache(tmp_path / "http_cache.sqlite3"))
+    monkeypatch.setattr(
+        onthisday_store, "_store", onthisday_store.OnThisDayStore(tmp_path / "onthisday.sqlite3")
+    )
+    monkeypatch.setattr(drafts, "_store", drafts.DraftStore(tmp_path / "drafts.sqlite3"))
+    monkeypatch.setattr(rate_limit, "_limits", rate_limit.RateLimits(tmp_path / "rate_limits.json"))
+    monkeypatch.setattr(outbox, "_outbox", outbox.Outbox(
+        tmp_path / "outbox.sqlite3", tmp_path / "posted_log.json", tmp_path / "pending_post.json",
+    ))
+    monkeypatch.setattr(catalog, "_catalog", catalog.EventCatalog(path=tmp_path / "catalog.sqlite3"))
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DIR", tmp_path / "checkpoints")
+    monkeypatch.setattr(dedupe, "_index", dedupe.DuplicateIndex(tmp_path / "fingerprints.sqlite3"))
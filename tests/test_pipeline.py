@@ -106,6 +106,10 @@ class TestNormalizeDate:
         from src.utils.filename import normalize_date
         assert normalize_date("08/28/1963") == "1963-08-28"
 
+    def test_ancient_year_is_zero_padded(self):
+        from src.utils.filename import normalize_date
+        assert normalize_date("0044-03-15") == "0044-03-15"
+
     def test_unparseable_date_returns_original(self):
         from src.utils.filename import normalize_date
         assert normalize_date("unknown-date") == "unknown-date"
@@ -178,7 +182,7 @@ class TestFetchWikipediaPage:
         mock.text = html
         return mock
 
-    def test_successful_fetch_returns_expected_keys(self):
+    async def test_successful_fetch_returns_expected_keys(self):
         from src.fetch_source import fetch_wikipedia_page
         api_data = {
             "query": {
@@ -190,35 +194,56 @@ class TestFetchWikipediaPage:
                 }
             }
         }
-        with patch("src.fetch_source.requests.get") as mock_get:
-            mock_get.side_effect = [
-                self._make_api_mock(api_data),
-                self._make_html_mock(),
-            ]
-            result = fetch_wikipedia_page("Apollo 11")
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock,
+                   return_value=self._make_api_mock(api_data)) as mock_api, \
+             patch("src.fetch_source.http_get", new_callable=AsyncMock) as mock_html:
+            result = await fetch_wikipedia_page("Apollo 11")
 
         assert result["title"] == "Apollo 11"
         assert "summary" in result
         assert "url" in result
-        assert "html" in result
+        assert "page_text" not in result
         assert "error" not in result
+        assert mock_api.await_count == 1
+        assert mock_html.await_count == 0
+
+    async def test_include_html_fetches_page_text(self):
+        from src.fetch_source import fetch_wikipedia_page
+        api_data = {
+            "query": {"pages": {"12345": {"title": "Apollo 11", "extract": "Lunar landing."}}}
+        }
+        html = (
+            "<html><head><style>p {}</style></head><body>"
+            "<div id='mw-content-text'><p>Apollo 11 landed.</p><script>x()</script></div>"
+            "</body></html>"
+        )
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock,
+                   return_value=self._make_api_mock(api_data)), \
+             patch("src.fetch_source.http_get", new_callable=AsyncMock,
+                   return_value=self._make_html_mock(html)) as mock_html:
+            result = await fetch_wikipedia_page("Apollo 11", include_html=True)
 
-    def test_missing_page_returns_error(self):
+        assert result["page_text"] == "Apollo 11 landed."
+        assert mock_html.await_count == 1
+
+    async def test_missing_page_returns_error(self):
         from src.fetch_source import fetch_wikipedia_page
         api_data = {
             "query": {
                 "pages": {"-1": {"missing": "", "title": "Nonexistent Page"}}
             }
         }
-        with patch("src.fetch_source.requests.get", return_value=self._make_api_mock(api_data)):
-            result = fetch_wikipedia_page("Nonexistent Page")
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock,
+                   return_value=self._make_api_mock(api_data)):
+            result = await fetch_wikipedia_page("Nonexistent Page")
 
         assert "error" in result
 
-    def test_network_failure_returns_error(self):
+    async def test_network_failure_returns_error(self):
         from src.fetch_source import fetch_wikipedia_page
-        with patch("src.fetch_source.requests.get", side_effect=Exception("Timeout")):
-            result = fetch_wikipedia_page("Apollo 11")
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock,
+                   side_effect=Exception("Timeout")):
+            result = await fetch_wikipedia_page("Apollo 11")
 
         assert "error" in result
         assert "Timeout" in result["error"]
@@ -305,3 +330,1562 @@ class TestRewriteForX:
             result = await rewrite_for_x(event)
 
         assert "ERROR" in result
+
+
+# =============================================================================
+# OpenAI Client (async, mocked client)
+# =============================================================================
+class TestRunOpenai:
+    def _fake_client(self, delay=0.0, tracker=None):
+        import asyncio
+
+        async def create(**kwargs):
+            if tracker is not None:
+                tracker["active"] += 1
+                tracker["peak"] = max(tracker["peak"], tracker["active"])
+            await asyncio.sleep(delay)
+            if tracker is not None:
+                tracker["active"] -= 1
+            message = MagicMock(content="ok")
+            return MagicMock(choices=[MagicMock(message=message)])
+
+        client = MagicMock()
+        client.chat.completions.create = create
+        return client
+
+    async def test_calls_overlap_up_to_concurrency_limit(self, monkeypatch):
+        import asyncio
+        from src.utils import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        tracker = {"active": 0, "peak": 0}
+        openai_client.get_openai_client()
+        with patch.object(openai_client, "_client", self._fake_client(0.01, tracker)), \
+             patch.object(openai_client, "_semaphore", asyncio.Semaphore(3)):
+            results = await asyncio.gather(
+                *(openai_client.run_openai(f"prompt {i}") for i in range(8))
+            )
+
+        assert results == ["ok"] * 8
+        assert tracker["peak"] == 3
+
+    async def test_call_times_out(self, monkeypatch):
+        import asyncio
+        from src.utils import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        openai_client.get_openai_client()
+        with patch.object(openai_client, "_client", self._fake_client(1.0)):
+            with pytest.raises(asyncio.TimeoutError):
+                await openai_client.run_openai("slow prompt", timeout=0.01)
+
+    async def test_waiting_for_a_slot_does_not_count_against_timeout(self, monkeypatch):
+        import asyncio
+        from src.utils import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        openai_client.get_openai_client()
+        # 6 calls of 0.03s through 2 slots take ~0.09s; each call alone fits 0.06s
+        with patch.object(openai_client, "_client", self._fake_client(0.03)), \
+             patch.object(openai_client, "_semaphore", asyncio.Semaphore(2)):
+            results = await asyncio.gather(
+                *(openai_client.run_openai(f"prompt {i}", timeout=0.06, use_cache=False) for i in range(6))
+            )
+        assert results == ["ok"] * 6
+
+    def test_client_from_previous_loop_is_closed(self, monkeypatch):
+        import asyncio
+        from src.utils import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+        async def build():
+            return openai_client.get_openai_client()
+
+        async def rebuild():
+            client = openai_client.get_openai_client()
+            await asyncio.gather(*openai_client._closing)
+            return client
+
+        first = asyncio.run(build())
+        with patch.object(first, "close", new_callable=AsyncMock) as close:
+            second = asyncio.run(rebuild())
+        assert second is not first
+        close.assert_awaited_once()
+        asyncio.run(openai_client.close_openai_client())
+
+
+# =============================================================================
+# LLM Response Cache
+# =============================================================================
+class TestLLMCache:
+    def test_miss_then_hit(self, tmp_path):
+        from src.utils.llm_cache import LLMCache, make_cache_key
+        cache = LLMCache(tmp_path / "cache.sqlite3")
+        key = make_cache_key("gpt-test", "system", "prompt")
+
+        assert cache.get(key) is None
+        cache.set(key, "gpt-test", "answer")
+        assert cache.get(key) == "answer"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_depends_on_model_and_prompt(self):
+        from src.utils.llm_cache import make_cache_key
+        base = make_cache_key("gpt-a", "system", "prompt")
+        assert base != make_cache_key("gpt-b", "system", "prompt")
+        assert base != make_cache_key("gpt-a", "system", "other prompt")
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        from src.utils.llm_cache import LLMCache
+        cache = LLMCache(tmp_path / "cache.sqlite3", ttl_seconds=-1)
+        cache.set("k", "gpt-test", "answer")
+        assert cache.get("k") is None
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        from src.utils.llm_cache import LLMCache
+        cache = LLMCache(tmp_path / "cache.sqlite3", max_entries=2)
+        cache.set("a", "gpt-test", "A")
+        cache.set("b", "gpt-test", "B")
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", "gpt-test", "C")
+
+        assert cache.get("a") == "A"
+        assert cache.get("b") is None
+        assert cache.get("c") == "C"
+        assert cache.stats()["evictions"] == 1
+
+    def test_counters_persist_across_instances(self, tmp_path):
+        from src.utils.llm_cache import LLMCache
+        path = tmp_path / "cache.sqlite3"
+        cache = LLMCache(path)
+        cache.get("missing")
+        cache.set("k", "gpt-test", "answer")
+        cache.get("k")
+
+        stats = LLMCache(path).stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    async def test_run_openai_serves_repeat_prompt_from_cache(self, monkeypatch):
+        from src.utils import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content="cached answer"))]
+        ))
+        openai_client.get_openai_client()
+        with patch.object(openai_client._client.chat.completions, "create", create):
+            first = await openai_client.run_openai("same prompt")
+            second = await openai_client.run_openai("same prompt")
+            bypass = await openai_client.run_openai("same prompt", use_cache=False)
+
+        assert first == second == bypass == "cached answer"
+        assert create.await_count == 2
+
+
+# =============================================================================
+# Shared HTTP Client
+# =============================================================================
+class TestHttpClient:
+    async def test_requests_share_one_pool_and_user_agent(self):
+        import httpx
+        from src.utils import http_client
+
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers["User-Agent"])
+            return httpx.Response(200, json={"ok": True})
+
+        http_client.get_http_client()
+        pooled = httpx.AsyncClient(
+            headers=http_client.HEADERS, transport=httpx.MockTransport(handler)
+        )
+        with patch.object(http_client, "_client", pooled):
+            first = await http_client.http_get("https://en.wikipedia.org/w/api.php")
+            second = await http_client.http_get("https://en.wikipedia.org/w/api.php")
+
+        assert first.json() == second.json() == {"ok": True}
+        assert seen == [http_client.HEADERS["User-Agent"]] * 2
+        await pooled.aclose()
+
+    async def test_per_host_limit_is_shared_per_host(self):
+        from src.utils import http_client
+        http_client.get_http_client()
+        a = http_client._host_limit("https://en.wikipedia.org/a")
+        b = http_client._host_limit("https://en.wikipedia.org/b")
+        c = http_client._host_limit("https://api.telegram.org/x")
+        assert a is b
+        assert a is not c
+
+
+# =============================================================================
+# Conditional HTTP Cache
+# =============================================================================
+class TestHttpCache:
+    def _response(self, status=200, body='{"events": []}', headers=None):
+        import httpx
+        return httpx.Response(
+            status, text=body, headers=headers or {},
+            request=httpx.Request("GET", "https://example.org/feed"),
+        )
+
+    async def test_fresh_entry_is_served_without_request(self):
+        from src.utils import http_cache
+        with patch("src.utils.http_cache.http_get", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = self._response(headers={"ETag": '"v1"'})
+            first = await http_cache.cached_get("https://example.org/feed")
+            second = await http_cache.cached_get("https://example.org/feed")
+
+        assert first.json() == second.json() == {"events": []}
+        assert second.from_cache
+        assert mock_get.await_count == 1
+        assert http_cache.http_cache_stats()["fresh"] == 1
+
+    async def test_expired_entry_revalidates_with_etag(self):
+        from src.utils import http_cache
+        with patch("src.utils.http_cache.http_get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [
+                self._response(headers={"ETag": '"v1"'}),
+                self._response(status=304, body=""),
+            ]
+            await http_cache.cached_get("https://example.org/feed", max_age=0)
+            second = await http_cache.cached_get("https://example.org/feed", max_age=0)
+
+        assert second.json() == {"events": []}
+        assert mock_get.await_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert http_cache.http_cache_stats()["revalidated"] == 1
+
+    async def test_network_failure_serves_stale_copy(self):
+        from src.utils import http_cache
+        with patch("src.utils.http_cache.http_get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [self._response(), Exception("offline")]
+            await http_cache.cached_get("https://example.org/feed", max_age=0)
+            second = await http_cache.cached_get("https://example.org/feed", max_age=0)
+
+        assert second.from_cache
+        assert http_cache.http_cache_stats()["stale"] == 1
+
+
+# =============================================================================
+# Batch Wikipedia Fetcher (mocked)
+# =============================================================================
+class TestFetchWikipediaPages:
+    def _api_mock(self, data):
+        mock = MagicMock()
+        mock.raise_for_status = MagicMock()
+        mock.json = MagicMock(return_value=data)
+        return mock
+
+    async def test_maps_redirects_and_follows_continue(self):
+        from src.fetch_source import fetch_wikipedia_pages
+        first = {
+            "continue": {"excontinue": 1, "continue": "||"},
+            "query": {
+                "normalized": [{"from": "moon landing", "to": "Moon landing"}],
+                "redirects": [{"from": "Moon landing", "to": "Apollo 11"}],
+                "pages": {
+                    "1": {"title": "Apollo 11", "extract": "Apollo 11 landed."},
+                    "2": {"title": "Berlin Wall"},
+                },
+            },
+        }
+        second = {
+            "query": {
+                "pages": {
+                    "1": {"title": "Apollo 11"},
+                    "2": {"title": "Berlin Wall", "extract": "The wall fell."},
+                },
+            },
+        }
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [self._api_mock(first), self._api_mock(second)]
+            result = await fetch_wikipedia_pages(["moon landing", "Berlin Wall"])
+
+        assert result["moon landing"]["summary"] == "Apollo 11 landed."
+        assert result["moon landing"]["url"] == "https://en.wikipedia.org/wiki/Apollo_11"
+        assert result["Berlin Wall"]["summary"] == "The wall fell."
+        assert mock_get.await_args.kwargs["params"]["excontinue"] == 1
+
+    async def test_titles_are_chunked_per_request(self):
+        from src.fetch_source import fetch_wikipedia_pages, MAX_TITLES_PER_REQUEST
+        titles = [f"Event {i}" for i in range(MAX_TITLES_PER_REQUEST + 1)]
+        with patch("src.fetch_source.cached_get", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = self._api_mock({"query": {"pages": {}}})
+            result = await fetch_wikipedia_pages(titles)
+
+        assert mock_get.await_count == 2
+        assert set(result) == set(titles)
+        assert all("error" in page for page in result.values())
+
+    async def test_pipeline_batches_intros_and_fetches_full_text_only_when_needed(self):
+        from src import run_pipeline
+        intros = {
+            "Apollo 11": {"title": "Apollo 11", "url": "u1", "summary": "Apollo 11 landed on July 20, 1969."},
+            "Berlin Wall": {"title": "Berlin Wall", "url": "u2", "summary": "The wall divided Berlin."},
+            "Nowhere": {"error": "Page not found"},
+        }
+        full = {"title": "Berlin Wall", "url": "u2", "summary": "The wall fell on 9 November 1989."}
+        with patch("src.run_pipeline.fetch_wikipedia_pages", new_callable=AsyncMock,
+                   return_value=intros) as mock_batch, \
+             patch("src.run_pipeline.fetch_wikipedia_page", new_callable=AsyncMock,
+                   return_value=full) as mock_page:
+            sources = await run_pipeline._fetch_sources(list(intros))
+
+        assert mock_batch.await_args.kwargs == {"intro_only": True}
+        mock_page.assert_awaited_once_with("Berlin Wall")
+        assert sources["Berlin Wall"] == full
+        assert sources["Apollo 11"] == intros["Apollo 11"]
+        assert "error" in sources["Nowhere"]
+
+
+# =============================================================================
+# Source Condensing
+# =============================================================================
+class TestCondenseSource:
+    def test_short_text_is_unchanged(self):
+        from src.condense_source import condense_source
+        result = condense_source("Apollo 11 landed on the Moon.", budget=100)
+        assert result["text"] == "Apollo 11 landed on the Moon."
+        assert result["dropped_tokens"] == 0
+
+    def test_keeps_lead_and_dated_sentences_within_budget(self):
+        from src.condense_source import condense_source, estimate_tokens
+        filler = "The crew trained for many months in simulators. " * 40
+        text = (
+            "Apollo 11 was the first crewed Moon landing.\n\n"
+            f"== Background ==\n{filler}"
+            "The launch took place on July 16, 1969 from Florida.\n\n"
+            "== References ==\nNASA, published on July 1, 2019.\n"
+        )
+        result = condense_source(text, budget=60)
+
+        assert result["text"].startswith("Apollo 11 was the first crewed Moon landing.")
+        assert "July 16, 1969" in result["text"]
+        assert "simulators" not in result["text"]
+        assert "July 1, 2019" not in result["text"]
+        assert estimate_tokens(result["text"]) <= 60
+        assert result["dropped_tokens"] > 0
+
+
+# =============================================================================
+# On This Day Store (mocked network)
+# =============================================================================
+class TestOnThisDayStore:
+    FEED = {
+        "events": [{
+            "text": "Apollo 11 lands on the Moon.",
+            "year": 1969,
+            "pages": [{"title": "Apollo 11", "extract": "Apollo 11 landed.", "thumbnail": {}}],
+        }]
+    }
+
+    def _response(self):
+        mock = MagicMock(status_code=200, headers={})
+        mock.raise_for_status = MagicMock()
+        mock.json = MagicMock(return_value=self.FEED)
+        return mock
+
+    def test_all_month_days_includes_leap_day(self):
+        from src.onthisday_store import all_month_days
+        days = all_month_days()
+        assert len(days) == 366
+        assert (2, 29) in days
+
+    async def test_prefetch_fills_every_day(self):
+        from src import onthisday_store
+        with patch("src.onthisday_store.http_get", new_callable=AsyncMock,
+                   return_value=self._response()) as mock_get:
+            counts = await onthisday_store.prefetch()
+
+        assert counts == {"fetched": 366, "failed": 0}
+        assert mock_get.await_count == 366
+        assert onthisday_store.get_store().stats()["days_missing"] == 0
+        assert onthisday_store.get_store().stale_days(3600) == []
+
+    async def test_get_events_reads_store_without_network(self):
+        from src import onthisday_store
+        onthisday_store.get_store().save(7, 20, self.FEED["events"])
+        with patch("src.onthisday_store.http_get", new_callable=AsyncMock) as mock_get:
+            events = await onthisday_store.get_events(7, 20)
+
+        assert events[0]["pages"][0]["title"] == "Apollo 11"
+        assert "thumbnail" not in events[0]["pages"][0]
+        mock_get.assert_not_awaited()
+
+    async def test_get_events_falls_back_to_stale_copy(self, monkeypatch):
+        from src import onthisday_store
+        onthisday_store.get_store().save(7, 20, self.FEED["events"])
+        monkeypatch.setattr(onthisday_store, "ONTHISDAY_REFRESH_DAYS", -1)
+        with patch("src.onthisday_store.http_get", new_callable=AsyncMock,
+                   side_effect=Exception("offline")):
+            events = await onthisday_store.get_events(7, 20)
+
+        assert events[0]["year"] == 1969
+
+    async def test_feed_refresh_is_conditional(self):
+        import httpx
+        from src import onthisday_store
+
+        def response(status, headers=None):
+            return httpx.Response(
+                status, text='{"events": []}' if status == 200 else "", headers=headers or {},
+                request=httpx.Request("GET", "https://example.org/feed"),
+            )
+
+        with patch("src.onthisday_store.http_get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [response(200, {"ETag": '"v1"'}), response(304)]
+            await onthisday_store.fetch_feed(7, 20)
+            assert await onthisday_store.fetch_feed(7, 20) == []
+
+        assert mock_get.await_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert onthisday_store.get_store().etag(7, 20) == '"v1"'
+
+    async def test_failed_refresh_counts_as_failed_and_keeps_age(self):
+        from src import onthisday_store
+        store = onthisday_store.get_store()
+        store.save(7, 20, self.FEED["events"], etag='"v1"')
+        fetched_at = store.load(7, 20)[1]
+
+        with patch("src.onthisday_store.http_get", new_callable=AsyncMock,
+                   side_effect=Exception("offline")):
+            counts = await onthisday_store.prefetch([(7, 20)])
+
+        assert counts == {"fetched": 0, "failed": 1}
+        assert store.load(7, 20)[1] == fetched_at
+
+
+# =============================================================================
+# On This Day Candidate Ranking
+# =============================================================================
+class TestRankEvents:
+    EVENTS = [
+        {"text": "Minor event.", "year": 1901, "pages": [{"title": "Minor", "extract": "m"}]},
+        {"text": "Moon landing.", "year": 1969,
+         "pages": [{"title": "Apollo 11", "extract": "a"}, {"title": "Moon"}, {"title": "NASA"}]},
+        {"text": "Wall falls.", "year": 1989,
+         "pages": [{"title": "Berlin Wall", "extract": "b"}, {"title": "Berlin"}]},
+    ]
+
+    def test_candidates_are_ranked_by_score(self):
+        from src.fetch_onthisday import rank_events
+        titles = [c["title"] for c in rank_events(self.EVENTS)]
+        assert titles == ["Apollo 11", "Berlin Wall", "Minor"]
+
+    def test_custom_scorer_is_pluggable(self):
+        from src.fetch_onthisday import rank_events
+        by_year = lambda event: event["year"]
+        titles = [c["title"] for c in rank_events(self.EVENTS, scorer=by_year)]
+        assert titles == ["Berlin Wall", "Apollo 11", "Minor"]
+
+    async def test_autopost_skips_posted_candidate_without_refetch(self):
+        from src import autopost
+        from src.fetch_onthisday import rank_events
+        candidates = {"candidates": rank_events(self.EVENTS)}
+        extracted = {
+            "title": "Fall of the Berlin Wall", "date": "1989-11-09",
+            "summary": "The wall fell.", "sources": [],
+        }
+        from src.outbox import get_outbox
+        get_outbox().import_posted(["Apollo 11"])
+        with patch.object(autopost, "DRY_RUN", True), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock,
+                   return_value=candidates) as mock_fetch, \
+             patch("src.autopost.extract_event", new_callable=AsyncMock,
+                   return_value=extracted) as mock_extract, \
+             patch("src.autopost.rewrite_for_x", new_callable=AsyncMock,
+                   return_value="Nov 9, 1989: The Berlin Wall falls. #History"):
+            await autopost.run_autopost()
+
+        assert mock_fetch.await_count == 1
+        assert mock_extract.await_args.args[0]["title"] == "Berlin Wall"
+
+
+# =============================================================================
+# Structured Output Extraction (mocked LLM)
+# =============================================================================
+class TestStructuredExtraction:
+    async def test_run_openai_sends_json_schema_response_format(self, monkeypatch):
+        from src.utils import openai_client
+        from src.validate_event import EVENT_JSON_SCHEMA
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content="{}"))]
+        ))
+        openai_client.get_openai_client()
+        with patch.object(openai_client._client.chat.completions, "create", create):
+            await openai_client.run_openai("extract", response_schema=EVENT_JSON_SCHEMA)
+
+        assert create.await_args.kwargs["response_format"] == {
+            "type": "json_schema", "json_schema": EVENT_JSON_SCHEMA,
+        }
+
+    async def test_schema_valid_extraction_skips_repair_call(self):
+        from src.extract_event import extract_event
+        source = {"title": "Apollo 11", "url": "u", "summary": "Apollo 11 landed."}
+        event = {
+            "title": "Moon Landing", "date": "1969-07-20",
+            "summary": "Apollo 11 landed on the Moon.", "sources": ["u"],
+        }
+        with patch("src.extract_event.run_openai", new_callable=AsyncMock,
+                   return_value=json.dumps(event)) as mock_llm, \
+             patch("src.validate_event.run_openai", new_callable=AsyncMock) as mock_fix:
+            result = await extract_event("Apollo 11", source=source)
+
+        assert result["date"] == "1969-07-20"
+        assert "response_schema" in mock_llm.await_args.kwargs
+        mock_fix.assert_not_awaited()
+
+
+# =============================================================================
+# Rule-Based Event Repair
+# =============================================================================
+class TestLocalFixEvent:
+    def test_aliases_and_wraps_single_source(self):
+        from src.validate_event import local_fix_event, validate_event_schema
+        event = {
+            "title": "Moon Landing", "date": "1969-07-20",
+            "description": "Apollo 11 landed on the Moon.",
+            "source": "https://en.wikipedia.org/wiki/Apollo_11",
+        }
+        fixed, fired = local_fix_event(event)
+
+        assert validate_event_schema(fixed)
+        assert fixed["summary"] == "Apollo 11 landed on the Moon."
+        assert fixed["sources"] == ["https://en.wikipedia.org/wiki/Apollo_11"]
+        assert "alias_description_to_summary" in fired
+        assert "alias_source_to_sources" in fired
+        assert "wrap_sources" in fired
+
+    def test_numeric_and_textual_dates_are_normalized(self):
+        from src.validate_event import local_fix_event
+        numeric, _ = local_fix_event({"date": 1969})
+        textual, fired = local_fix_event({"date": "July 20, 1969"})
+        assert numeric["date"] == "1969-01-01"
+        assert textual["date"] == "1969-07-20"
+        assert "normalize_date" in fired
+
+    def test_unwraps_fenced_raw_output(self):
+        from src.validate_event import local_fix_event, validate_event_schema
+        raw = '```json\n{"title": "Moon Landing", "date": "1969-07-20", "summary": "Landed."}\n```'
+        fixed, fired = local_fix_event({"title": "Apollo 11", "raw_output": raw})
+
+        assert validate_event_schema(fixed)
+        assert fixed["title"] == "Moon Landing"
+        assert "raw_output" not in fixed
+        assert {"strip_code_fence", "unwrap_raw_output", "default_sources"} <= set(fired)
+
+    async def test_non_object_input_is_left_alone(self):
+        from src.validate_event import local_fix_event, validate_or_fix_event
+        assert local_fix_event(["not", "an", "event"]) == (["not", "an", "event"], [])
+
+        with patch("src.validate_event.llm_fix_event", new_callable=AsyncMock, return_value=None):
+            assert await validate_or_fix_event(["not", "an", "event"]) == ["not", "an", "event"]
+
+    async def test_rule_repair_skips_llm(self):
+        from src.validate_event import validate_or_fix_event, repair_stats
+        event = {
+            "title": "Moon Landing", "date": "July 20, 1969",
+            "summary": "Apollo 11 landed on the Moon.", "sources": "https://nasa.gov",
+        }
+        with patch("src.validate_event.run_openai", new_callable=AsyncMock) as mock_llm:
+            result = await validate_or_fix_event(event)
+
+        mock_llm.assert_not_awaited()
+        assert result["sources"] == ["https://nasa.gov"]
+        assert repair_stats()["wrap_sources"] >= 1
+
+
+# =============================================================================
+# Event Model
+# =============================================================================
+class TestEvent:
+    DATA = {
+        "title": "Moon Landing",
+        "date": "1969-07-20",
+        "summary": "Apollo 11 landed on the Moon.",
+        "sources": ["https://en.wikipedia.org/wiki/Apollo_11"],
+    }
+
+    def test_is_immutable_and_reads_like_a_dict(self):
+        import dataclasses
+        from src.event import Event
+        event = Event.from_dict(self.DATA)
+
+        assert event == self.DATA
+        assert event["sources"] == self.DATA["sources"]
+        assert event.get("missing") is None
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            event.title = "Changed"
+
+    def test_rejects_invalid_shape(self):
+        from src.event import Event
+        with pytest.raises(TypeError):
+            Event(title="Moon Landing", date=1969, summary="s", sources=())
+
+    def test_round_trips_through_event_file(self, tmp_path):
+        from src.event import Event
+        path = tmp_path / "1969-07-20-moon-landing.json"
+        Event.from_dict(self.DATA).save(path)
+
+        assert json.loads(path.read_text(encoding="utf-8")) == self.DATA
+        assert Event.load(path) == Event.from_dict(self.DATA)
+
+    async def test_validated_event_is_not_revalidated(self):
+        from src.event import Event
+        from src.validate_event import validate_or_fix_event
+        event = await validate_or_fix_event(dict(self.DATA))
+        assert isinstance(event, Event)
+
+        with patch("src.validate_event.validate_event_schema") as mock_schema:
+            again = await validate_or_fix_event(event)
+
+        assert again is event
+        mock_schema.assert_not_called()
+
+
+# =============================================================================
+# Corpus Validation
+# =============================================================================
+class TestValidateCorpus:
+    def _write(self, directory, name, data):
+        (directory / name).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    def _library(self, tmp_path):
+        good = {"title": "Moon Landing", "date": "1969-07-20", "summary": "s", "sources": []}
+        self._write(tmp_path, "1969-07-20-moon-landing.json", good)
+        self._write(tmp_path, "1969-07-21-moon-landing.json", {**good, "date": "July 21, 1969"})
+        self._write(tmp_path, "1963-08-28-march.json", {"title": "March", "date": "1963-08-28"})
+        self._write(tmp_path, "posted_log.json", ["1969-07-20-moon-landing.json"])
+        return tmp_path
+
+    def test_reports_invalid_mismatched_and_duplicate_files(self, tmp_path):
+        from scripts.validate_corpus import validate_corpus
+        report = validate_corpus(self._library(tmp_path), workers=2)
+
+        assert report["checked"] == 3
+        assert list(report["invalid"]) == ["1963-08-28-march.json"]
+        assert report["date_not_iso"]["1969-07-21-moon-landing.json"]["normalized"] == "1969-07-21"
+        assert report["duplicate_slugs"] == {
+            "moon-landing": ["1969-07-20-moon-landing.json", "1969-07-21-moon-landing.json"]
+        }
+
+    def test_fix_rewrites_dates_in_place(self, tmp_path):
+        from scripts.validate_corpus import validate_corpus
+        library = self._library(tmp_path)
+        report = validate_corpus(library, fix=True, workers=1)
+
+        fixed = json.loads((library / "1969-07-21-moon-landing.json").read_text(encoding="utf-8"))
+        assert report["fixed"] == ["1969-07-21-moon-landing.json"]
+        assert fixed["date"] == "1969-07-21"
+        assert not list(library.glob("*.tmp"))
+
+    def test_fix_keeps_file_mode(self, tmp_path):
+        import os
+        import stat
+        from scripts.validate_corpus import validate_corpus
+        library = self._library(tmp_path)
+        path = library / "1969-07-21-moon-landing.json"
+        os.chmod(path, 0o644)
+        validate_corpus(library, fix=True, workers=1)
+
+        assert stat.S_IMODE(path.stat().st_mode) == 0o644
+
+
+# =============================================================================
+# Weighted Tweet Length & Local Shortening
+# =============================================================================
+class TestTweetLength:
+    def test_urls_count_as_23(self):
+        from src.utils.tweet_length import weighted_length
+        url = "https://en.wikipedia.org/wiki/Apollo_11_and_a_much_longer_path"
+        assert weighted_length(f"See {url}") == 4 + 23
+
+    def test_emoji_and_cjk_count_double(self):
+        from src.utils.tweet_length import weighted_length
+        assert weighted_length("🏛️") == 2
+        assert weighted_length("👨‍👩‍👧") == 2
+        assert weighted_length("月面着陸") == 8
+        assert weighted_length("1969 — Moon") == 11
+
+    def test_shortener_drops_hashtags_first(self):
+        from src.utils.tweet_length import shorten_tweet
+        body = "Apollo 11 landed on the Moon. " * 9
+        tweet = f"{body.strip()} #Apollo11 #MoonLanding"
+        assert shorten_tweet(tweet, limit=len(body.strip()) + 10) == f"{body.strip()} #Apollo11"
+
+    def test_shortener_trims_sentences_and_readds_hashtags(self):
+        from src.utils.tweet_length import shorten_tweet
+        tweet = "Humanity touched the Moon. Armstrong stepped out first. Aldrin followed him. #Apollo11"
+        assert shorten_tweet(tweet, limit=60) == "Humanity touched the Moon. Armstrong stepped out first."
+        assert shorten_tweet(tweet, limit=40) == "Humanity touched the Moon. #Apollo11"
+
+    def test_shortener_gives_up_without_clause_boundary(self):
+        from src.utils.tweet_length import shorten_tweet
+        assert shorten_tweet("word " * 80, limit=50) is None
+
+    def test_truncate_never_cuts_mid_word_or_hashtag(self):
+        from src.utils.tweet_length import truncate_tweet, weighted_length
+        result = truncate_tweet("Apollo eleven landed #MoonLanding #History", limit=30)
+        assert result == "Apollo eleven landed…"
+        assert weighted_length(result) <= 30
+
+    def test_truncate_without_word_boundary_respects_weight(self):
+        from src.utils.tweet_length import MAX_TWEET_LENGTH, truncate_tweet, weighted_length
+        cjk = truncate_tweet("阿波罗十一号登月" * 40)
+        unbroken = truncate_tweet("x" * 400)
+
+        assert cjk.endswith("…") and unbroken.endswith("…")
+        assert weighted_length(cjk) <= MAX_TWEET_LENGTH
+        assert weighted_length(unbroken) == MAX_TWEET_LENGTH
+        assert len(cjk) == 140          # 139 CJK chars (278) + ellipsis (2)
+
+    async def test_rewrite_shortens_locally_without_second_llm_call(self):
+        from src.rewrite_x import rewrite_for_x
+        from src.utils.tweet_length import weighted_length
+        event = {
+            "title": "Moon Landing", "date": "1969-07-20",
+            "summary": "Apollo 11 landed on the Moon.", "sources": [],
+        }
+        long_tweet = "July 20, 1969: Humanity touched the Moon. " * 6 + "#Apollo11 #MoonLanding"
+        with patch("src.rewrite_x.run_openai", new_callable=AsyncMock,
+                   return_value=long_tweet) as mock_llm:
+            result = await rewrite_for_x(event)
+
+        assert mock_llm.await_count == 1
+        assert weighted_length(result) <= 280
+
+
+# =============================================================================
+# Multi-Candidate Rewrite (mocked LLM)
+# =============================================================================
+class TestRewriteCandidates:
+    EVENT = {
+        "title": "Moon Landing", "date": "1969-07-20",
+        "summary": "Apollo 11 landed on the Moon.", "sources": [],
+    }
+
+    def test_parse_candidates_accepts_json_or_plain_text(self):
+        from src.rewrite_x import parse_candidates
+        assert parse_candidates('{"candidates": ["a", " b ", ""]}') == ["a", "b"]
+        assert parse_candidates("Just one tweet #History") == ["Just one tweet #History"]
+
+    async def test_picks_best_fitting_candidate_in_one_call(self):
+        from src.rewrite_x import rewrite_for_x
+        candidates = [
+            "Humanity reached the Moon. " * 12,                                  # too long
+            "Men walked on the Moon.",                                          # no date/hashtags
+            "July 20, 1969: Apollo 11 put humans on the Moon. #Apollo11 #Space",  # best
+        ]
+        with patch("src.rewrite_x.run_openai", new_callable=AsyncMock,
+                   return_value=json.dumps({"candidates": candidates})) as mock_llm:
+            result = await rewrite_for_x(self.EVENT)
+
+        assert result == candidates[2]
+        assert mock_llm.await_count == 1
+        assert "response_schema" in mock_llm.await_args.kwargs
+
+    def test_year_is_found_in_non_iso_dates(self):
+        from src.event import Event
+        from src.rewrite_x import score_candidate
+        tweet = "1969: Apollo 11 put humans on the Moon. #Apollo11 #Space"
+        iso = score_candidate(tweet, Event.from_dict(self.EVENT))
+        written = score_candidate(tweet, Event.from_dict({**self.EVENT, "date": "July 20, 1969"}))
+        assert written == iso
+        assert written > score_candidate(tweet, Event.from_dict({**self.EVENT, "date": "July 20, 1970"}))
+
+
+# =============================================================================
+# Streaming Rewrite (mocked LLM)
+# =============================================================================
+class _FakeStream:
+    """Async iterator of chat completion chunks that records whether it was closed."""
+
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        from types import SimpleNamespace
+        if self.consumed >= len(self.pieces):
+            raise StopAsyncIteration
+        piece = self.pieces[self.consumed]
+        self.consumed += 1
+        delta = SimpleNamespace(content=piece)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamOpenai:
+    async def test_returns_full_text_and_first_token_time(self, monkeypatch):
+        from src.utils import openai_client
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        client = openai_client.get_openai_client()
+        stream = _FakeStream(["Hello ", "world"])
+
+        with patch.object(client.chat.completions, "create", new_callable=AsyncMock, return_value=stream):
+            result = await openai_client.stream_openai("prompt", use_cache=False)
+
+        assert result["content"] == "Hello world"
+        assert result["aborted"] is False
+        assert result["first_token_seconds"] is not None
+        assert stream.closed
+
+    async def test_aborts_and_closes_stream_when_over_budget(self, monkeypatch):
+        from src.utils import openai_client
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        client = openai_client.get_openai_client()
+        stream = _FakeStream(["x" * 50] * 10)
+
+        with patch.object(client.chat.completions, "create", new_callable=AsyncMock, return_value=stream):
+            result = await openai_client.stream_openai(
+                "prompt", should_abort=lambda text: len(text) > 120
+            )
+
+        assert result["aborted"] is True
+        assert stream.consumed == 3
+        assert stream.closed
+        # Partial output is never cached
+        assert openai_client.cache_get(
+            openai_client.make_cache_key(openai_client.OPENAI_MODEL, openai_client.SYSTEM_PROMPT, "prompt", "{}")
+        ) is None
+
+    async def test_rewrite_goes_to_retry_after_abort(self):
+        from src import rewrite_x
+        event = {"title": "Moon Landing", "date": "1969-07-20", "summary": "Apollo 11.", "sources": []}
+        aborted = {"content": "word " * 80, "aborted": True, "first_token_seconds": 0.1}
+        short = "July 20, 1969: Apollo 11 lands on the Moon. #Apollo11 #Space"
+
+        with patch.object(rewrite_x, "REWRITE_STREAMING", True), \
+             patch("src.rewrite_x.stream_openai", new_callable=AsyncMock, return_value=aborted), \
+             patch("src.rewrite_x.run_openai", new_callable=AsyncMock, return_value=short) as mock_retry:
+            result = await rewrite_x.rewrite_for_x(event)
+
+        assert result == short
+        assert "IMPORTANT" in mock_retry.await_args.args[0]
+
+
+# =============================================================================
+# Seed Draft Queue
+# =============================================================================
+class TestDrafts:
+    EVENT = {
+        "title": "Moon Landing", "date": "1969-07-20",
+        "summary": "Apollo 11 landed on the Moon.", "sources": [],
+    }
+
+    def _seed(self, tmp_path, monkeypatch):
+        from src import drafts
+        monkeypatch.setattr(drafts, "EVENTS_DIR", tmp_path)
+        path = tmp_path / "1969-07-20-moon-landing.json"
+        path.write_text(json.dumps(self.EVENT), encoding="utf-8")
+        return path
+
+    async def test_build_skips_posted_and_up_to_date_drafts(self, tmp_path, monkeypatch):
+        from src import drafts
+        path = self._seed(tmp_path, monkeypatch)
+        (tmp_path / "1776-07-04-independence.json").write_text(json.dumps(self.EVENT), encoding="utf-8")
+        # Runtime state kept in DATA_DIR (= events/ by default) is not a seed event
+        (tmp_path / "rate_limits.json").write_text('{"POST /2/tweets": 1.0}', encoding="utf-8")
+        (tmp_path / "posted_log.json").write_text("[]", encoding="utf-8")
+
+        with patch("src.drafts.rewrite_for_x", new_callable=AsyncMock, return_value="Draft #A #B") as mock_rewrite:
+            first = await drafts.build_drafts(posted={"1776-07-04-independence.json"})
+            second = await drafts.build_drafts(posted={"1776-07-04-independence.json"})
+
+        assert first == {"built": 1, "skipped": 0, "failed": 0}
+        assert second == {"built": 0, "skipped": 1, "failed": 0}
+        assert mock_rewrite.await_count == 1
+        assert drafts.ready_draft(path) == "Draft #A #B"
+
+    async def test_draft_invalidated_by_event_or_prompt_change(self, tmp_path, monkeypatch):
+        from src import drafts
+        path = self._seed(tmp_path, monkeypatch)
+        with patch("src.drafts.rewrite_for_x", new_callable=AsyncMock, return_value="Draft"):
+            await drafts.build_drafts(posted=set())
+
+        with patch.object(drafts, "REWRITE_TEMPLATE", "a new prompt {{event_json}}"):
+            assert drafts.ready_draft(path) is None
+        assert drafts.ready_draft(path) == "Draft"
+
+        path.write_text(json.dumps({**self.EVENT, "summary": "Edited."}), encoding="utf-8")
+        assert drafts.ready_draft(path) is None
+
+    async def test_autopost_seed_cycle_uses_draft_without_llm(self, tmp_path, monkeypatch):
+        from src import autopost, drafts
+        path = self._seed(tmp_path, monkeypatch)
+        drafts.get_draft_store().put(path.name, drafts.file_hash(path), drafts.prompt_hash(), "Ready #A #B")
+
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch.object(autopost, "pick_next_seed_event", return_value=path), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock,
+                   return_value={"error": "offline"}), \
+             patch("src.autopost.send_alert", new_callable=AsyncMock), \
+             patch("src.autopost.rewrite_for_x", new_callable=AsyncMock) as mock_rewrite, \
+             patch("src.autopost.post_tweet", return_value={"success": True, "tweet_id": "1"}) as mock_post:
+            await autopost.run_autopost()
+
+        mock_rewrite.assert_not_awaited()
+        mock_post.assert_called_once_with("Ready #A #B")
+        assert drafts.ready_draft(path) is None
+
+
+# =============================================================================
+# X Rate Limits (mocked API)
+# =============================================================================
+def _http_response(status: int, headers: dict, body: dict):
+    import requests
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "Too Many Requests" if status == 429 else "OK"
+    response.headers.update(headers)
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+class TestRateLimits:
+    def test_blocked_only_while_budget_is_exhausted(self):
+        import time
+        from src.utils.rate_limit import get_rate_limits
+        limits = get_rate_limits()
+        reset = int(time.time()) + 600
+
+        limits.update("ep", {"x-rate-limit-remaining": "3", "x-rate-limit-reset": str(reset)})
+        assert limits.blocked_until("ep") is None
+
+        limits.update("ep", {"X-User-Limit-24hour-Remaining": "0", "X-User-Limit-24hour-Reset": str(reset)})
+        assert limits.blocked_until("ep") == reset
+
+        limits.update("ep", {"x-rate-limit-remaining": "5", "x-rate-limit-reset": str(reset)})
+        assert limits.blocked_until("ep") is None
+
+    def test_429_records_reset_and_never_sleeps(self):
+        import time
+        import tweepy
+        from src import post_to_x
+        reset = int(time.time()) + 900
+        error = tweepy.TooManyRequests(_http_response(
+            429, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(reset)}, {"title": "Too Many Requests"},
+        ))
+        client = MagicMock()
+        client.create_tweet.side_effect = error
+
+        with patch("src.post_to_x.get_x_client", return_value=client), \
+             patch("time.sleep") as mock_sleep:
+            first = post_to_x.post_tweet("Hello")
+            second = post_to_x.post_tweet("Hello")
+
+        assert first["error"] == "rate_limit" and first["retry_at"] == reset
+        # The second attempt is refused locally, without an API call
+        assert second["retry_at"] == reset
+        assert client.create_tweet.call_count == 1
+        mock_sleep.assert_not_called()
+
+    def test_success_reads_id_from_raw_response(self):
+        from src import post_to_x
+        client = MagicMock()
+        client.create_tweet.return_value = _http_response(
+            201, {"x-rate-limit-remaining": "99"}, {"data": {"id": "123", "text": "Hello"}},
+        )
+        with patch("src.post_to_x.get_x_client", return_value=client):
+            assert post_to_x.post_tweet("Hello") == {"success": True, "tweet_id": "123"}
+
+    async def test_autopost_queues_rate_limited_tweet_and_retries_it(self):
+        from src import autopost
+        from src.outbox import get_outbox
+        limited = {"success": False, "error": "rate_limit", "detail": "429", "retry_at": 1234.0}
+
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock,
+                   return_value={"candidates": iter([{"title": "Apollo 11", "year": 1969}])}), \
+             patch("src.autopost.extract_event", new_callable=AsyncMock,
+                   return_value={"title": "Apollo 11", "date": "1969-07-20", "summary": "s", "sources": []}), \
+             patch("src.autopost.rewrite_for_x", new_callable=AsyncMock, return_value="Moon! #A #B"), \
+             patch("src.autopost.post_tweet", return_value=limited):
+            retry_at = await autopost.run_autopost()
+
+        assert retry_at == 1234.0
+        queued = get_outbox().next_queued()
+        assert queued["tweet"] == "Moon! #A #B" and queued["retry_at"] == 1234.0
+
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock) as mock_fetch, \
+             patch("src.autopost.post_tweet", return_value={"success": True, "tweet_id": "9"}) as mock_post:
+            assert await autopost.run_autopost() is None
+
+        mock_fetch.assert_not_awaited()
+        mock_post.assert_called_once_with("Moon! #A #B")
+        assert get_outbox().get("Apollo 11")["state"] == "posted"
+        assert get_outbox().next_queued() is None
+
+    async def test_queued_post_waits_for_reset_while_cycle_posts_fresh(self):
+        import time
+        from src import autopost
+        from src.outbox import get_outbox
+        outbox = get_outbox()
+        outbox.begin("Old", "Queued #A #B")
+        outbox.mark_queued("Old", time.time() + 3600)
+        assert outbox.next_queued(due_at=time.time()) is None
+        assert outbox.next_queued()["key"] == "Old"
+
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock,
+                   return_value={"candidates": iter([{"title": "Apollo 11", "year": 1969}])}), \
+             patch("src.autopost.extract_event", new_callable=AsyncMock,
+                   return_value={"title": "Apollo 11", "date": "1969-07-20", "summary": "s", "sources": []}), \
+             patch("src.autopost.rewrite_for_x", new_callable=AsyncMock, return_value="Moon! #A #B"), \
+             patch("src.autopost.post_tweet", return_value={"success": True, "tweet_id": "9"}) as mock_post:
+            await autopost.run_autopost()
+
+        mock_post.assert_called_once_with("Moon! #A #B")
+        assert outbox.get("Old")["state"] == "pending"
+
+
+# =============================================================================
+# Post Outbox
+# =============================================================================
+class TestOutbox:
+    def test_migrates_legacy_json_files_once(self, tmp_path):
+        from src.outbox import get_outbox
+        (tmp_path / "posted_log.json").write_text(json.dumps(["a.json", "Apollo 11"]), encoding="utf-8")
+        (tmp_path / "pending_post.json").write_text(json.dumps(
+            {"tweet": "T", "post_key": "b.json", "seed_file": "b.json", "retry_at": 99.0}
+        ), encoding="utf-8")
+
+        outbox = get_outbox()
+        assert outbox.posted_keys() == {"a.json", "Apollo 11", "b.json"}
+        assert outbox.next_queued()["key"] == "b.json"
+        assert not (tmp_path / "posted_log.json").exists()
+        assert (tmp_path / "posted_log.json.migrated").exists()
+        assert (tmp_path / "pending_post.json.migrated").exists()
+
+    def test_begin_is_idempotent(self):
+        from src.outbox import get_outbox
+        outbox = get_outbox()
+
+        assert outbox.begin("k", "tweet") is True
+        # In flight: a second attempt (e.g. after a crash) must not send
+        assert outbox.begin("k", "tweet") is False
+        assert [row["key"] for row in outbox.in_doubt()] == ["k"]
+
+        outbox.mark_failed("k", "api_error")
+        assert "k" not in outbox.posted_keys()
+        assert outbox.begin("k", "tweet") is True
+        outbox.mark_posted("k", "123")
+        assert outbox.begin("k", "tweet") is False
+
+        row = outbox.get("k")
+        assert row["state"] == "posted" and row["tweet_id"] == "123" and row["attempts"] == 2
+
+    async def test_autopost_never_resends_in_doubt_post(self, tmp_path, monkeypatch):
+        from src import autopost
+        from src.outbox import get_outbox
+        seed = tmp_path / "1969-07-20-moon-landing.json"
+        get_outbox().begin(seed.name, "Moon #A #B", seed.name)  # crashed mid-send
+
+        from src import catalog
+        monkeypatch.setattr(catalog, "_catalog", catalog.EventCatalog(tmp_path, tmp_path / "catalog.sqlite3"))
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch.object(autopost, "EVENTS_DIR", tmp_path), \
+             patch("src.autopost.fetch_onthisday_candidates", new_callable=AsyncMock,
+                   return_value={"error": "offline"}), \
+             patch("src.autopost.send_alert", new_callable=AsyncMock) as mock_alert, \
+             patch("src.autopost.post_tweet") as mock_post:
+            seed.write_text(json.dumps({"title": "Moon", "date": "1969-07-20", "summary": "s", "sources": []}))
+            await autopost.run_autopost()
+
+        mock_post.assert_not_called()
+        assert "may or may not have been published" in mock_alert.await_args_list[0].args[0]
+
+
+# =============================================================================
+# Event Catalog
+# =============================================================================
+class TestEventCatalog:
+    def _write(self, directory, name, title, date):
+        path = directory / name
+        path.write_text(json.dumps({"title": title, "date": date, "summary": "s", "sources": []}))
+        return path
+
+    def test_indexes_and_lookups(self, tmp_path):
+        from src.catalog import EventCatalog
+        events = tmp_path / "events"
+        events.mkdir()
+        self._write(events, "1969-07-20-moon-landing.json", "Moon Landing", "1969-07-20")
+        self._write(events, "1776-07-04-independence.json", "Independence", "1776-07-04")
+        self._write(events, "1066-10-14-battle-of-hastings.json", "Battle of Hastings", "1066-10-14")
+        (events / "posted_log.json").write_text("[]")
+        (events / "rate_limits.json").write_text('{"POST /2/tweets": 1.0}')
+
+        catalog = EventCatalog(events, tmp_path / "catalog.sqlite3")
+        assert catalog.refresh() == {"added": 3, "updated": 0, "removed": 0}
+
+        assert catalog.next_unposted(set()) == "1066-10-14-battle-of-hastings.json"
+        assert catalog.next_unposted({"1066-10-14-battle-of-hastings.json"}) == "1776-07-04-independence.json"
+        assert catalog.next_unposted(set(), after="1776-07-04-independence.json") == "1969-07-20-moon-landing.json"
+        assert catalog.next_unposted(set(), after="1969-07-20-moon-landing.json") is None
+        assert [e["slug"] for e in catalog.on_month_day(7, 20)] == ["moon-landing"]
+        assert [e["year"] for e in catalog.by_year_range(1700, 1969)] == [1776, 1969]
+        assert catalog.by_year_range(1800, 1900) == []
+
+    def test_refresh_is_incremental_and_persisted(self, tmp_path):
+        import os
+        from src.catalog import EventCatalog
+        events = tmp_path / "events"
+        events.mkdir()
+        moon = self._write(events, "1969-07-20-moon-landing.json", "Moon Landing", "July 20, 1969")
+        hastings = self._write(events, "1066-10-14-battle-of-hastings.json", "Battle of Hastings", "1066-10-14")
+        EventCatalog(events, tmp_path / "catalog.sqlite3").refresh()
+
+        # A fresh process loads the manifest and re-reads nothing unchanged
+        catalog = EventCatalog(events, tmp_path / "catalog.sqlite3")
+        with patch("src.catalog._describe") as mock_describe:
+            assert catalog.refresh() == {"added": 0, "updated": 0, "removed": 0}
+        mock_describe.assert_not_called()
+        assert catalog.get(moon.name)["date"] == "1969-07-20"
+
+        hastings.unlink()
+        self._write(events, moon.name, "Moon Landing", "1969-07-21")
+        stat = moon.stat()
+        os.utime(moon, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert catalog.refresh() == {"added": 0, "updated": 1, "removed": 1}
+        assert catalog.next_unposted(set()) == moon.name
+        assert catalog.on_month_day(7, 21)[0]["filename"] == moon.name
+
+    def test_shared_catalog_refreshes_only_when_asked(self):
+        from src.catalog import EventCatalog, get_catalog
+        with patch.object(EventCatalog, "refresh", autospec=True) as mock_refresh:
+            get_catalog()                  # built by conftest, not refreshed yet
+            get_catalog()
+            assert mock_refresh.call_count == 0
+            get_catalog(refresh=True)
+            assert mock_refresh.call_count == 1
+
+
+# =============================================================================
+# Speculative Live/Seed Preparation
+# =============================================================================
+class TestSpeculativePrep:
+    async def test_live_wins_and_seed_standby_is_cancelled(self):
+        import asyncio
+        from src import autopost
+        seed_cancelled = asyncio.Event()
+
+        async def slow_seed(posted, **kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                seed_cancelled.set()
+                raise
+
+        live = {"post_key": "Apollo 11", "tweet": "Moon #A #B", "seed_file": None}
+        with patch.object(autopost, "SPECULATIVE_PREP", True), \
+             patch.object(autopost, "_prepare_live", new_callable=AsyncMock, return_value=live), \
+             patch.object(autopost, "_prepare_seed", side_effect=slow_seed):
+            assert await autopost._prepare(set()) == live
+        assert seed_cancelled.is_set()
+
+    async def test_failed_live_costs_only_the_slower_path(self):
+        import asyncio
+        import time
+        from src import autopost
+
+        async def live(posted, **kwargs):
+            await asyncio.sleep(0.2)
+            return {"error": "Live fetch failed: offline"}
+
+        async def seed(posted, **kwargs):
+            await asyncio.sleep(0.2)
+            return {"post_key": "a.json", "tweet": "Seed #A #B", "seed_file": "a.json"}
+
+        with patch.object(autopost, "SPECULATIVE_PREP", True), \
+             patch.object(autopost, "_prepare_live", side_effect=live), \
+             patch.object(autopost, "_prepare_seed", side_effect=seed):
+            started = time.perf_counter()
+            prepared = await autopost._prepare(set())
+            elapsed = time.perf_counter() - started
+
+        assert prepared["post_key"] == "a.json"
+        assert elapsed < 0.35
+
+
+# =============================================================================
+# Cycle Metrics
+# =============================================================================
+class TestMetrics:
+    async def test_spans_record_time_tokens_and_bytes(self, tmp_path, monkeypatch):
+        from types import SimpleNamespace
+        from src.utils import metrics, openai_client
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        client = openai_client.get_openai_client()
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30),
+        )
+
+        with patch.object(client.chat.completions, "create", new_callable=AsyncMock, return_value=response):
+            with metrics.cycle("test") as current:
+                with metrics.span("rewrite"):
+                    await openai_client.run_openai("prompt")
+                    await openai_client.run_openai("prompt")  # served from cache
+                with metrics.span("fetch"):
+                    metrics.record("bytes", 2048)
+
+        totals = current.totals()
+        assert totals["rewrite"]["prompt_tokens"] == 120
+        assert totals["rewrite"]["completion_tokens"] == 30
+        assert totals["rewrite"]["llm_calls"] == 1
+        assert totals["rewrite"]["llm_cache_hits"] == 1
+        assert totals["fetch"]["bytes"] == 2048
+
+        lines = [json.loads(line) for line in (tmp_path / "metrics" / "spans.jsonl").read_text().splitlines()]
+        assert [line["stage"] for line in lines] == ["rewrite", "fetch", "cycle"]
+        prom = (tmp_path / "metrics" / "test.prom").read_text()
+        assert 'historymosaic_stage_total{cycle="test",stage="rewrite",counter="prompt_tokens"} 120' in prom
+        assert 'historymosaic_stage_seconds{cycle="test",stage="fetch"}' in prom
+
+    async def test_counters_reach_spans_from_child_tasks(self):
+        import asyncio
+        from src.utils import metrics
+
+        async def child():
+            metrics.record("retries")
+
+        with metrics.cycle("test") as current:
+            with metrics.span("extract"):
+                await asyncio.gather(child(), child())
+
+        assert current.totals()["extract"]["retries"] == 2
+
+    async def test_live_extraction_times_validation_separately(self):
+        from src import extract_event as extract_module
+        from src.utils import metrics
+
+        async def repair(event):
+            metrics.record("llm_calls")
+            return event
+
+        source = {"title": "Apollo 11", "summary": "Apollo 11 landed on the Moon in 1969."}
+        with patch("src.extract_event.run_openai", AsyncMock(return_value='{"title": "Apollo 11"}')), \
+             patch("src.extract_event.validate_or_fix_event", side_effect=repair):
+            with metrics.cycle("test") as current:
+                with metrics.span("extract", path="live"):
+                    await extract_module.extract_event("Apollo 11", source=source)
+
+        validate = next(s for s in current.spans if s["stage"] == "validate")
+        assert validate["labels"] == {"path": "live"}
+        assert current.totals()["validate"]["llm_calls"] == 1
+        assert "llm_calls" not in current.totals()["extract"]
+
+    async def test_cycle_reports_http_cache_rates(self, tmp_path):
+        import httpx
+        from src.utils import http_cache, metrics
+        http_cache._cache = http_cache.HttpCache(tmp_path / "http.sqlite3")
+        page = httpx.Response(200, text="{}", headers={"ETag": '"v1"'}, request=httpx.Request("GET", "https://x"))
+        not_modified = httpx.Response(304, request=httpx.Request("GET", "https://x"))
+
+        with patch("src.utils.http_cache.http_get", AsyncMock(side_effect=[page, not_modified])):
+            with metrics.cycle("test") as current:
+                with metrics.span("fetch"):
+                    await http_cache.cached_get("https://x")               # miss
+                    await http_cache.cached_get("https://x")               # fresh
+                    await http_cache.cached_get("https://x", max_age=0)    # 304
+
+        assert metrics.http_cache_rates(current) == {"lookups": 3, "hit_rate": 0.667, "revalidated_rate": 0.333}
+        assert "HTTP cache 67% hits, 33% revalidated (304) of 3 lookups" in metrics.summarize(current, 1.0)
+        prom = (tmp_path / "metrics" / "test.prom").read_text()
+        assert 'historymosaic_http_cache_ratio{cycle="test",kind="revalidated"} 0.333' in prom
+
+
+# =============================================================================
+# Cycle Checkpoints
+# =============================================================================
+class TestCheckpoints:
+    EVENT = {"title": "Apollo 11", "date": "1969-07-20", "summary": "Moon landing.", "sources": []}
+    CANDIDATES = [{"title": "Apollo 11", "year": "1969", "summary": "s", "url": "u"}]
+
+    def _live_patches(self, autopost, **overrides):
+        from contextlib import ExitStack
+        from src.event import Event
+        mocks = {
+            "fetch_onthisday_candidates": AsyncMock(return_value={"candidates": iter(self.CANDIDATES)}),
+            "extract_event": AsyncMock(return_value=Event.from_dict(self.EVENT)),
+            "rewrite_for_x": AsyncMock(return_value="Moon! #Apollo11 #Space"),
+            "post_tweet": MagicMock(return_value={"success": True, "tweet_id": "42"}),
+            "send_alert": AsyncMock(),
+        }
+        mocks.update(overrides)
+        stack = ExitStack()
+        stack.enter_context(patch.object(autopost, "DRY_RUN", False))
+        for name, mock in mocks.items():
+            stack.enter_context(patch(f"src.autopost.{name}", mock))
+        return stack, mocks
+
+    async def test_resume_after_crash_before_post_costs_no_llm_calls(self):
+        from src import autopost
+        stack, _ = self._live_patches(autopost, post_tweet=MagicMock(side_effect=SystemExit))
+        with stack, pytest.raises(SystemExit):
+            await autopost.run_autopost("AM")
+
+        # The outbox saw the send start — clear that so this models a crash
+        # just before the API call (after the tweet was generated)
+        from src.outbox import get_outbox
+        get_outbox().mark_failed("Apollo 11", "crashed before send")
+
+        stack, mocks = self._live_patches(autopost)
+        with stack:
+            await autopost.run_autopost("AM")
+
+        mocks["fetch_onthisday_candidates"].assert_not_awaited()
+        mocks["extract_event"].assert_not_awaited()
+        mocks["rewrite_for_x"].assert_not_awaited()
+        mocks["post_tweet"].assert_called_once_with("Moon! #Apollo11 #Space")
+
+    async def test_resume_after_extraction_only_redoes_rewrite(self):
+        from src import autopost
+        stack, _ = self._live_patches(autopost, rewrite_for_x=AsyncMock(side_effect=SystemExit))
+        with stack, pytest.raises(SystemExit):
+            await autopost.run_autopost("AM")
+
+        stack, mocks = self._live_patches(autopost)
+        with stack:
+            await autopost.run_autopost("AM")
+
+        mocks["fetch_onthisday_candidates"].assert_not_awaited()
+        mocks["extract_event"].assert_not_awaited()
+        assert mocks["rewrite_for_x"].await_args.args[0]["title"] == "Apollo 11"
+        mocks["post_tweet"].assert_called_once()
+
+    async def test_finished_slot_is_not_repeated(self):
+        from src import autopost
+        from src.checkpoint import checkpoint_for
+        stack, mocks = self._live_patches(autopost)
+        with stack:
+            await autopost.run_autopost("AM")
+            await autopost.run_autopost("AM")
+            await autopost.run_autopost("PM")
+
+        assert checkpoint_for("AM").stage == "posted"
+        assert mocks["fetch_onthisday_candidates"].await_count == 2
+
+
+# =============================================================================
+# Near-duplicate detection
+# =============================================================================
+class TestNearDuplicates:
+    APOLLO = {
+        "title": "Apollo 11",
+        "year": "1969",
+        "summary": "Apollo 11 was the American spaceflight that first landed humans on the Moon. "
+                   "Commander Neil Armstrong and Lunar Module Pilot Buzz Aldrin landed the Eagle.",
+        "url": "u",
+    }
+
+    def _seed(self, name):
+        import json
+        from src.utils.paths import EVENTS_DIR
+        return json.loads((EVENTS_DIR / name).read_text(encoding="utf-8"))
+
+    def test_live_candidate_matches_seed_on_same_date(self):
+        from datetime import date
+        from src.dedupe import DuplicateIndex, event_fingerprint, source_fingerprint
+        index = DuplicateIndex(":memory:")
+        index.add("1969-07-20-moon-landing.json", event_fingerprint(self._seed("1969-07-20-moon-landing.json")))
+
+        on_the_day = source_fingerprint(self.APOLLO, today=date(2026, 7, 20))
+        assert on_the_day.date == "1969-07-20"
+        assert index.find_duplicate(on_the_day) == "1969-07-20-moon-landing.json"
+
+        # Same words but a different date need a much larger overlap
+        assert index.find_duplicate(source_fingerprint(self.APOLLO, today=date(2026, 7, 21))) is None
+
+    def test_live_date_uses_utc_day(self):
+        from datetime import datetime, timezone
+        from src import dedupe
+        # 23:30 on July 19 in UTC-5 is already July 20 in UTC
+        utc_now = datetime(2026, 7, 20, 4, 30, tzinfo=timezone.utc)
+        with patch.object(dedupe, "datetime") as mock_datetime:
+            mock_datetime.now.side_effect = lambda tz=None: utc_now.astimezone(tz)
+            assert dedupe.source_fingerprint(self.APOLLO).date == "1969-07-20"
+        mock_datetime.now.assert_called_once_with(timezone.utc)
+
+    def test_unrelated_seed_events_are_not_duplicates(self):
+        from src.dedupe import DuplicateIndex, event_fingerprint
+        from src.utils.paths import EVENTS_DIR
+        index = DuplicateIndex(":memory:")
+        for path in sorted(EVENTS_DIR.glob("????-??-??-*.json")):
+            fp = event_fingerprint(self._seed(path.name))
+            assert index.find_duplicate(fp) is None, path.name
+            index.add(path.name, fp)
+
+    def test_index_persists_and_remove_forgets(self, tmp_path):
+        from src.dedupe import DuplicateIndex, event_fingerprint
+        fp = event_fingerprint(self._seed("1969-07-20-moon-landing.json"))
+        DuplicateIndex(tmp_path / "fp.sqlite3").add("moon", fp)
+
+        reopened = DuplicateIndex(tmp_path / "fp.sqlite3")
+        assert "moon" in reopened
+        assert reopened.find_duplicate(fp) == "moon"
+        assert reopened.find_duplicate(fp, ignore="moon") is None
+        reopened.remove("moon")
+        assert DuplicateIndex(tmp_path / "fp.sqlite3").find_duplicate(fp) is None
+
+    async def test_live_candidate_duplicating_posted_seed_is_skipped(self):
+        from src import autopost
+        from src.outbox import get_outbox
+        other = {"title": "Other", "year": "1900", "summary": "Something else entirely.", "url": "u"}
+        # Worded like the seed, so it matches on any date
+        apollo = {**self.APOLLO, "summary": self._seed("1969-07-20-moon-landing.json")["summary"]}
+        get_outbox().import_posted(["1969-07-20-moon-landing.json"])
+
+        extract = AsyncMock(return_value={"title": "Other", "date": "1900", "summary": "s"})
+        with patch.object(autopost, "DRY_RUN", False), \
+             patch("src.autopost.fetch_onthisday_candidates",
+                   new_callable=AsyncMock, return_value={"candidates": iter([apollo, other])}), \
+             patch("src.autopost.extract_event", extract), \
+             patch("src.autopost.rewrite_for_x", new_callable=AsyncMock, return_value="Tweet #A #B"), \
+             patch("src.autopost.post_tweet", return_value={"success": True, "tweet_id": "1"}):
+            await autopost.run_autopost("AM")
+
+        assert extract.await_args.args[0]["title"] == "Other"
+        assert get_outbox().get("Other")["state"] == "posted"
+
+    async def test_seed_duplicating_posted_live_event_is_skipped(self):
+        from src import autopost
+        from src.catalog import get_catalog
+        from src.dedupe import event_fingerprint
+        fp = event_fingerprint(self._seed("1969-07-20-moon-landing.json"))
+        with patch("src.autopost.post_tweet", return_value={"success": True, "tweet_id": "1"}):
+            await autopost._publish("Moon #A #B", "Apollo 11", None, fingerprint=fp)
+
+        earlier = {n for n in get_catalog(refresh=True)._ordered if n < "1969-07-20-moon-landing.json"}
+        seed_path, seed_fp = autopost._pick_seed(earlier)
+        assert seed_path.name > "1969-07-20-moon-landing.json"
+        assert seed_fp is not None
+
+    async def test_failed_post_releases_fingerprint(self):
+        from src import autopost
+        from src.dedupe import event_fingerprint, get_duplicate_index
+        fp = event_fingerprint(self._seed("1969-07-20-moon-landing.json"))
+        with patch("src.autopost.post_tweet", return_value={"success": False, "error": "api", "detail": "x"}), \
+             patch("src.autopost.send_alert", new_callable=AsyncMock):
+            await autopost._publish("Moon #A #B", "Apollo 11", None, fingerprint=fp)
+
+        assert get_duplicate_index().find_duplicate(fp) is None
+
+
+# =============================================================================
+# Scheduler
+# =============================================================================
+class TestScheduler:
+    def test_parse_slots(self):
+        from src.schedule import parse_slots
+        assert parse_slots("AM=09:00, PM=14:00,EVE=19:30") == [("AM", 9, 0), ("PM", 14, 0), ("EVE", 19, 30)]
+        assert parse_slots("AM=09:00,bad,PM=25:00,AM=10:00") == [("AM", 9, 0)]
+
+    def test_parse_slots_falls_back_to_post_time(self):
+        from src.schedule import parse_slots
+        assert parse_slots("", "08:15") == [("daily", 8, 15)]
+        assert parse_slots("", "noon") == [("daily", 12, 0)]
+
+    async def test_overlapping_runs_for_a_slot_are_skipped(self):
+        import asyncio
+        from src import schedule
+        release = asyncio.Event()
+
+        async def slow_autopost(slot):
+            await release.wait()
+
+        run = AsyncMock(side_effect=slow_autopost)
+        with patch.object(schedule, "run_autopost", run):
+            first = asyncio.create_task(schedule.job("AM"))
+            await asyncio.sleep(0)
+            await schedule.job("AM")           # same slot, still running — skipped
+            other = asyncio.create_task(schedule.job("PM"))
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(first, other)
+
+        assert [c.args[0] for c in run.await_args_list] == ["AM", "PM"]
+
+    async def test_rate_limited_run_schedules_retry_for_its_slot(self):
+        from src import schedule
+        from src.outbox import get_outbox
+        get_outbox().begin("Apollo 11", "Moon #A #B", slot="PM")
+        get_outbox().mark_queued("Apollo 11", 123.0)
+
+        with patch.object(schedule, "run_autopost", new_callable=AsyncMock, return_value=123.0), \
+             patch.object(schedule, "schedule_retry") as retry:
+            await schedule.job("AM")     # e.g. AM's cycle retried PM's post and hit the limit again
+        retry.assert_called_once_with(123.0, "PM")
+
+    def test_startup_retry_uses_the_queued_posts_slot(self):
+        import asyncio
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from src import autopost, schedule
+        from src.outbox import get_outbox
+        limited = {"success": False, "error": "rate_limit", "detail": "429", "retry_at": 4e9}
+        with patch("src.autopost.post_tweet", return_value=limited):
+            asyncio.run(autopost._publish("Moon #A #B", "Apollo 11", None, slot="EVE"))
+        assert get_outbox().get("Apollo 11")["slot"] == "EVE"
+
+        with patch.object(schedule, "SLOTS", [("AM", 9, 0), ("EVE", 19, 0)]), \
+             patch.object(schedule, "_scheduler", AsyncIOScheduler(timezone="UTC")):
+            schedule._add_jobs(schedule._scheduler)
+            assert schedule._scheduler.get_job("autopost_retry:EVE").args == ("EVE",)
+
+    def test_each_slot_keeps_its_own_retry(self):
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from src import schedule
+        from src.outbox import get_outbox
+        for key, slot, retry_at in [("Apollo 11", "AM", 4e9 + 60), ("Berlin Wall", "PM", 4e9), ("Sputnik", "AM", 4e9)]:
+            get_outbox().begin(key, f"{key} #A #B", slot=slot)
+            get_outbox().mark_queued(key, retry_at)
+
+        with patch.object(schedule, "SLOTS", [("AM", 9, 0), ("PM", 14, 0)]), \
+             patch.object(schedule, "_scheduler", AsyncIOScheduler(timezone="UTC")):
+            schedule.schedule_queued_retry()
+            jobs = {job.id: job for job in schedule._scheduler.get_jobs()}
+
+        assert set(jobs) == {"autopost_retry:AM", "autopost_retry:PM"}
+        assert jobs["autopost_retry:AM"].trigger.run_date.timestamp() == 4e9
+
+    def test_outbox_adds_slot_column_to_old_databases(self, tmp_path):
+        import sqlite3
+        from src.outbox import Outbox
+        conn = sqlite3.connect(tmp_path / "old.sqlite3")
+        conn.execute(
+            "CREATE TABLE posts (key TEXT PRIMARY KEY, state TEXT NOT NULL, in_flight INTEGER NOT NULL DEFAULT 0, "
+            "tweet TEXT, tweet_id TEXT, seed_file TEXT, retry_at REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+        conn.close()
+
+        outbox = Outbox(tmp_path / "old.sqlite3", tmp_path / "none.json", tmp_path / "none2.json")
+        assert outbox.begin("k", "tweet", slot="AM")
+        assert outbox.get("k")["slot"] == "AM"
+
+    async def test_scheduler_adds_a_job_per_slot_and_closes_clients(self):
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from src import schedule
+        scheduler = AsyncIOScheduler(timezone="UTC")
+        with patch.object(schedule, "SLOTS", [("AM", 9, 0), ("EVE", 19, 0)]):
+            schedule._add_jobs(scheduler)
+        assert sorted(j.id for j in scheduler.get_jobs()) == [
+            "autopost_AM", "autopost_EVE", "onthisday_refresh",
+        ]
+
+        scheduler.start()
+        with patch.object(schedule, "close_http_client", new_callable=AsyncMock) as close_http, \
+             patch.object(schedule, "close_openai_client", new_callable=AsyncMock) as close_openai:
+            await schedule._shutdown(scheduler)
+        close_http.assert_awaited_once()
+        close_openai.assert_awaited_once()